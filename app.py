@@ -1,5 +1,5 @@
 # app.py
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, render_template, request, jsonify, redirect, url_for, Response
 import os
 import time
 import threading
@@ -7,9 +7,18 @@ from werkzeug.serving import run_simple
 from dotenv import load_dotenv
 import logging
 import json
+import uuid
 
 # Importar el módulo de automatización de noticias
-from news_automation import generate_news_report, search_news, create_notion_page, format_api_token
+from news_automation import (format_api_token, search_local_index, report_options, find_cached_report,
+                             get_report_history, parse_languages, JOB_QUEUE_MODE)
+from job_queue import get_job_queue
+from worker import enqueue_report, start_worker_threads
+from circuit_breaker import breaker_states
+from quota import get_quota_planner
+from idempotency import get_idempotency_store, request_fingerprint
+from http_cache import PrecompressedPage, choose_encoding, compress, MIN_COMPRESS_SIZE
+import metrics
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -20,8 +29,21 @@ load_dotenv()
 
 app = Flask(__name__)
 
-# Variable global para almacenar el estado de las tareas
-task_status = {}
+# Hilos worker propios (modo local); el estado de las tareas se guarda en la cola de trabajos
+WEB_WORKER_THREADS = int(os.getenv("WEB_WORKER_THREADS", 4))
+# Hilos que solo procesan informes interactivos: los programados de la misma cola no los ocupan
+WEB_RESERVED_THREADS = int(os.getenv("WEB_RESERVED_THREADS", 1 if WEB_WORKER_THREADS > 1 else 0))
+if JOB_QUEUE_MODE == 'local' and not 0 <= WEB_RESERVED_THREADS < WEB_WORKER_THREADS:
+    raise ValueError(f"WEB_RESERVED_THREADS ({WEB_RESERVED_THREADS}) debe ser menor que "
+                     f"WEB_WORKER_THREADS ({WEB_WORKER_THREADS})")
+local_workers = []
+local_workers_lock = threading.Lock()
+# Tiempo durante el que una clave de idempotencia de /generate devuelve la misma tarea
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", 3600))
+# Segundos que los navegadores pueden reutilizar /embed y /mini sin volver a pedirlas
+PAGE_MAX_AGE = int(os.getenv("PAGE_MAX_AGE", 300))
+precompressed_pages = {}
+precompressed_pages_lock = threading.Lock()
 
 @app.route('/')
 def index():
@@ -44,70 +66,235 @@ def generate():
         return jsonify({'status': 'error', 'message': 'Se requiere un tema de búsqueda'})
 
     # Crear un ID único para esta tarea
-    task_id = f"task_{int(time.time())}"
-    task_status[task_id] = {
-        'status': 'running',
-        'topic': topic,
-        'max_results': max_results,
-        'message': 'Iniciando búsqueda de noticias...',
-        'page_url': None
-    }
-
-    # Iniciar la generación en un hilo separado
-    thread = threading.Thread(target=process_report_generation, args=(task_id, topic, max_results))
-    thread.daemon = True
-    thread.start()
+    task_id = f"task_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+    payload = {'topic': topic, 'max_results': max_results}
+    languages = parse_languages(request.form.get('languages'))
+    if languages:
+        payload['languages'] = languages
+    force_refresh = request.form.get('force_refresh', '').lower() in ('1', 'true', 'on', 'yes')
+    profile = request.form.get('profile', '').lower() in ('1', 'true', 'on', 'yes')
+
+    # Una petición repetida (doble clic, recarga del iframe) devuelve la tarea que ya creó
+    request_key = request.headers.get('Idempotency-Key') or request.form.get('request_key')
+    if request_key:
+        fingerprint = request_fingerprint(dict(payload, force_refresh=force_refresh, profile=profile))
+        existing = get_idempotency_store().reserve(request_key, task_id, fingerprint, IDEMPOTENCY_TTL)
+        if existing:
+            return duplicate_response(existing, fingerprint)
 
-    return jsonify({'status': 'started', 'task_id': task_id})
-
-def process_report_generation(task_id, topic, max_results):
-    """Procesa la generación del informe en segundo plano"""
     try:
-        # Actualizar estado
-        task_status[task_id]['message'] = 'Buscando noticias...'
-
-        # Buscar noticias
-        articles = search_news(topic, max_results=max_results)
-
-        if not articles:
-            task_status[task_id]['status'] = 'warning'
-            task_status[task_id]['message'] = f"No se encontraron noticias sobre '{topic}'"
-        else:
-            task_status[task_id]['message'] = f"Se encontraron {len(articles)} artículos. Creando página en Notion..."
-
-        # Crear página en Notion
-        page_url = create_notion_page(topic, articles)
+        return start_report_task(task_id, payload, force_refresh, profile)
+    except Exception:
+        if request_key:
+            get_idempotency_store().forget(request_key, task_id)
+        raise
+
+def duplicate_response(existing, fingerprint):
+    """Respuesta de /generate para una clave de idempotencia ya usada"""
+    if existing['fingerprint'] != fingerprint:
+        return jsonify({'status': 'error',
+                        'message': 'La clave de la petición ya se usó con otros parámetros'}), 422
+    # La petición original puede estar encolando su tarea en este momento
+    job = get_job_queue().get(existing['task_id'])
+    for _ in range(10):
+        if job:
+            break
+        time.sleep(0.1)
+        job = get_job_queue().get(existing['task_id'])
+    if not job:
+        return jsonify({'status': 'error', 'message': 'Tarea no encontrada'})
+    if job['status'] in ('queued', 'running'):
+        return jsonify({'status': 'started', 'task_id': job['job_id'], 'duplicate': True})
+    return jsonify(dict(job_status(job), duplicate=True))
+
+def start_report_task(task_id, payload, force_refresh, profile):
+    """Devuelve un informe de hoy ya publicado o encola uno nuevo"""
+    topic, max_results, languages = payload['topic'], payload['max_results'], payload.get('languages')
+
+    # Si ya existe un informe idéntico de hoy, devolverlo sin repetir la búsqueda
+    cached = None if force_refresh else find_cached_report(topic, max_results, report_options(languages=languages))
+    if cached:
+        message = f"Informe ya generado hoy con {cached['articles_count']} artículos"
+        get_job_queue().record(task_id, 'report', payload, 'completed', message,
+                               {'page_url': cached['page_url'], 'cached': True}, priority='interactive')
+        return jsonify(job_status(get_job_queue().get(task_id)))
+
+    # La generación la hace un worker (hilos de este proceso en modo local, procesos
+    # 'worker' en modo distribuido); la web no envía notificaciones
+    ensure_local_workers()
+    # Los informes pedidos desde la web pasan delante de los programados y tienen reservada parte de las llamadas
+    enqueue_report(topic, job_id=task_id, priority='interactive', max_results=max_results, notification_method=None,
+                   force_refresh=True, profile=profile, languages=languages)
 
-        if not page_url:
-            task_status[task_id]['status'] = 'error'
-            task_status[task_id]['message'] = 'Error al crear la página en Notion'
-        else:
-            task_status[task_id]['status'] = 'completed'
-            task_status[task_id]['message'] = 'Informe generado con éxito'
-            task_status[task_id]['page_url'] = page_url
+    return jsonify({'status': 'started', 'task_id': task_id})
 
-    except Exception as e:
-        task_status[task_id]['status'] = 'error'
-        task_status[task_id]['message'] = f"Error: {str(e)}"
-        logger.error(f"Error en generación de informe: {str(e)}")
+def ensure_local_workers():
+    """Arranca (una sola vez) los hilos worker de este proceso en modo local"""
+    global local_workers
+    if JOB_QUEUE_MODE != 'local':
+        return
+    with local_workers_lock:
+        if not local_workers:
+            local_workers = start_worker_threads(WEB_WORKER_THREADS, reserved=WEB_RESERVED_THREADS)
+
+def job_status(job):
+    """Convierte un trabajo de la cola en la respuesta de /status"""
+    result = job['result'] or {}
+    return {
+        'task_id': job['job_id'],
+        # Las páginas siguen consultando mientras el estado sea 'running'
+        'status': 'running' if job['status'] in ('queued', 'running') else job['status'],
+        'queue_status': job['status'],
+        'priority': job.get('priority'),
+        'topic': job['payload'].get('topic'),
+        'max_results': job['payload'].get('max_results'),
+        'message': job['message'],
+        'page_url': result.get('page_url'),
+        'cached': result.get('cached', False),
+        'run_id': job['run_id'],
+        'attempts': job['attempts'],
+        'timings': result.get('timings', {}),
+        'counters': result.get('counters', {}),
+        'profile': result.get('profile')
+    }
 
 @app.route('/status/<task_id>')
 def task_status_check(task_id):
     """Endpoint para verificar el estado de una tarea"""
-    if task_id in task_status:
-        return jsonify(task_status[task_id])
+    job = get_job_queue().get(task_id)
+    if job:
+        return jsonify(job_status(job))
     else:
         return jsonify({'status': 'error', 'message': 'Tarea no encontrada'})
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Métricas de rendimiento en formato Prometheus"""
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/health')
+def health():
+    """Endpoint con el estado de los servicios externos (circuitos, cuota diaria) y de la cola"""
+    return jsonify({
+        'status': 'success',
+        'breakers': breaker_states(),
+        'quota': get_quota_planner().status(),
+        'queue': get_job_queue().stats(),
+        'latency': get_job_queue().latency_percentiles()
+    })
+
+@app.route('/search')
+def search():
+    """Endpoint para buscar en el histórico local de artículos"""
+    query = request.args.get('q', '')
+    if not query:
+        return jsonify({'status': 'error', 'message': 'Se requiere un texto de búsqueda (q)'})
+
+    try:
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        limit = 20
+
+    start = time.time()
+    results = search_local_index(
+        query,
+        from_date=request.args.get('from'),
+        to_date=request.args.get('to'),
+        source=request.args.get('source'),
+        limit=limit
+    )
+
+    return jsonify({
+        'status': 'success',
+        'query': query,
+        'count': len(results),
+        'elapsed_ms': round((time.time() - start) * 1000, 2),
+        'articles': results
+    })
+
+@app.route('/history')
+def history():
+    """Endpoint para consultar los informes publicados (copia local de Notion)"""
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        limit = 50
+
+    start = time.time()
+    reports = get_report_history(
+        request.args.get('topic'),
+        from_date=request.args.get('from'),
+        to_date=request.args.get('to'),
+        limit=limit
+    )
+
+    return jsonify({
+        'status': 'success',
+        'count': len(reports),
+        'elapsed_ms': round((time.time() - start) * 1000, 2),
+        'reports': reports
+    })
+
 @app.route('/embed')
 def embed():
     """Versión simplificada para incrustar en Notion"""
-    return render_template('embed.html')
+    return cached_page('embed.html')
 
 @app.route('/mini')
 def mini():
     """Versión mínima para botones en Notion"""
-    return render_template('mini.html')
+    return cached_page('mini.html')
+
+def cached_page(template_name):
+    """
+    Sirve una página sin parámetros renderizada y comprimida una sola vez (se
+    vuelve a renderizar si cambia la plantilla), con ETag y Cache-Control para
+    que los iframes de Notion la reutilicen o reciban un 304.
+    """
+    with precompressed_pages_lock:
+        page = precompressed_pages.get(template_name)
+        if page is None or not page.is_current():
+            template = app.jinja_env.get_template(template_name)
+            page = PrecompressedPage(render_template(template_name).encode('utf-8'), template)
+            precompressed_pages[template_name] = page
+
+    encoding, body, etag = page.variant(request.headers.get('Accept-Encoding'))
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='text/html')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'public, max-age={PAGE_MAX_AGE}'
+    response.vary.add('Accept-Encoding')
+    return response
+
+@app.after_request
+def compress_json_response(response):
+    """
+    Añade ETag (304 si no ha cambiado) y comprime con brotli o gzip las
+    respuestas JSON, como las de /status que las páginas consultan cada 2 segundos.
+    """
+    if response.mimetype != 'application/json' or response.direct_passthrough or response.status_code != 200:
+        return response
+
+    if request.method == 'GET':
+        response.add_etag(weak=True)
+        if 'Cache-Control' not in response.headers:
+            # Se puede guardar, pero hay que revalidarla siempre
+            response.headers['Cache-Control'] = 'no-cache'
+        response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+    body = response.get_data()
+    if encoding and len(body) >= MIN_COMPRESS_SIZE and 'Content-Encoding' not in response.headers:
+        response.set_data(compress(body, encoding, fast=True))
+        response.headers['Content-Encoding'] = encoding
+    return response
 
 @app.route('/config')
 def config():
@@ -0,0 +1,247 @@
+# archive.py
+"""
+Archivo histórico de informes en Parquet (comprimido con zstd), particionado
+por fecha y tema:
+
+    data/archive/articles/date=2024-01-01/topic=economia/<run_id>.parquet
+    data/archive/reports/date=2024-01-01/topic=economia/<run_id>.parquet
+
+Requiere pyarrow (opcional); sin él, el archivo se desactiva.
+"""
+import os
+import re
+import json
+import datetime
+import threading
+import logging
+
+from articles import topic_key
+from storage import data_path
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    from pyarrow import fs
+except ImportError:
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_COMPRESSION = 'zstd'
+
+# Columnas de las particiones (siempre texto, para que 'date' no se convierta en fecha)
+PARTITION_FIELDS = [('date', 'string'), ('topic', 'string')]
+
+ARTICLE_FIELDS = [
+    ('run_id', 'string'),
+    ('position', 'int32'),
+    ('article_id', 'string'),
+    ('title', 'string'),
+    ('description', 'string'),
+    ('url', 'string'),
+    ('source', 'string'),
+    ('author', 'string'),
+    ('published_at', 'string'),
+    ('image_url', 'string'),
+    ('language', 'string'),
+    ('ai_summary', 'string'),
+    ('topic_name', 'string'),
+]
+
+REPORT_FIELDS = [
+    ('run_id', 'string'),
+    ('topic_name', 'string'),
+    ('created_at', 'string'),
+    ('page_url', 'string'),
+    ('articles_count', 'int32'),
+    ('options', 'string'),
+    ('timings', 'string'),
+    ('counters', 'string'),
+]
+
+def is_available():
+    """Indica si está instalado pyarrow."""
+    return pa is not None
+
+def _schema(fields):
+    return pa.schema([(name, getattr(pa, type_name)()) for name, type_name in fields])
+
+def partition_value(topic):
+    """Valor de la partición 'topic' (tema normalizado, apto como nombre de directorio)."""
+    return re.sub(r'\W+', '_', topic_key(topic)).strip('_') or 'sin_tema'
+
+class ReportArchive:
+    """
+    Archivo columnar de los artículos y los informes de cada ejecución. Cada
+    informe añade un archivo por tabla; las lecturas usan pyarrow.dataset con
+    mapeo en memoria y solo abren las particiones que cumplen el filtro.
+    """
+
+    def __init__(self, root=None):
+        """
+        Args:
+            root (str): Directorio del archivo (por defecto, data/archive)
+        """
+        self.root = root or data_path('archive')
+        self.filesystem = fs.LocalFileSystem(use_mmap=True)
+        self.partitioning = ds.partitioning(_schema(PARTITION_FIELDS), flavor='hive')
+
+    def _write(self, table_name, fields, rows, day, topic, run_id):
+        directory = os.path.join(self.root, table_name, f"date={day}", f"topic={partition_value(topic)}")
+        os.makedirs(directory, exist_ok=True)
+        table = pa.Table.from_pylist(rows, schema=_schema(fields))
+        # Escribir en un temporal (las lecturas ignoran los archivos que empiezan por '.')
+        # y renombrar para que una lectura nunca vea un archivo a medias
+        path = os.path.join(directory, f"{run_id}.parquet")
+        temp_path = os.path.join(directory, f".{run_id}.parquet.tmp")
+        pq.write_table(table, temp_path, compression=ARCHIVE_COMPRESSION)
+        os.replace(temp_path, path)
+        return path
+
+    def add_report(self, run_id, topic, articles, page_url=None, options=None, timings=None, counters=None, day=None):
+        """
+        Archiva un informe y sus artículos.
+
+        Args:
+            run_id (str): ID de la ejecución
+            topic (str): Tema del informe
+            articles (list): Artículos del informe, en orden
+            page_url (str): URL de la página de Notion
+            options (dict): Opciones del informe
+            timings (dict): Tiempos por etapa
+            counters (dict): Contadores de la ejecución
+            day (str): Fecha del informe (YYYY-MM-DD, por defecto hoy)
+
+        Returns:
+            int: Número de artículos archivados
+        """
+        day = day or datetime.date.today().isoformat()
+        article_rows = [
+            {
+                'run_id': run_id,
+                'position': position,
+                'article_id': article.get('article_id'),
+                'title': article.get('title'),
+                'description': article.get('description'),
+                'url': article.get('url'),
+                'source': (article.get('source') or {}).get('name'),
+                'author': article.get('author'),
+                'published_at': article.get('publishedAt'),
+                'image_url': article.get('image_url'),
+                'language': article.get('language'),
+                'ai_summary': article.get('ai_summary'),
+                'topic_name': topic
+            }
+            for position, article in enumerate(articles, 1)
+        ]
+        self._write('articles', ARTICLE_FIELDS, article_rows, day, topic, run_id)
+        self._write('reports', REPORT_FIELDS, [{
+            'run_id': run_id,
+            'topic_name': topic,
+            'created_at': datetime.datetime.now().isoformat(),
+            'page_url': page_url,
+            'articles_count': len(articles),
+            'options': json.dumps(options or {}),
+            'timings': json.dumps(timings or {}),
+            'counters': json.dumps(counters or {})
+        }], day, topic, run_id)
+        return len(article_rows)
+
+    def _filter(self, topic=None, from_date=None, to_date=None, run_id=None):
+        condition = None
+        for expression in (
+            ds.field('topic') == partition_value(topic) if topic else None,
+            ds.field('run_id') == run_id if run_id else None,
+            ds.field('date') >= from_date if from_date else None,
+            ds.field('date') <= to_date if to_date else None,
+        ):
+            if expression is not None:
+                condition = expression if condition is None else condition & expression
+        return condition
+
+    def scan(self, table_name='articles', topic=None, from_date=None, to_date=None, columns=None, run_id=None):
+        """
+        Lee el archivo filtrando por tema y fechas.
+
+        Args:
+            table_name (str): 'articles' o 'reports'
+            topic (str): Tema (sin distinguir mayúsculas)
+            from_date (str): Fecha mínima (YYYY-MM-DD)
+            to_date (str): Fecha máxima (YYYY-MM-DD)
+            columns (list): Columnas a leer (por defecto, todas)
+            run_id (str): Solo las filas de esta ejecución
+
+        Returns:
+            pyarrow.Table: Filas encontradas (con las columnas 'date' y 'topic' de la partición)
+        """
+        path = os.path.join(self.root, table_name)
+        fields = ARTICLE_FIELDS if table_name == 'articles' else REPORT_FIELDS
+        if not os.path.isdir(path):
+            return _schema(fields + PARTITION_FIELDS).empty_table()
+        dataset = ds.dataset(path, format='parquet', partitioning=self.partitioning,
+                             filesystem=self.filesystem)
+        return dataset.to_table(columns=columns, filter=self._filter(topic, from_date, to_date, run_id))
+
+    def latest_articles(self, topic, from_date=None, to_date=None, limit=None):
+        """
+        Artículos del informe más reciente de un tema en el rango de fechas.
+
+        Returns:
+            list: Artículos (diccionarios con las columnas del archivo), en el orden del informe
+        """
+        reports = self.scan('reports', topic, from_date, to_date, columns=['run_id', 'created_at'])
+        if not reports.num_rows:
+            return []
+        latest = max(reports.to_pylist(), key=lambda report: report['created_at'])
+        table = self.scan('articles', topic, from_date, to_date, run_id=latest['run_id'])
+        rows = sorted(table.to_pylist(), key=lambda row: row['position'])
+        return rows[:limit] if limit else rows
+
+def format_report_markdown(topic, articles, day=None):
+    """
+    Genera un informe en Markdown a partir de artículos del archivo.
+
+    Args:
+        topic (str): Tema del informe
+        articles (list): Artículos devueltos por ReportArchive
+        day (str): Fecha del informe (YYYY-MM-DD)
+
+    Returns:
+        str: Informe en Markdown
+    """
+    day = day or datetime.date.today().isoformat()
+    lines = [f"# Informe de Noticias: {topic}", "", f"Fecha: {day}", ""]
+    if not articles:
+        lines.append("No se encontraron noticias relevantes para el tema solicitado.")
+    for position, article in enumerate(articles, 1):
+        lines.append(f"## {position}. {article.get('title') or 'Sin título'}")
+        details = [value for value in (article.get('source'), article.get('published_at'), article.get('language')) if value]
+        if details:
+            lines.append(f"*{' · '.join(details)}*")
+        lines.append("")
+        if article.get('ai_summary'):
+            lines.extend([f"**Resumen IA:** {article['ai_summary']}", ""])
+        if article.get('description'):
+            lines.extend([article['description'], ""])
+        if article.get('url'):
+            lines.extend([f"[Leer artículo completo]({article['url']})", ""])
+    return '\n'.join(lines) + '\n'
+
+_archive = None
+_archive_lock = threading.Lock()
+
+def get_archive():
+    """
+    Devuelve el archivo de informes (None si pyarrow no está instalado).
+
+    Returns:
+        ReportArchive: Archivo abierto
+    """
+    global _archive
+    if pa is None:
+        return None
+    with _archive_lock:
+        if _archive is None:
+            _archive = ReportArchive()
+        return _archive
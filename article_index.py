@@ -0,0 +1,219 @@
+# article_index.py
+import re
+import datetime
+import threading
+import logging
+
+from storage import connect
+
+logger = logging.getLogger(__name__)
+
+_index = None
+_index_lock = threading.Lock()
+
+def _fts_query(text):
+    """
+    Convierte texto libre en una consulta FTS5 segura (todas las palabras, en cualquier orden).
+
+    Args:
+        text (str): Texto de búsqueda
+
+    Returns:
+        str: Consulta FTS5 o cadena vacía si no hay palabras
+    """
+    words = re.findall(r'\w+', text or '')
+    return ' '.join(f'"{word}"' for word in words)
+
+class ArticleIndex:
+    """
+    Índice local de texto completo (SQLite FTS5) de todos los artículos obtenidos.
+    """
+
+    def __init__(self, db_name='articles.db'):
+        """
+        Args:
+            db_name (str): Archivo SQLite del índice
+        """
+        self.lock = threading.Lock()
+        self.conn = connect(db_name)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY,
+                article_id TEXT UNIQUE,
+                url TEXT,
+                title TEXT,
+                description TEXT,
+                full_content TEXT,
+                source TEXT,
+                published_at TEXT,
+                topic TEXT,
+                indexed_at TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_articles_url ON articles(url);
+            CREATE INDEX IF NOT EXISTS idx_articles_published ON articles(published_at);
+            CREATE INDEX IF NOT EXISTS idx_articles_source ON articles(source);
+            -- Índice de texto sin copia de los textos: los lee de articles y lo mantienen los triggers
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                title, description, full_content, content='articles', content_rowid='id'
+            );
+            CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+                INSERT INTO articles_fts (rowid, title, description, full_content)
+                VALUES (new.id, new.title, new.description, new.full_content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, description, full_content)
+                VALUES ('delete', old.id, old.title, old.description, old.full_content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE OF title, description, full_content
+            ON articles BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, description, full_content)
+                VALUES ('delete', old.id, old.title, old.description, old.full_content);
+                INSERT INTO articles_fts (rowid, title, description, full_content)
+                VALUES (new.id, new.title, new.description, new.full_content);
+            END;
+        """)
+        self.conn.commit()
+
+    def add_articles(self, articles, topic=None):
+        """
+        Guarda (o actualiza) artículos en el índice.
+
+        Args:
+            articles (list): Artículos con la estructura de search_news
+            topic (str): Tema con el que se obtuvieron
+
+        Returns:
+            int: Número de artículos indexados
+        """
+        now = datetime.datetime.now().isoformat()
+        count = 0
+        with self.lock:
+            for article in articles:
+                article_id = article.get('article_id')
+                if not article_id:
+                    continue
+                self.conn.execute("""
+                    INSERT INTO articles (article_id, url, title, description, full_content, source,
+                                          published_at, topic, indexed_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(article_id) DO UPDATE SET
+                        title = excluded.title,
+                        description = excluded.description,
+                        full_content = COALESCE(excluded.full_content, articles.full_content),
+                        topic = COALESCE(articles.topic, excluded.topic),
+                        indexed_at = excluded.indexed_at
+                """, (
+                    article_id,
+                    article.get('url'),
+                    article.get('title'),
+                    article.get('description'),
+                    article.get('full_content'),
+                    (article.get('source') or {}).get('name'),
+                    article.get('publishedAt'),
+                    topic,
+                    now
+                ))
+                count += 1
+            self.conn.commit()
+        return count
+
+    def update_full_content(self, url, full_content):
+        """
+        Añade el contenido completo obtenido por scraping a los artículos con esa URL.
+
+        Args:
+            url (str): URL del artículo
+            full_content (str): Texto completo del artículo
+
+        Returns:
+            int: Número de artículos actualizados
+        """
+        with self.lock:
+            updated = self.conn.execute("UPDATE articles SET full_content = ? WHERE url = ?",
+                                        (full_content, url)).rowcount
+            self.conn.commit()
+        return updated
+
+    def get_full_content(self, article_id):
+        """
+        Devuelve el contenido completo guardado de un artículo.
+
+        Args:
+            article_id (str): ID del artículo
+
+        Returns:
+            str: Texto completo o None
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT full_content FROM articles WHERE article_id = ?", (article_id,)).fetchone()
+        return row['full_content'] if row else None
+
+    def search(self, query, from_date=None, to_date=None, source=None, limit=20):
+        """
+        Busca artículos en el índice local.
+
+        Args:
+            query (str): Texto a buscar en título, descripción y contenido
+            from_date (str): Fecha mínima de publicación (YYYY-MM-DD)
+            to_date (str): Fecha máxima de publicación (YYYY-MM-DD), inclusive
+            source (str): Nombre de la fuente
+            limit (int): Número máximo de resultados
+
+        Returns:
+            list: Artículos encontrados, ordenados por relevancia
+        """
+        fts_query = _fts_query(query)
+        if not fts_query:
+            return []
+
+        sql = """
+            SELECT a.article_id, a.url, a.title, a.description, a.source, a.published_at, a.topic,
+                   bm25(articles_fts) AS score
+            FROM articles_fts
+            JOIN articles a ON a.id = articles_fts.rowid
+            WHERE articles_fts MATCH ?
+        """
+        params = [fts_query]
+        if from_date:
+            sql += " AND a.published_at >= ?"
+            params.append(from_date)
+        if to_date:
+            # Incluir todo el día final
+            sql += " AND a.published_at < ?"
+            params.append(f"{to_date}T99")
+        if source:
+            sql += " AND a.source = ? COLLATE NOCASE"
+            params.append(source)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(int(limit))
+
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+
+        return [{
+            'article_id': row['article_id'],
+            'title': row['title'],
+            'description': row['description'],
+            'url': row['url'],
+            'source': {'id': None, 'name': row['source']},
+            'publishedAt': row['published_at'],
+            'topic': row['topic']
+        } for row in rows]
+
+    def count(self):
+        """Devuelve el número de artículos indexados."""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+def get_article_index():
+    """
+    Devuelve el índice de artículos compartido por el proceso.
+
+    Returns:
+        ArticleIndex: Índice abierto
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ArticleIndex()
+        return _index
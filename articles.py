@@ -0,0 +1,81 @@
+# articles.py
+import datetime
+import hashlib
+
+def make_article_id(url, title):
+    """
+    Genera el ID único de un artículo (útil para caché y referencia).
+
+    Args:
+        url (str): URL del artículo
+        title (str): Título del artículo
+
+    Returns:
+        str: Hash MD5 de la URL y el título
+    """
+    return hashlib.md5(f"{url or ''}{title or ''}".encode()).hexdigest()
+
+def topic_key(topic):
+    """Normaliza un tema para buscarlo (sin distinguir mayúsculas ni espacios extremos)."""
+    return ' '.join((topic or '').lower().split())
+
+def prepare_article(article):
+    """
+    Añade a un artículo los campos que usa el resto del sistema
+    (article_id, image_url y formatted_date).
+
+    Args:
+        article (dict): Artículo con la estructura de NewsAPI
+
+    Returns:
+        dict: El mismo artículo, modificado en el sitio
+    """
+    # Generar un ID único para el artículo (útil para caché y referencia)
+    article['article_id'] = make_article_id(article.get('url', ''), article.get('title', ''))
+
+    # Añadir la imagen del artículo si existe
+    if 'urlToImage' in article and article['urlToImage']:
+        article['image_url'] = article['urlToImage']
+
+    # Formatear la fecha
+    if 'publishedAt' in article and article['publishedAt']:
+        try:
+            date_obj = datetime.datetime.fromisoformat(article['publishedAt'].replace('Z', '+00:00'))
+            article['formatted_date'] = date_obj.strftime('%d-%m-%Y %H:%M')
+        except:
+            article['formatted_date'] = article['publishedAt']
+
+    return article
+
+def merge_by_recency(result_lists, limit):
+    """
+    Combina varias listas de artículos (por ejemplo, una por idioma) sin
+    duplicados, intercalándolas: en cada vuelta se toma el siguiente artículo
+    más reciente de cada lista y se ordenan entre sí por fecha. Así ninguna
+    lista acapara los primeros puestos.
+
+    Args:
+        result_lists (list): Listas de artículos preparados con prepare_article
+        limit (int): Número máximo de artículos
+
+    Returns:
+        list: Artículos combinados
+    """
+    recency = lambda article: article.get('publishedAt') or ''
+    queues = [sorted(articles, key=recency, reverse=True) for articles in result_lists if articles]
+    positions = [0] * len(queues)
+    seen = set()
+    merged = []
+    while len(merged) < limit and any(position < len(queue) for position, queue in zip(positions, queues)):
+        current = []
+        for index, queue in enumerate(queues):
+            # Siguiente artículo de la lista que no se haya tomado ya de otra
+            while positions[index] < len(queue) and queue[positions[index]]['article_id'] in seen:
+                positions[index] += 1
+            if positions[index] < len(queue):
+                article = queue[positions[index]]
+                positions[index] += 1
+                seen.add(article['article_id'])
+                current.append(article)
+        merged.extend(sorted(current, key=recency, reverse=True)[:limit - len(merged)])
+    return merged
@@ -0,0 +1,100 @@
+# benchmarks/bench_priorities.py
+"""
+Benchmark de las clases de prioridad: encola un lote de informes programados
+y, mientras se procesa, varios informes interactivos (como los pedidos desde la
+web). Muestra los percentiles de espera en cola y de latencia total de cada
+clase, con y sin prioridades, usando los simuladores locales.
+
+Uso:
+    python benchmarks/bench_priorities.py --lote 30 --interactivos 5 --hilos 4
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_services import ServiceConfig, start_services, service_environment
+
+def run_scenario(batch, interactive, threads, max_results, use_priorities):
+    """
+    Ejecuta un escenario en una cola nueva.
+
+    Args:
+        batch (int): Informes programados del lote
+        interactive (int): Informes interactivos, encolados uno por segundo tras el lote
+        threads (int): Hilos worker
+        max_results (int): Artículos por informe
+        use_priorities (bool): Encolar los interactivos con prioridad 'interactive'
+
+    Returns:
+        dict: Percentiles por clase (JobQueue.latency_percentiles)
+    """
+    import threading
+    from job_queue import SQLiteJobQueue
+    from worker import ReportWorker
+
+    queue = SQLiteJobQueue(f"bench_priorities_{int(use_priorities)}.db")
+    options = {'max_results': max_results, 'notification_method': None, 'force_refresh': True}
+    for i in range(batch):
+        queue.enqueue('report', dict(options, topic=f"lote {i}"), priority='scheduled')
+
+    stop_event = threading.Event()
+    workers = [threading.Thread(target=ReportWorker(queue=queue, poll_interval=0.2).run, args=(stop_event,),
+                                daemon=True) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+
+    interactive_ids = []
+    for i in range(interactive):
+        time.sleep(1)
+        interactive_ids.append(queue.enqueue('report', dict(options, topic=f"web {i}"),
+                                             priority='interactive' if use_priorities else 'scheduled'))
+
+    while any(status in queue.stats() for status in ('queued', 'running')):
+        time.sleep(0.5)
+    stop_event.set()
+    if not use_priorities:
+        # Sin prioridades se procesan como el lote; se etiquetan al final solo para medirlos aparte
+        with queue.lock:
+            queue.conn.executemany("UPDATE jobs SET priority = 'interactive' WHERE job_id = ?",
+                                   [(job_id,) for job_id in interactive_ids])
+            queue.conn.commit()
+    return queue.latency_percentiles()
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de las clases de prioridad de la cola')
+    parser.add_argument('--lote', type=int, default=30, help='Informes programados del lote')
+    parser.add_argument('--interactivos', type=int, default=5, help='Informes interactivos')
+    parser.add_argument('--hilos', type=int, default=4, help='Hilos worker')
+    parser.add_argument('--max', type=int, default=10, help='Artículos por informe')
+    parser.add_argument('--latencia-notion', type=float, default=150, help='Latencia media de Notion (ms)')
+    parser.add_argument('--notion-rps', type=float, default=3, help='Límite de peticiones por segundo de Notion')
+    args = parser.parse_args()
+
+    services = start_services(ServiceConfig(100), ServiceConfig(args.latencia_notion, rate_limit_rps=args.notion_rps * 2),
+                              ServiceConfig(100))
+    os.environ.update(service_environment(services))
+    os.environ['NEWS_DATA_DIR'] = tempfile.mkdtemp(prefix='bench_priorities_')
+    os.environ['IMAGE_PREFLIGHT'] = '0'
+    os.environ['API_RATE_LIMITS'] = f"notion:{args.notion_rps}"
+    logging.disable(logging.WARNING)
+
+    results = {}
+    for use_priorities in (False, True):
+        name = 'con_prioridades' if use_priorities else 'sin_prioridades'
+        results[name] = run_scenario(args.lote, args.interactivos, args.hilos, args.max, use_priorities)
+        print(f"\n{name}")
+        for priority, stats in results[name].items():
+            print(f"  {priority:<12} {stats['count']:>3} trabajos  espera p50 {stats['wait']['p50']} s  "
+                  f"p90 {stats['wait']['p90']} s  total p50 {stats['total']['p50']} s  p99 {stats['total']['p99']} s")
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
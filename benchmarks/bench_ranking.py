@@ -0,0 +1,77 @@
+# benchmarks/bench_ranking.py
+"""
+Benchmark de la etapa de ranking: mide cuánto tarda rank_articles en puntuar
+cientos de artículos candidatos.
+
+Uso:
+    python benchmarks/bench_ranking.py --candidatos 300 --max 20
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import datetime
+import statistics
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ranking import rank_articles
+
+WORDS = ("inteligencia artificial economía mercado gobierno elecciones tecnología datos empresa "
+         "política salud ciencia clima energía deporte fútbol banco inflación startup modelo").split()
+SOURCES = ["El País", "El Mundo", "BBC Mundo", "Xataka", "Expansión", "ABC", "La Vanguardia", "20minutos"]
+
+def make_candidates(n, seed=42):
+    """
+    Genera artículos sintéticos con la estructura de search_news.
+
+    Args:
+        n (int): Número de artículos
+        seed (int): Semilla para que los datos sean reproducibles
+
+    Returns:
+        list: Lista de artículos
+    """
+    rng = random.Random(seed)
+    now = datetime.datetime.utcnow()
+    articles = []
+    for i in range(n):
+        published = now - datetime.timedelta(minutes=rng.randint(0, 7 * 24 * 60))
+        articles.append({
+            'title': ' '.join(rng.choices(WORDS, k=rng.randint(6, 12))).capitalize(),
+            'description': ' '.join(rng.choices(WORDS, k=rng.randint(20, 40))),
+            'url': f"https://example.com/{i}",
+            'source': {'id': None, 'name': rng.choice(SOURCES)},
+            'publishedAt': published.strftime('%Y-%m-%dT%H:%M:%SZ')
+        })
+    return articles
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de la etapa de ranking')
+    parser.add_argument('--candidatos', type=int, default=300, help='Número de artículos candidatos')
+    parser.add_argument('--max', type=int, default=20, help='Número de artículos a conservar')
+    parser.add_argument('--repeticiones', type=int, default=50, help='Número de repeticiones')
+    parser.add_argument('--tema', default='inteligencia artificial', help='Tema de búsqueda')
+    args = parser.parse_args()
+
+    candidates = make_candidates(args.candidatos)
+
+    # Calentamiento
+    rank_articles([dict(a) for a in candidates], args.tema, args.max)
+
+    timings = []
+    for _ in range(args.repeticiones):
+        pool = [dict(a) for a in candidates]
+        start = time.perf_counter()
+        rank_articles(pool, args.tema, args.max)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    print(f"Ranking de {args.candidatos} candidatos -> {args.max} resultados ({args.repeticiones} repeticiones)")
+    print(f"  mediana: {statistics.median(timings):.2f} ms")
+    print(f"  p95:     {timings[int(len(timings) * 0.95) - 1]:.2f} ms")
+    print(f"  mínimo:  {timings[0]:.2f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,433 @@
+# benchmarks/fake_services.py
+"""
+Simuladores HTTP locales de NewsAPI, Notion y OpenAI para medir el rendimiento
+sin claves reales ni consumo de cuota.
+
+Cada simulador acepta una latencia media (con variación aleatoria), una tasa de
+errores y, en el caso de Notion, el límite de 100 bloques por petición y un
+límite de peticiones por segundo que responde con 429 y Retry-After.
+
+Uso independiente:
+    python benchmarks/fake_services.py --latencia-notion 300 --notion-rps 3
+"""
+import re
+import json
+import time
+import uuid
+import random
+import hashlib
+import argparse
+import datetime
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+WORDS = ("inteligencia artificial economía mercado gobierno elecciones tecnología datos empresa "
+         "política salud ciencia clima energía deporte fútbol banco inflación startup modelo").split()
+SOURCES = ["El País", "El Mundo", "BBC Mundo", "Xataka", "Expansión", "ABC", "La Vanguardia", "20minutos"]
+
+class ServiceConfig:
+    """Comportamiento configurable de un simulador."""
+
+    def __init__(self, latency_ms=100, jitter_ms=None, error_rate=0.0, rate_limit_rps=None):
+        """
+        Args:
+            latency_ms (float): Latencia media de cada respuesta
+            jitter_ms (float): Desviación típica de la latencia (por defecto, 20% de la media)
+            error_rate (float): Probabilidad (0-1) de responder con un error 500
+            rate_limit_rps (float): Peticiones por segundo permitidas (None = sin límite)
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = latency_ms * 0.2 if jitter_ms is None else jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rps = rate_limit_rps
+
+class FakeService:
+    """Servidor HTTP de un simulador, con estadísticas de las peticiones recibidas."""
+
+    name = 'service'
+
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        self.config = config or ServiceConfig()
+        self.stats = {}
+        self.lock = threading.Lock()
+        self._tokens = float(self.config.rate_limit_rps or 0)
+        self._last_refill = time.monotonic()
+
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _handle(self):
+                service.handle(self)
+
+            do_GET = do_POST = do_PATCH = _handle
+
+            def do_HEAD(self):
+                service.handle_head(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def count(self, endpoint, status):
+        with self.lock:
+            key = f"{endpoint} {status}"
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def _allow_request(self):
+        """Cubo de fichas para simular el límite de peticiones por segundo."""
+        rps = self.config.rate_limit_rps
+        if not rps:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self._tokens = min(rps, self._tokens + (now - self._last_refill) * rps)
+            self._last_refill = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def send_json(self, handler, status, payload, endpoint, headers=None):
+        body = json.dumps(payload).encode()
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+        self.count(endpoint, status)
+
+    def read_json(self, handler):
+        length = int(handler.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        return json.loads(handler.rfile.read(length) or b'{}')
+
+    def handle(self, handler):
+        parsed = urlparse(handler.path)
+        body = self.read_json(handler) if handler.command in ('POST', 'PATCH') else {}
+        endpoint = self.endpoint_name(handler.command, parsed.path)
+
+        delay = max(0.0, random.gauss(self.config.latency_ms, self.config.jitter_ms)) / 1000
+        time.sleep(delay)
+
+        if not self._allow_request():
+            status, payload = self.rate_limited()
+            self.send_json(handler, status, payload, endpoint, {'Retry-After': f"{1 / self.config.rate_limit_rps:.2f}"})
+            return
+        if random.random() < self.config.error_rate:
+            status, payload = self.server_error()
+            self.send_json(handler, status, payload, endpoint)
+            return
+
+        status, payload = self.route(handler.command, parsed.path, parse_qs(parsed.query), body)
+        self.send_json(handler, status, payload, endpoint)
+
+    def endpoint_name(self, method, path):
+        return f"{method} {path}"
+
+    def handle_head(self, handler):
+        handler.send_response(404)
+        handler.send_header('Content-Length', '0')
+        handler.end_headers()
+
+    def rate_limited(self):
+        return 429, {'error': 'rate limited'}
+
+    def server_error(self):
+        return 500, {'error': 'internal error'}
+
+    def route(self, method, path, query, body):
+        return 404, {'error': 'not found'}
+
+def _fake_article(query, position, now, image_base='https://img.example.com', language='es', window=None):
+    """Genera un artículo determinista a partir de la consulta, el idioma, la ventana de fechas y su posición."""
+    key = f"{query}:{position}" if language == 'es' else f"{query}:{language}:{position}"
+    if window:
+        key += f":{window}"
+    seed = int(hashlib.md5(key.encode()).hexdigest()[:8], 16)
+    rng = random.Random(seed)
+    published = now - datetime.timedelta(minutes=position * 17 + rng.randint(0, 10))
+    title_words = [query] + rng.choices(WORDS, k=rng.randint(4, 9))
+    return {
+        'source': {'id': None, 'name': rng.choice(SOURCES)},
+        'author': 'Redacción',
+        'title': ' '.join(title_words).capitalize(),
+        'description': ' '.join(rng.choices(WORDS, k=rng.randint(20, 40))),
+        'url': f"https://noticias.example.com/{seed}/{position}",
+        'urlToImage': f"{image_base}/{seed}.jpg",
+        'publishedAt': published.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'content': ' '.join(rng.choices(WORDS, k=60))
+    }
+
+class FakeNewsAPI(FakeService):
+    """Simula /v2/everything y /v2/top-headlines de NewsAPI."""
+
+    name = 'newsapi'
+
+    def __init__(self, config=None, total_results=500, max_results=100, **kwargs):
+        """
+        Args:
+            total_results (int): Número de artículos disponibles por consulta
+            max_results (int): Máximo de resultados accesibles paginando (100 en el plan gratuito)
+        """
+        super().__init__(config, **kwargs)
+        self.total_results = total_results
+        self.max_results = max_results
+
+    def endpoint_name(self, method, path):
+        return path
+
+    def handle_head(self, handler):
+        # Las imágenes de los artículos simulados se sirven desde este mismo servidor
+        if handler.path.startswith('/images/'):
+            handler.send_response(200)
+            handler.send_header('Content-Type', 'image/jpeg')
+            handler.send_header('Content-Length', '20000')
+            handler.end_headers()
+            self.count('HEAD /images', 200)
+        else:
+            super().handle_head(handler)
+
+    def rate_limited(self):
+        return 429, {'status': 'error', 'code': 'rateLimited',
+                     'message': 'You have made too many requests recently.'}
+
+    def server_error(self):
+        return 500, {'status': 'error', 'code': 'unexpectedError', 'message': 'Simulated error'}
+
+    def route(self, method, path, query, body):
+        if path not in ('/v2/everything', '/v2/top-headlines'):
+            return 404, {'status': 'error', 'code': 'parameterInvalid', 'message': 'Unknown endpoint'}
+
+        q = (query.get('q') or [''])[0]
+        language = (query.get('language') or ['es'])[0]
+        page_size = int((query.get('pageSize') or [20])[0])
+        page = int((query.get('page') or [1])[0])
+        if page_size > 100:
+            return 400, {'status': 'error', 'code': 'parameterInvalid', 'message': 'pageSize must be <= 100'}
+        if (page - 1) * page_size >= self.max_results:
+            return 426, {'status': 'error', 'code': 'maximumResultsReached',
+                         'message': f'You can only request {self.max_results} results.'}
+
+        now = datetime.datetime.utcnow()
+        # Con 'to' los artículos se fechan dentro de la ventana pedida
+        to_date = (query.get('to') or [None])[0]
+        if to_date:
+            now = min(now, datetime.datetime.fromisoformat(to_date[:10]) + datetime.timedelta(hours=23, minutes=59))
+        start = (page - 1) * page_size
+        end = min(start + page_size, self.total_results, self.max_results)
+        articles = [_fake_article(q, i, now, f"{self.url}/images", language, to_date) for i in range(start, end)]
+        return 200, {'status': 'ok', 'totalResults': self.total_results, 'articles': articles}
+
+class FakeNotion(FakeService):
+    """Simula las páginas, bloques y bases de datos de la API de Notion."""
+
+    name = 'notion'
+
+    def __init__(self, config=None, max_children=100, **kwargs):
+        if config is None:
+            # Notion permite una media de 3 peticiones por segundo por integración
+            config = ServiceConfig(latency_ms=300, rate_limit_rps=3)
+        super().__init__(config, **kwargs)
+        self.max_children = max_children
+        self.pages = {}
+
+    def endpoint_name(self, method, path):
+        path = re.sub(r'[0-9a-f-]{32,36}', '{id}', path)
+        return f"{method} {path}"
+
+    def rate_limited(self):
+        return 429, {'object': 'error', 'status': 429, 'code': 'rate_limited',
+                     'message': 'You have been rate limited. Please try again in a few minutes.'}
+
+    def server_error(self):
+        return 500, {'object': 'error', 'status': 500, 'code': 'internal_server_error',
+                     'message': 'Simulated error'}
+
+    def _validation_error(self, message):
+        return 400, {'object': 'error', 'status': 400, 'code': 'validation_error', 'message': message}
+
+    def route(self, method, path, query, body):
+        now = datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+        if method == 'POST' and path == '/v1/pages':
+            children = body.get('children') or []
+            if len(children) > self.max_children:
+                return self._validation_error(
+                    f"body failed validation: body.children.length should be ≤ `{self.max_children}`, "
+                    f"instead was `{len(children)}`.")
+            page_id = str(uuid.uuid4())
+            page = {
+                'object': 'page', 'id': page_id, 'created_time': now, 'last_edited_time': now,
+                'parent': body.get('parent'), 'properties': body.get('properties') or {},
+                'url': f"https://www.notion.so/{page_id.replace('-', '')}"
+            }
+            with self.lock:
+                self.pages[page_id] = {'page': page, 'children': len(children)}
+            return 200, page
+
+        match = re.fullmatch(r'/v1/blocks/([0-9a-f-]+)/children', path)
+        if method == 'PATCH' and match:
+            children = body.get('children') or []
+            if len(children) > self.max_children:
+                return self._validation_error(
+                    f"body failed validation: body.children.length should be ≤ `{self.max_children}`, "
+                    f"instead was `{len(children)}`.")
+            with self.lock:
+                entry = self.pages.get(match.group(1))
+                if entry is None:
+                    return 404, {'object': 'error', 'status': 404, 'code': 'object_not_found',
+                                 'message': 'Could not find block.'}
+                entry['children'] += len(children)
+                entry['page']['last_edited_time'] = now
+            results = [dict(child, id=str(uuid.uuid4())) for child in children]
+            return 200, {'object': 'list', 'results': results, 'has_more': False, 'next_cursor': None}
+
+        match = re.fullmatch(r'/v1/databases/([0-9a-f-]+)/query', path)
+        if method == 'POST' and match:
+            # Se admiten el filtro y el orden por last_edited_time (sincronización incremental)
+            since = ((body.get('filter') or {}).get('last_edited_time') or {}).get('on_or_after')
+            sorts = body.get('sorts') or []
+            ascending = bool(sorts) and sorts[0].get('direction') == 'ascending'
+            with self.lock:
+                pages = sorted((entry['page'] for entry in self.pages.values()
+                                if not since or entry['page']['last_edited_time'] >= since),
+                               key=lambda page: page['last_edited_time'], reverse=not ascending)
+            page_size = min(100, int(body.get('page_size') or 100))
+            start = int(body.get('start_cursor') or 0)
+            results = pages[start:start + page_size]
+            has_more = start + page_size < len(pages)
+            return 200, {'object': 'list', 'results': results, 'has_more': has_more,
+                         'next_cursor': str(start + page_size) if has_more else None}
+
+        if method == 'GET' and re.fullmatch(r'/v1/databases/[0-9a-f-]+', path):
+            return 200, {'object': 'database', 'id': path.rsplit('/', 1)[-1],
+                         'title': [{'plain_text': 'Informes (simulador)'}]}
+
+        if method == 'GET' and path == '/v1/users/me':
+            return 200, {'object': 'user', 'id': str(uuid.uuid4()), 'name': 'Simulador', 'type': 'bot'}
+
+        return 404, {'object': 'error', 'status': 404, 'code': 'invalid_request_url', 'message': 'Invalid request URL.'}
+
+class FakeOpenAI(FakeService):
+    """Simula el endpoint /v1/completions de OpenAI."""
+
+    name = 'openai'
+
+    def __init__(self, config=None, **kwargs):
+        super().__init__(config or ServiceConfig(latency_ms=400), **kwargs)
+
+    def endpoint_name(self, method, path):
+        return path
+
+    def rate_limited(self):
+        return 429, {'error': {'message': 'Rate limit reached for requests', 'type': 'requests'}}
+
+    def server_error(self):
+        return 500, {'error': {'message': 'The server had an error while processing your request.',
+                               'type': 'server_error'}}
+
+    def route(self, method, path, query, body):
+        # openai 0.27 usa /v1/engines/<motor>/completions cuando se indica engine
+        if not re.fullmatch(r'(/v1)?(/engines/[^/]+)?/completions/?', path):
+            return 404, {'error': {'message': 'Invalid URL', 'type': 'invalid_request_error'}}
+
+        prompt = body.get('prompt') or ''
+        sections = re.findall(r'^### (\S+)\n(.*?)(?=\n\n|\Z)', prompt, flags=re.M | re.S)
+        if sections:
+            # Lote de resúmenes: responder con un JSON por identificador
+            text = json.dumps({key: ' '.join(value.split()[:30]) for key, value in sections}, ensure_ascii=False)
+        else:
+            # Resumen "simulado": las primeras palabras del texto
+            text = ' '.join(prompt.split('\n\n', 1)[-1].split()[:30])
+        return 200, {
+            'id': f"cmpl-{uuid.uuid4().hex[:12]}",
+            'object': 'text_completion',
+            'created': int(time.time()),
+            'model': body.get('model') or body.get('engine') or 'text-davinci-003',
+            'choices': [{'text': f" {text}", 'index': 0, 'logprobs': None, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': len(prompt) // 4, 'completion_tokens': len(text) // 4,
+                      'total_tokens': (len(prompt) + len(text)) // 4}
+        }
+
+def start_services(newsapi_config=None, notion_config=None, openai_config=None, **newsapi_options):
+    """
+    Arranca los tres simuladores en hilos del proceso actual.
+
+    Returns:
+        dict: Simuladores por nombre ('newsapi', 'notion', 'openai')
+    """
+    return {
+        'newsapi': FakeNewsAPI(newsapi_config, **newsapi_options).start(),
+        'notion': FakeNotion(notion_config).start(),
+        'openai': FakeOpenAI(openai_config).start()
+    }
+
+def service_environment(services):
+    """
+    Variables de entorno que hacen que news_automation use los simuladores.
+
+    Args:
+        services (dict): Simuladores devueltos por start_services
+
+    Returns:
+        dict: Variables de entorno
+    """
+    return {
+        'NEWSAPI_BASE_URL': services['newsapi'].url,
+        'NOTION_BASE_URL': services['notion'].url,
+        'OPENAI_API_BASE': f"{services['openai'].url}/v1",
+        'NEWS_API_KEY': 'simulador-newsapi-key',
+        'NOTION_TOKEN': 'secret_simulador',
+        'NOTION_DATABASE_ID': '0' * 32,
+        'OPENAI_API_KEY': 'sk-simulador'
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Simuladores locales de NewsAPI, Notion y OpenAI')
+    parser.add_argument('--latencia-newsapi', type=float, default=150, help='Latencia media de NewsAPI (ms)')
+    parser.add_argument('--latencia-notion', type=float, default=300, help='Latencia media de Notion (ms)')
+    parser.add_argument('--latencia-openai', type=float, default=400, help='Latencia media de OpenAI (ms)')
+    parser.add_argument('--errores', type=float, default=0.0, help='Tasa de errores 500 en todos los servicios (0-1)')
+    parser.add_argument('--notion-rps', type=float, default=3, help='Peticiones por segundo permitidas por Notion')
+    args = parser.parse_args()
+
+    services = start_services(
+        ServiceConfig(args.latencia_newsapi, error_rate=args.errores),
+        ServiceConfig(args.latencia_notion, error_rate=args.errores, rate_limit_rps=args.notion_rps),
+        ServiceConfig(args.latencia_openai, error_rate=args.errores)
+    )
+    print("Simuladores en marcha. Variables de entorno para news_automation.py:\n")
+    for name, value in service_environment(services).items():
+        print(f"{name}={value}")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        for service in services.values():
+            service.stop()
+
+if __name__ == '__main__':
+    main()
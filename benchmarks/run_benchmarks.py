@@ -0,0 +1,274 @@
+# benchmarks/run_benchmarks.py
+"""
+Benchmark completo sin conexión: arranca los simuladores de NewsAPI, Notion y
+OpenAI, ejecuta generate_news_report, el flujo web de /generate y un lote de
+tareas programadas, y guarda un informe de rendimiento en JSON que se puede
+comparar entre versiones.
+
+Uso:
+    python benchmarks/run_benchmarks.py --informes 10 --max 30 --salida bench_v1.json
+    python benchmarks/run_benchmarks.py --salida bench_v2.json --comparar bench_v1.json
+"""
+import os
+import io
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import platform
+import datetime
+import threading
+import statistics
+import subprocess
+from contextlib import redirect_stdout
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_services import ServiceConfig, start_services, service_environment
+
+TOPICS = ["inteligencia artificial", "economía", "elecciones", "clima", "fútbol", "energía",
+          "salud", "tecnología", "startup", "inflación"]
+# Temas propios del lote programado: con los mismos que 'informes', las tareas encontrarían
+# ya publicado el informe de hoy y no harían nada
+SCHEDULED_TOPICS = ["vivienda", "turismo", "educación", "ciencia", "cultura", "transporte",
+                    "agricultura", "empleo", "ciberseguridad", "espacio"]
+
+def percentile(values, pct):
+    """Percentil por el método del rango más cercano."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def summarize(name, latencies, wall_time, successes, stage_timings=None):
+    """
+    Resume las latencias de un escenario.
+
+    Args:
+        name (str): Nombre del escenario
+        latencies (list): Latencia de cada operación (segundos)
+        wall_time (float): Duración total del escenario (segundos)
+        successes (int): Operaciones terminadas con éxito
+        stage_timings (list): Diccionarios de tiempos por etapa de cada operación
+
+    Returns:
+        dict: Resumen del escenario
+    """
+    summary = {
+        'scenario': name,
+        'operations': len(latencies),
+        'successes': successes,
+        'wall_time_s': round(wall_time, 3),
+        'throughput_per_s': round(len(latencies) / wall_time, 3) if wall_time else None,
+        'latency_s': {
+            'mean': round(statistics.mean(latencies), 4) if latencies else None,
+            'p50': round(percentile(latencies, 50), 4) if latencies else None,
+            'p95': round(percentile(latencies, 95), 4) if latencies else None,
+            'p99': round(percentile(latencies, 99), 4) if latencies else None,
+            'max': round(max(latencies), 4) if latencies else None
+        }
+    }
+    if stage_timings:
+        stages = {}
+        for timings in stage_timings:
+            for stage, seconds in timings.items():
+                stages.setdefault(stage, []).append(seconds)
+        summary['stages_mean_s'] = {stage: round(statistics.mean(values), 4) for stage, values in stages.items()}
+    return summary
+
+def run_reports(news_automation, count, max_results, include_ai_summary):
+    """Escenario 1: informes completos con generate_news_report, uno tras otro."""
+    latencies, timings, successes = [], [], 0
+    start = time.perf_counter()
+    for i in range(count):
+        topic = TOPICS[i % len(TOPICS)]
+        t0 = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            result = news_automation.generate_news_report(
+                topic, max_results=max_results, include_ai_summary=include_ai_summary)
+        latencies.append(time.perf_counter() - t0)
+        timings.append(result.get('timings', {}))
+        successes += bool(result['success'])
+    return summarize('generate_news_report', latencies, time.perf_counter() - start, successes, timings)
+
+def run_web(app_module, clients, requests_per_client, max_results, poll_interval=0.05, timeout=300):
+    """Escenario 2: varios clientes usando /generate y consultando /status hasta terminar."""
+    latencies, timings = [], []
+    successes = [0]
+    lock = threading.Lock()
+
+    def client(index):
+        test_client = app_module.app.test_client()
+        for j in range(requests_per_client):
+            topic = TOPICS[(index + j) % len(TOPICS)]
+            t0 = time.perf_counter()
+            response = test_client.post('/generate', data={'topic': topic, 'max_results': max_results}).get_json()
+            status = response
+            task_id = response.get('task_id')
+            while task_id and time.perf_counter() - t0 < timeout:
+                status = test_client.get(f'/status/{task_id}').get_json()
+                if status.get('status') != 'running':
+                    break
+                time.sleep(poll_interval)
+            with lock:
+                latencies.append(time.perf_counter() - t0)
+                timings.append(status.get('timings', {}))
+                successes[0] += status.get('status') == 'completed'
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return summarize('web_generate', latencies, time.perf_counter() - start, successes[0], timings)
+
+def run_scheduled_batch(news_automation, topics, max_results):
+    """Escenario 3: un lote de tareas programadas ejecutado como lo haría el programador."""
+    import schedule
+    import worker
+    from job_queue import get_job_queue
+
+    results = []
+    original = worker.generate_news_report
+
+    def recording_report(*args, **kwargs):
+        t0 = time.perf_counter()
+        result = original(*args, **kwargs)
+        results.append((time.perf_counter() - t0, result))
+        return result
+
+    schedule.clear()
+    worker.generate_news_report = recording_report
+    try:
+        for i in range(topics):
+            news_automation.setup_scheduled_task(SCHEDULED_TOPICS[i % len(SCHEDULED_TOPICS)], "08:00",
+                                                 max_results=max_results)
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            # Las tareas se encolan y las procesa un worker (o los hilos de la web, si están en marcha)
+            schedule.run_all()
+            report_worker = worker.ReportWorker(poll_interval=0.1)
+            queue = get_job_queue()
+            while report_worker.run_once() or any(status in queue.stats() for status in ('queued', 'running')):
+                time.sleep(0.05)
+        wall_time = time.perf_counter() - start
+    finally:
+        worker.generate_news_report = original
+        schedule.clear()
+
+    return summarize('scheduled_batch', [latency for latency, _ in results], wall_time,
+                     sum(bool(result['success']) for _, result in results),
+                     [result.get('timings', {}) for _, result in results])
+
+def git_version():
+    """Devuelve el commit actual del repositorio (o 'desconocida')."""
+    try:
+        return subprocess.check_output(['git', 'describe', '--always', '--dirty'], cwd=ROOT_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return 'desconocida'
+
+def print_report(report, previous=None):
+    """Muestra el informe en forma de tabla, con la diferencia respecto a otro informe si se indica."""
+    previous_by_name = {s['scenario']: s for s in (previous or {}).get('scenarios', [])}
+    print(f"\nVersión: {report['version']}  ({report['timestamp']})")
+    if previous:
+        print(f"Comparado con: {previous['version']}  ({previous['timestamp']})")
+    print(f"\n{'Escenario':<24}{'ops':>5}{'ok':>5}{'ops/s':>9}{'p50 (s)':>10}{'p95 (s)':>10}{'p99 (s)':>10}")
+    for scenario in report['scenarios']:
+        latency = scenario['latency_s']
+        print(f"{scenario['scenario']:<24}{scenario['operations']:>5}{scenario['successes']:>5}"
+              f"{scenario['throughput_per_s'] or 0:>9.2f}{latency['p50'] or 0:>10.3f}"
+              f"{latency['p95'] or 0:>10.3f}{latency['p99'] or 0:>10.3f}")
+        old = previous_by_name.get(scenario['scenario'])
+        if old and old['latency_s']['p50'] and latency['p50']:
+            p50_change = (latency['p50'] / old['latency_s']['p50'] - 1) * 100
+            p95_change = (latency['p95'] / old['latency_s']['p95'] - 1) * 100
+            throughput_change = ((scenario['throughput_per_s'] or 0) / (old['throughput_per_s'] or 1) - 1) * 100
+            print(f"{'  vs. anterior':<24}{'':>10}{throughput_change:>+8.1f}%{p50_change:>+9.1f}%{p95_change:>+9.1f}%")
+        if scenario.get('stages_mean_s'):
+            stages = ', '.join(f"{stage}={seconds:.3f}" for stage, seconds in scenario['stages_mean_s'].items())
+            print(f"{'  etapas (media, s)':<24}{stages}")
+    print("\nPeticiones recibidas por los simuladores:")
+    for name, stats in report['services'].items():
+        for endpoint, count in sorted(stats.items()):
+            print(f"  {name:<8} {endpoint:<45} {count}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark sin conexión con simuladores de NewsAPI, Notion y OpenAI')
+    parser.add_argument('--informes', type=int, default=5, help='Informes secuenciales con generate_news_report')
+    parser.add_argument('--max', type=int, default=20, help='Artículos por informe')
+    parser.add_argument('--ia', action='store_true', help='Incluir resúmenes con IA')
+    parser.add_argument('--web-clientes', type=int, default=4, help='Clientes simultáneos en /generate')
+    parser.add_argument('--web-peticiones', type=int, default=2, help='Peticiones por cliente web')
+    parser.add_argument('--lote', type=int, default=5, help='Temas en el lote de tareas programadas')
+    parser.add_argument('--latencia-newsapi', type=float, default=150, help='Latencia media de NewsAPI (ms)')
+    parser.add_argument('--latencia-notion', type=float, default=300, help='Latencia media de Notion (ms)')
+    parser.add_argument('--latencia-openai', type=float, default=400, help='Latencia media de OpenAI (ms)')
+    parser.add_argument('--errores', type=float, default=0.0, help='Tasa de errores 500 (0-1)')
+    parser.add_argument('--notion-rps', type=float, default=3, help='Peticiones por segundo permitidas por Notion')
+    parser.add_argument('--escenarios', default='informes,web,lote',
+                        help='Escenarios a ejecutar separados por comas (informes, web, lote)')
+    parser.add_argument('--salida', help='Archivo JSON donde guardar el informe')
+    parser.add_argument('--comparar', help='Informe JSON anterior con el que comparar')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    services = start_services(
+        ServiceConfig(args.latencia_newsapi, error_rate=args.errores),
+        ServiceConfig(args.latencia_notion, error_rate=args.errores, rate_limit_rps=args.notion_rps),
+        ServiceConfig(args.latencia_openai, error_rate=args.errores)
+    )
+
+    # Las variables deben estar definidas antes de importar news_automation
+    os.environ.update(service_environment(services))
+    os.environ['NEWS_DATA_DIR'] = tempfile.mkdtemp(prefix='news_bench_')
+    os.environ.setdefault('API_RETRY_BACKOFF', '0.5')
+
+    import news_automation
+    import app as app_module
+    logging.getLogger().setLevel(logging.WARNING)
+
+    scenarios = [name.strip() for name in args.escenarios.split(',')]
+    report = {
+        'version': git_version(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'config': vars(args),
+        'scenarios': [],
+        'services': {}
+    }
+
+    if 'informes' in scenarios:
+        report['scenarios'].append(run_reports(news_automation, args.informes, args.max, args.ia))
+    if 'web' in scenarios:
+        report['scenarios'].append(run_web(app_module, args.web_clientes, args.web_peticiones, args.max))
+    if 'lote' in scenarios:
+        report['scenarios'].append(run_scheduled_batch(news_automation, args.lote, args.max))
+
+    report['services'] = {name: dict(service.stats) for name, service in services.items()}
+    for service in services.values():
+        service.stop()
+
+    previous = None
+    if args.comparar:
+        with open(args.comparar) as f:
+            previous = json.load(f)
+
+    print_report(report, previous)
+
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nInforme guardado en {args.salida}")
+
+if __name__ == '__main__':
+    main()
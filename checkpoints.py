@@ -0,0 +1,237 @@
+# checkpoints.py
+import json
+import uuid
+import datetime
+import threading
+import logging
+
+from storage import connect
+
+logger = logging.getLogger(__name__)
+
+_store = None
+_store_lock = threading.Lock()
+
+class CheckpointStore:
+    """
+    Guarda la salida de cada etapa de un informe (artículos, resúmenes, bloques,
+    página de Notion...) para poder reanudarlo tras un fallo sin repetir trabajo.
+    """
+
+    def __init__(self, db_name='checkpoints.db'):
+        """
+        Args:
+            db_name (str): Archivo SQLite de los puntos de control
+        """
+        self.lock = threading.Lock()
+        self.conn = connect(db_name)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                topic TEXT,
+                params TEXT,
+                status TEXT,
+                stage TEXT,
+                error TEXT,
+                created_at TEXT,
+                updated_at TEXT,
+                resume_count INTEGER DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS run_stages (
+                run_id TEXT,
+                stage TEXT,
+                data TEXT,
+                saved_at TEXT,
+                PRIMARY KEY (run_id, stage)
+            );
+        """)
+        self.conn.commit()
+
+    def create_run(self, topic, params):
+        """
+        Registra una nueva ejecución.
+
+        Args:
+            topic (str): Tema del informe
+            params (dict): Parámetros con los que se puede repetir la ejecución
+
+        Returns:
+            str: ID de la ejecución
+        """
+        run_id = f"run_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        now = datetime.datetime.now().isoformat()
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO runs (run_id, topic, params, status, stage, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'running', NULL, ?, ?)",
+                (run_id, topic, json.dumps(params), now, now)
+            )
+            self.conn.commit()
+        return run_id
+
+    def get_run(self, run_id):
+        """
+        Devuelve los datos de una ejecución.
+
+        Args:
+            run_id (str): ID de la ejecución
+
+        Returns:
+            dict: Datos de la ejecución (con 'params' ya decodificado) o None
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if not row:
+            return None
+        run = dict(row)
+        run['params'] = json.loads(run['params'] or '{}')
+        return run
+
+    def save_stage(self, run_id, stage, data):
+        """
+        Guarda la salida de una etapa.
+
+        Args:
+            run_id (str): ID de la ejecución
+            stage (str): Nombre de la etapa
+            data: Datos serializables en JSON
+        """
+        now = datetime.datetime.now().isoformat()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO run_stages (run_id, stage, data, saved_at) VALUES (?, ?, ?, ?)",
+                (run_id, stage, json.dumps(data), now)
+            )
+            self.conn.execute("UPDATE runs SET stage = ?, updated_at = ? WHERE run_id = ?", (stage, now, run_id))
+            self.conn.commit()
+
+    def load_stage(self, run_id, stage):
+        """
+        Recupera la salida guardada de una etapa.
+
+        Args:
+            run_id (str): ID de la ejecución
+            stage (str): Nombre de la etapa
+
+        Returns:
+            Los datos guardados o None si la etapa no terminó
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT data FROM run_stages WHERE run_id = ? AND stage = ?", (run_id, stage)
+            ).fetchone()
+        return json.loads(row['data']) if row else None
+
+    def set_status(self, run_id, status, error=None):
+        """
+        Actualiza el estado de una ejecución ('running', 'failed', 'deferred', 'queued', 'completed').
+
+        Args:
+            run_id (str): ID de la ejecución
+            status (str): Nuevo estado
+            error (str): Mensaje de error, si lo hay
+        """
+        with self.lock:
+            self.conn.execute(
+                "UPDATE runs SET status = ?, error = ?, updated_at = ? WHERE run_id = ?",
+                (status, error, datetime.datetime.now().isoformat(), run_id)
+            )
+            self.conn.commit()
+
+    def pending_runs(self, max_age_hours=None, stale_minutes=None, include_failed=True, max_resumes=None):
+        """
+        Devuelve las ejecuciones sin terminar (fallidas, aplazadas o interrumpidas).
+
+        Args:
+            max_age_hours (float): Ignorar las que no se actualizan desde hace más de estas horas
+            stale_minutes (float): Si se indica, solo se devuelven las aplazadas, las fallidas
+                                   (si include_failed) y las que siguen 'running' sin actualizarse
+                                   desde hace más de estos minutos (proceso caído), no las que
+                                   están en curso ni las que gestiona la cola de trabajos ('queued')
+            include_failed (bool): Con stale_minutes, incluir también las fallidas
+            max_resumes (int): Ignorar las que ya se han reanudado este número de veces
+
+        Returns:
+            list: Ejecuciones pendientes, de la más antigua a la más reciente
+        """
+        sql = "SELECT run_id FROM runs WHERE status != 'completed'"
+        params = []
+        if stale_minutes is not None:
+            statuses = "('failed', 'deferred')" if include_failed else "('deferred')"
+            sql += f" AND (status IN {statuses} OR (status = 'running' AND updated_at < ?))"
+            params.append((datetime.datetime.now() - datetime.timedelta(minutes=stale_minutes)).isoformat())
+        if max_resumes is not None:
+            sql += " AND COALESCE(resume_count, 0) < ?"
+            params.append(max_resumes)
+        if max_age_hours:
+            sql += " AND updated_at >= ?"
+            params.append((datetime.datetime.now() - datetime.timedelta(hours=max_age_hours)).isoformat())
+        sql += " ORDER BY created_at"
+        with self.lock:
+            run_ids = [row['run_id'] for row in self.conn.execute(sql, params).fetchall()]
+        return [self.get_run(run_id) for run_id in run_ids]
+
+    def claim_run(self, run_id, statuses=('failed', 'deferred'), stale_minutes=None, max_resumes=None):
+        """
+        Reclama una ejecución para reanudarla: la pasa a 'running' y suma una
+        reanudación solo si sigue en uno de los estados indicados (o 'running'
+        sin actualizarse desde hace más de stale_minutes), de modo que dos
+        procesos no reanuden a la vez la misma ejecución.
+
+        Args:
+            run_id (str): ID de la ejecución
+            statuses (tuple): Estados desde los que se puede reclamar
+            stale_minutes (float): Reclamar también las 'running' abandonadas desde hace estos minutos
+            max_resumes (int): No reclamarla si ya se ha reanudado este número de veces
+
+        Returns:
+            int: Reanudaciones de la ejecución, incluida esta (None si no se pudo reclamar)
+        """
+        now = datetime.datetime.now()
+        sql = (f"UPDATE runs SET status = 'running', updated_at = ?, resume_count = COALESCE(resume_count, 0) + 1 "
+               f"WHERE run_id = ? AND (status IN ({', '.join('?' * len(statuses))})")
+        params = [now.isoformat(), run_id, *statuses]
+        if stale_minutes is not None:
+            sql += " OR (status = 'running' AND updated_at < ?)"
+            params.append((now - datetime.timedelta(minutes=stale_minutes)).isoformat())
+        sql += ")"
+        if max_resumes is not None:
+            sql += " AND COALESCE(resume_count, 0) < ?"
+            params.append(max_resumes)
+        with self.lock:
+            claimed = self.conn.execute(sql, params).rowcount
+            row = self.conn.execute("SELECT resume_count FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            self.conn.commit()
+        return row['resume_count'] if claimed and row else None
+
+    def purge(self, keep_days=7):
+        """
+        Elimina los puntos de control de ejecuciones terminadas hace más de keep_days días.
+
+        Returns:
+            int: Número de ejecuciones eliminadas
+        """
+        limit = (datetime.datetime.now() - datetime.timedelta(days=keep_days)).isoformat()
+        with self.lock:
+            run_ids = [row['run_id'] for row in self.conn.execute(
+                "SELECT run_id FROM runs WHERE status = 'completed' AND updated_at < ?", (limit,)
+            ).fetchall()]
+            for run_id in run_ids:
+                self.conn.execute("DELETE FROM run_stages WHERE run_id = ?", (run_id,))
+                self.conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+            self.conn.commit()
+        return len(run_ids)
+
+def get_checkpoint_store():
+    """
+    Devuelve el almacén de puntos de control compartido por el proceso.
+
+    Returns:
+        CheckpointStore: Almacén abierto
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CheckpointStore()
+            _store.purge()
+        return _store
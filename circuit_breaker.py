@@ -0,0 +1,172 @@
+# circuit_breaker.py
+import os
+import time
+import threading
+import logging
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Valor de la métrica news_circuit_state para cada estado
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_STATE = metrics.Gauge('news_circuit_state', 'Estado del circuito de cada servicio (0 cerrado, 1 semiabierto, 2 abierto)',
+                              ['service'])
+CIRCUIT_REJECTIONS = metrics.Counter('news_circuit_rejections_total', 'Llamadas rechazadas con el circuito abierto',
+                                     ['service'])
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+class CircuitOpenError(Exception):
+    """Se lanza al llamar a un servicio cuyo circuito está abierto."""
+
+    def __init__(self, service, retry_in):
+        super().__init__(f"Servicio {service} no disponible (circuito abierto, nuevo intento en {retry_in:.0f}s)")
+        self.service = service
+        self.retry_in = retry_in
+
+class CircuitBreaker:
+    """
+    Circuito de un servicio externo. Tras failure_threshold fallos seguidos se
+    abre y las llamadas fallan al instante; pasados recovery_timeout segundos
+    deja pasar una llamada de prueba (semiabierto) y se cierra si tiene éxito.
+    """
+
+    def __init__(self, service, failure_threshold=5, recovery_timeout=60.0):
+        """
+        Args:
+            service (str): Nombre del servicio ('newsapi', 'notion', 'openai')
+            failure_threshold (int): Fallos seguidos que abren el circuito
+            recovery_timeout (float): Segundos con el circuito abierto antes de probar de nuevo
+        """
+        self.service = service
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.last_error = None
+        self.lock = threading.Lock()
+        CIRCUIT_STATE.set(service, value=STATE_VALUES[CLOSED])
+
+    def _set_state(self, state):
+        if state != self.state:
+            logger.warning(f"Circuito de {self.service}: {self.state} -> {state}")
+        self.state = state
+        CIRCUIT_STATE.set(self.service, value=STATE_VALUES[state])
+
+    def before_call(self):
+        """
+        Comprueba si se puede llamar al servicio.
+
+        Raises:
+            CircuitOpenError: Si el circuito está abierto (o ya hay una llamada de prueba en curso)
+        """
+        with self.lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+                self._set_state(HALF_OPEN)
+                self.probing = False
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and not self.probing:
+                self.probing = True
+                return
+            retry_in = max(0.0, self.recovery_timeout - (time.monotonic() - (self.opened_at or 0)))
+        CIRCUIT_REJECTIONS.inc(self.service)
+        raise CircuitOpenError(self.service, retry_in)
+
+    def is_available(self):
+        """Indica, sin consumir la llamada de prueba, si una llamada se dejaría pasar."""
+        with self.lock:
+            if self.state == OPEN:
+                return time.monotonic() - self.opened_at >= self.recovery_timeout
+            return not (self.state == HALF_OPEN and self.probing)
+
+    def record_success(self):
+        """Registra una llamada correcta (cierra el circuito)."""
+        with self.lock:
+            self.failures = 0
+            self.probing = False
+            self._set_state(CLOSED)
+
+    def record_failure(self, error=None):
+        """Registra un fallo del servicio (abre el circuito si se supera el umbral)."""
+        with self.lock:
+            self.failures += 1
+            self.last_error = str(error) if error else None
+            self.probing = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Estado del circuito para mostrarlo en la web
+        """
+        with self.lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = round(max(0.0, self.recovery_timeout - (time.monotonic() - self.opened_at)), 1)
+            return {
+                'service': self.service,
+                'state': self.state,
+                'failures': self.failures,
+                'retry_in': retry_in,
+                'last_error': self.last_error
+            }
+
+def is_service_failure(error):
+    """
+    Indica si un error se debe al servicio (caída, timeout, 5xx, 429) y no a
+    la petición (4xx), que no debe abrir el circuito.
+
+    Args:
+        error (Exception): Excepción lanzada por el cliente
+
+    Returns:
+        bool: True si cuenta como fallo del servicio
+    """
+    status = getattr(error, 'status', None) or getattr(error, 'http_status', None) or getattr(error, 'status_code', None)
+    if isinstance(status, int) and 400 <= status < 500 and status != 429:
+        return False
+    return True
+
+def get_breaker(service):
+    """
+    Devuelve el circuito de un servicio (se crea la primera vez).
+
+    El umbral y la espera se configuran con CIRCUIT_FAILURE_THRESHOLD y
+    CIRCUIT_RECOVERY_SECONDS.
+
+    Args:
+        service (str): Nombre del servicio
+
+    Returns:
+        CircuitBreaker: Circuito del servicio
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(service)
+        if breaker is None:
+            breaker = _breakers[service] = CircuitBreaker(
+                service,
+                failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5)),
+                recovery_timeout=float(os.getenv("CIRCUIT_RECOVERY_SECONDS", 60))
+            )
+        return breaker
+
+def breaker_states():
+    """
+    Returns:
+        list: Estado de todos los circuitos creados en este proceso
+    """
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return [breaker.snapshot() for breaker in breakers]
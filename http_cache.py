@@ -0,0 +1,98 @@
+# http_cache.py
+import gzip
+import hashlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Respuestas más pequeñas no compensan el coste de comprimir
+MIN_COMPRESS_SIZE = 500
+
+def supported_encodings():
+    """Codificaciones disponibles, de la preferida a la menos preferida."""
+    return ('br', 'gzip') if brotli else ('gzip',)
+
+def choose_encoding(accept_encoding):
+    """
+    Elige la codificación de la respuesta según la cabecera Accept-Encoding.
+
+    Args:
+        accept_encoding (str): Valor de la cabecera (por ejemplo 'gzip, deflate, br;q=0.9')
+
+    Returns:
+        str: 'br', 'gzip' o None si el cliente no acepta ninguna disponible
+    """
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+
+    best = None
+    for encoding in supported_encodings():
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > 0 and (best is None or quality > best[1]):
+            best = (encoding, quality)
+    return best[0] if best else None
+
+def compress(body, encoding, fast=False):
+    """
+    Comprime un cuerpo de respuesta.
+
+    Args:
+        body (bytes): Cuerpo sin comprimir
+        encoding (str): 'br' o 'gzip'
+        fast (bool): Nivel de compresión rápido (respuestas dinámicas); si es False,
+                     el máximo (páginas que se comprimen una sola vez)
+
+    Returns:
+        bytes: Cuerpo comprimido
+    """
+    if encoding == 'br':
+        return brotli.compress(body, quality=5 if fast else 11)
+    return gzip.compress(body, compresslevel=6 if fast else 9, mtime=0)
+
+def make_etag(body):
+    """ETag (sin comillas) del contenido de una respuesta."""
+    return hashlib.sha1(body).hexdigest()[:20]
+
+class PrecompressedPage:
+    """
+    Página ya renderizada y comprimida con cada codificación disponible, para
+    servirla sin volver a renderizar ni comprimir en cada petición.
+    """
+
+    def __init__(self, body, template=None):
+        """
+        Args:
+            body (bytes): HTML renderizado
+            template (jinja2.Template): Plantilla de origen (para detectar si cambia)
+        """
+        self.template = template
+        self.etag = make_etag(body)
+        self.variants = {None: body}
+        for encoding in supported_encodings():
+            self.variants[encoding] = compress(body, encoding)
+
+    def is_current(self):
+        """Indica si la plantilla de origen no ha cambiado desde que se renderizó."""
+        return self.template is None or self.template.is_up_to_date
+
+    def variant(self, accept_encoding):
+        """
+        Devuelve el cuerpo adecuado para el cliente.
+
+        Returns:
+            tuple: (codificación o None, cuerpo, ETag de esa variante)
+        """
+        encoding = choose_encoding(accept_encoding)
+        etag = f"{self.etag}-{encoding}" if encoding else self.etag
+        return encoding, self.variants[encoding], etag
@@ -0,0 +1,118 @@
+# idempotency.py
+import json
+import time
+import hashlib
+import threading
+import logging
+
+from storage import connect
+
+logger = logging.getLogger(__name__)
+
+_store = None
+_store_lock = threading.Lock()
+
+def request_fingerprint(params):
+    """
+    Calcula la huella de los parámetros de una petición, para detectar una
+    clave reutilizada con otra petición distinta.
+
+    Args:
+        params (dict): Parámetros de la petición
+
+    Returns:
+        str: Huella de los parámetros
+    """
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+class IdempotencyStore:
+    """
+    Claves de idempotencia de /generate: cada clave enviada por una página se
+    asocia a la tarea que creó, de modo que un doble clic o la recarga de un
+    iframe devuelven la tarea existente en lugar de generar otro informe. Las
+    claves caducan pasado el tiempo indicado.
+    """
+
+    def __init__(self, db_name='idempotency.db'):
+        """
+        Args:
+            db_name (str): Archivo SQLite de las claves
+        """
+        self.lock = threading.Lock()
+        self.conn = connect(db_name)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS request_keys (
+                request_key TEXT PRIMARY KEY,
+                task_id TEXT,
+                fingerprint TEXT,
+                expires_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS request_keys_expires ON request_keys (expires_at);
+        """)
+        self.conn.commit()
+
+    def reserve(self, request_key, task_id, fingerprint, ttl):
+        """
+        Asocia una clave a una tarea si la clave no está en uso.
+
+        Args:
+            request_key (str): Clave enviada por el cliente
+            task_id (str): ID de la tarea nueva
+            fingerprint (str): Huella de los parámetros (request_fingerprint)
+            ttl (float): Segundos que dura la clave
+
+        Returns:
+            dict: None si la clave queda reservada para task_id, o la entrada
+                  existente ('task_id', 'fingerprint', 'expires_at') si es una repetición
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    "SELECT task_id, fingerprint, expires_at FROM request_keys WHERE request_key = ? AND expires_at > ?",
+                    (request_key, now)
+                ).fetchone()
+                if not row:
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO request_keys (request_key, task_id, fingerprint, expires_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        (request_key, task_id, fingerprint, now + ttl)
+                    )
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        return dict(row) if row else None
+
+    def forget(self, request_key, task_id):
+        """Libera una clave (por ejemplo, si no se pudo crear su tarea)."""
+        with self.lock:
+            self.conn.execute("DELETE FROM request_keys WHERE request_key = ? AND task_id = ?", (request_key, task_id))
+            self.conn.commit()
+
+    def purge(self):
+        """
+        Elimina las claves caducadas.
+
+        Returns:
+            int: Número de claves eliminadas
+        """
+        with self.lock:
+            cursor = self.conn.execute("DELETE FROM request_keys WHERE expires_at <= ?", (time.time(),))
+            self.conn.commit()
+        return cursor.rowcount
+
+def get_idempotency_store():
+    """
+    Devuelve el almacén de claves de idempotencia compartido por el proceso.
+
+    Returns:
+        IdempotencyStore: Almacén abierto
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = IdempotencyStore()
+            _store.purge()
+        return _store
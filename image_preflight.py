@@ -0,0 +1,156 @@
+# image_preflight.py
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+import requests
+
+from storage import connect
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Tamaño máximo de imagen aceptado (Notion falla con imágenes externas muy grandes)
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+
+class ImagePreflight:
+    """
+    Comprueba en paralelo que las URLs de imágenes responden con una imagen válida
+    antes de enviarlas a Notion, y recuerda el resultado durante un tiempo (TTL).
+    """
+
+    def __init__(self, db_name='images.db', ttl_seconds=86400, timeout=3.0, deadline=5.0,
+                 max_bytes=DEFAULT_MAX_BYTES, max_workers=16):
+        """
+        Args:
+            db_name (str): Archivo SQLite de la caché de resultados
+            ttl_seconds (int): Tiempo durante el que se reutiliza un resultado
+            timeout (float): Tiempo máximo por petición (segundos)
+            deadline (float): Tiempo máximo para comprobar todas las imágenes (segundos)
+            max_bytes (int): Tamaño máximo aceptado
+            max_workers (int): Número de comprobaciones simultáneas
+        """
+        self.ttl_seconds = ttl_seconds
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_bytes = max_bytes
+        self.max_workers = max_workers
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = 'Mozilla/5.0 (compatible; NewsAutomation/1.0)'
+        self.lock = threading.Lock()
+        self.conn = connect(db_name)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS image_checks (
+                url TEXT PRIMARY KEY,
+                valid INTEGER,
+                reason TEXT,
+                checked_at REAL
+            )
+        """)
+        self.conn.commit()
+
+    def _cached(self, urls):
+        limit = time.time() - self.ttl_seconds
+        results = {}
+        with self.lock:
+            for url in urls:
+                row = self.conn.execute(
+                    "SELECT valid FROM image_checks WHERE url = ? AND checked_at >= ?", (url, limit)
+                ).fetchone()
+                if row:
+                    results[url] = bool(row['valid'])
+        return results
+
+    def _store(self, checks):
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO image_checks (url, valid, reason, checked_at) VALUES (?, ?, ?, ?)",
+                [(url, int(valid), reason, now) for url, (valid, reason) in checks.items()]
+            )
+            self.conn.commit()
+
+    def check_url(self, url):
+        """
+        Comprueba una URL con HEAD (o con GET de un solo byte si el servidor no admite HEAD).
+
+        Args:
+            url (str): URL de la imagen
+
+        Returns:
+            tuple: (válida, motivo); válida es None si el fallo es transitorio
+                   (error de red, 429 o 5xx) y conviene volver a comprobarla
+        """
+        if not url or not url.startswith(('http://', 'https://')):
+            return False, 'URL no válida'
+
+        try:
+            response = self.session.head(url, timeout=self.timeout, allow_redirects=True)
+            if response.status_code in (403, 405, 501):
+                response = self.session.get(url, timeout=self.timeout, stream=True,
+                                            headers={'Range': 'bytes=0-0'})
+                response.close()
+            metrics.count_api_call('images', 'ok' if response.status_code < 400 else 'error')
+        except Exception as e:
+            metrics.count_api_call('images', 'error')
+            return None, str(e)
+
+        if response.status_code == 429 or response.status_code >= 500:
+            return None, f'HTTP {response.status_code}'
+        if response.status_code not in (200, 206):
+            return False, f'HTTP {response.status_code}'
+
+        content_type = response.headers.get('Content-Type', '')
+        if not content_type.startswith('image/'):
+            return False, f'Tipo {content_type or "desconocido"}'
+
+        size = response.headers.get('Content-Length')
+        content_range = response.headers.get('Content-Range', '')
+        if response.status_code == 206 and '/' in content_range:
+            size = content_range.rsplit('/', 1)[-1]
+        if size and size.isdigit() and int(size) > self.max_bytes:
+            return False, f'Demasiado grande ({size} bytes)'
+
+        return True, 'ok'
+
+    def check_urls(self, urls):
+        """
+        Comprueba varias URLs en paralelo con un tiempo límite global.
+
+        Las URLs que no responden antes del límite o fallan por un error
+        transitorio se descartan en esta ejecución, pero no se recuerdan:
+        la siguiente vuelve a comprobarlas.
+
+        Args:
+            urls (list): URLs de imágenes
+
+        Returns:
+            dict: URL -> True si la imagen es válida
+        """
+        unique_urls = list(dict.fromkeys(url for url in urls if url))
+        results = self._cached(unique_urls)
+        for url in unique_urls:
+            metrics.count_cache('image', url in results)
+
+        pending = [url for url in unique_urls if url not in results]
+        if not pending:
+            return results
+
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending)))
+        futures = {executor.submit(metrics.bind(self.check_url), url): url for url in pending}
+        done, not_done = wait(futures, timeout=self.deadline)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        checks = {}
+        for future in done:
+            checks[futures[future]] = future.result()
+        for future in not_done:
+            checks[futures[future]] = (None, f'Sin respuesta antes de {self.deadline}s')
+        self._store({url: check for url, check in checks.items() if check[0] is not None})
+
+        for url, (valid, reason) in checks.items():
+            results[url] = bool(valid)
+            if not valid:
+                logger.info(f"Imagen descartada ({reason}): {url}")
+
+        return results
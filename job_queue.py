@@ -0,0 +1,370 @@
+# job_queue.py
+import os
+import json
+import uuid
+import datetime
+import importlib
+import threading
+import logging
+
+from storage import connect
+from rate_limiter import DEFAULT_PRIORITY, priority_rank
+
+logger = logging.getLogger(__name__)
+
+_queue = None
+_queue_lock = threading.Lock()
+
+# Estados de un trabajo: 'queued' -> 'running' -> 'completed' / 'error'
+FINISHED_STATUSES = ('completed', 'error')
+
+class JobQueue:
+    """
+    Interfaz de la cola de trabajos compartida entre la web, el programador y los
+    workers. Un worker reclama un trabajo con un alquiler (lease) que renueva con
+    latidos; si deja de renovarlo (proceso caído), el trabajo se vuelve a entregar.
+
+    Para usar otro almacén (Redis, PostgreSQL...) basta con implementar estos
+    métodos e indicar la clase en JOB_QUEUE_BACKEND ('modulo:Clase').
+    """
+
+    def enqueue(self, kind, payload, job_id=None, max_attempts=3, priority=DEFAULT_PRIORITY):
+        """
+        Añade un trabajo a la cola.
+
+        Args:
+            kind (str): Tipo de trabajo (por ejemplo 'report')
+            payload (dict): Parámetros del trabajo
+            job_id (str): ID del trabajo (por defecto se genera uno)
+            max_attempts (int): Entregas máximas antes de darlo por fallido
+            priority (str): Clase de prioridad ('interactive', 'scheduled', 'backfill')
+
+        Returns:
+            str: ID del trabajo
+        """
+        raise NotImplementedError
+
+    def record(self, job_id, kind, payload, status, message='', result=None, priority=DEFAULT_PRIORITY):
+        """Guarda un trabajo ya terminado (por ejemplo, un informe servido desde la caché)."""
+        raise NotImplementedError
+
+    def claim(self, worker_id, lease_seconds, priorities=None):
+        """
+        Reclama el trabajo pendiente más urgente (o uno cuyo alquiler haya caducado):
+        primero por clase de prioridad y, dentro de cada clase, el más antiguo.
+
+        Args:
+            worker_id (str): Identificador del worker
+            lease_seconds (float): Duración del alquiler
+            priorities (list): Solo reclamar trabajos de estas clases (por defecto, todas)
+
+        Returns:
+            dict: Trabajo reclamado o None si no hay ninguno
+        """
+        raise NotImplementedError
+
+    def heartbeat(self, job_id, worker_id, lease_seconds):
+        """
+        Renueva el alquiler de un trabajo.
+
+        Returns:
+            bool: False si el trabajo ya no pertenece a este worker
+        """
+        raise NotImplementedError
+
+    def update(self, job_id, **fields):
+        """Actualiza campos de un trabajo en curso ('message', 'run_id')."""
+        raise NotImplementedError
+
+    def finish(self, job_id, worker_id, status, message='', result=None):
+        """Marca un trabajo como terminado ('completed' o 'error') con su resultado."""
+        raise NotImplementedError
+
+    def release(self, job_id, worker_id, error):
+        """Devuelve un trabajo a la cola tras un fallo (o lo marca como 'error' si agotó sus entregas)."""
+        raise NotImplementedError
+
+    def defer(self, job_id, worker_id, delay, message=''):
+        """
+        Devuelve un trabajo a la cola para que no se entregue hasta dentro de delay
+        segundos (por ejemplo, con un servicio caído); no cuenta como entrega fallida.
+        """
+        raise NotImplementedError
+
+    def get(self, job_id):
+        """
+        Devuelve un trabajo.
+
+        Returns:
+            dict: Trabajo (con 'payload' y 'result' decodificados) o None
+        """
+        raise NotImplementedError
+
+    def stats(self):
+        """Devuelve el número de trabajos por estado."""
+        raise NotImplementedError
+
+    def latency_percentiles(self, hours=24):
+        """
+        Percentiles de latencia de los trabajos terminados por clase de prioridad.
+
+        Args:
+            hours (float): Solo los trabajos creados en las últimas horas indicadas
+
+        Returns:
+            dict: Por clase, 'count' y los percentiles p50/p90/p99 (segundos) de
+                  'wait' (en cola hasta la primera entrega) y 'total' (hasta terminar)
+        """
+        raise NotImplementedError
+
+def percentiles(values, points=(50, 90, 99)):
+    """
+    Calcula percentiles por el método del rango más cercano.
+
+    Args:
+        values (list): Valores
+        points (tuple): Percentiles a calcular
+
+    Returns:
+        dict: 'p50', 'p90'... (None si no hay valores)
+    """
+    values = sorted(values)
+    result = {}
+    for point in points:
+        if not values:
+            result[f'p{point}'] = None
+            continue
+        rank = max(1, -(-point * len(values) // 100))
+        result[f'p{point}'] = round(values[rank - 1], 3)
+    return result
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Cola de trabajos en SQLite. Varios procesos de la misma máquina pueden
+    compartirla (mismo NEWS_DATA_DIR); la reclamación es atómica gracias a
+    BEGIN IMMEDIATE. Solo sirve para una máquina: la base usa WAL, que no
+    funciona en discos de red (NFS, SMB). Para workers en varias máquinas hay
+    que usar otro almacén con JOB_QUEUE_BACKEND.
+    """
+
+    def __init__(self, db_name='jobs.db'):
+        """
+        Args:
+            db_name (str): Archivo SQLite de la cola
+        """
+        self.lock = threading.Lock()
+        self.conn = connect(db_name)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                kind TEXT,
+                payload TEXT,
+                status TEXT,
+                message TEXT,
+                result TEXT,
+                run_id TEXT,
+                worker_id TEXT,
+                attempts INTEGER DEFAULT 0,
+                max_attempts INTEGER DEFAULT 3,
+                lease_until TEXT,
+                available_at TEXT,
+                priority TEXT,
+                priority_rank INTEGER DEFAULT 1,
+                started_at TEXT,
+                created_at TEXT,
+                updated_at TEXT
+            );
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_priority ON jobs (status, priority_rank, created_at)")
+        self.conn.commit()
+
+    def _now(self):
+        return datetime.datetime.now()
+
+    def enqueue(self, kind, payload, job_id=None, max_attempts=3, priority=DEFAULT_PRIORITY):
+        job_id = job_id or f"job_{uuid.uuid4().hex}"
+        now = self._now().isoformat()
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO jobs (job_id, kind, payload, status, message, max_attempts, priority, priority_rank, "
+                "created_at, updated_at) VALUES (?, ?, ?, 'queued', 'En cola...', ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), max_attempts, priority, priority_rank(priority), now, now)
+            )
+            self.conn.commit()
+        return job_id
+
+    def record(self, job_id, kind, payload, status, message='', result=None, priority=DEFAULT_PRIORITY):
+        now = self._now().isoformat()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, kind, payload, status, message, result, priority, priority_rank, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), status, message, json.dumps(result), priority,
+                 priority_rank(priority), now, now)
+            )
+            self.conn.commit()
+
+    def claim(self, worker_id, lease_seconds, priorities=None):
+        now = self._now()
+        priority_filter, priority_params = '', []
+        if priorities:
+            priority_filter = f" AND priority IN ({', '.join('?' * len(priorities))})"
+            priority_params = list(priorities)
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Los trabajos cuyo worker dejó de enviar latidos y ya agotaron sus entregas se dan por fallidos
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'error', message = 'El worker dejó de responder', updated_at = ? "
+                    "WHERE status = 'running' AND lease_until < ? AND attempts >= max_attempts",
+                    (now.isoformat(), now.isoformat())
+                )
+                row = self.conn.execute(
+                    "SELECT job_id FROM jobs WHERE ((status = 'queued' AND (available_at IS NULL OR available_at <= ?)) "
+                    f"OR (status = 'running' AND lease_until < ?)){priority_filter} "
+                    "ORDER BY priority_rank, created_at LIMIT 1",
+                    (now.isoformat(), now.isoformat(), *priority_params)
+                ).fetchone()
+                if row:
+                    self.conn.execute(
+                        "UPDATE jobs SET status = 'running', worker_id = ?, attempts = attempts + 1, "
+                        "lease_until = ?, started_at = COALESCE(started_at, ?), updated_at = ? WHERE job_id = ?",
+                        (worker_id, (now + datetime.timedelta(seconds=lease_seconds)).isoformat(),
+                         now.isoformat(), now.isoformat(), row['job_id'])
+                    )
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        return self.get(row['job_id']) if row else None
+
+    def heartbeat(self, job_id, worker_id, lease_seconds):
+        now = self._now()
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE job_id = ? AND worker_id = ? AND status = 'running'",
+                ((now + datetime.timedelta(seconds=lease_seconds)).isoformat(), now.isoformat(), job_id, worker_id)
+            )
+            self.conn.commit()
+        return cursor.rowcount > 0
+
+    def update(self, job_id, **fields):
+        fields = {name: value for name, value in fields.items() if name in ('message', 'run_id')}
+        if not fields:
+            return
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self.lock:
+            self.conn.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE job_id = ?",
+                (*fields.values(), self._now().isoformat(), job_id)
+            )
+            self.conn.commit()
+
+    def finish(self, job_id, worker_id, status, message='', result=None):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, message = ?, result = ?, lease_until = NULL, updated_at = ? "
+                "WHERE job_id = ? AND worker_id = ?",
+                (status, message, json.dumps(result), self._now().isoformat(), job_id, worker_id)
+            )
+            self.conn.commit()
+
+    def release(self, job_id, worker_id, error):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'error' ELSE 'queued' END, "
+                "message = ?, lease_until = NULL, updated_at = ? WHERE job_id = ? AND worker_id = ?",
+                (f"Error: {error}", self._now().isoformat(), job_id, worker_id)
+            )
+            self.conn.commit()
+
+    def defer(self, job_id, worker_id, delay, message=''):
+        now = self._now()
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'queued', message = ?, attempts = MAX(attempts - 1, 0), lease_until = NULL, "
+                "available_at = ?, updated_at = ? WHERE job_id = ? AND worker_id = ?",
+                (message, (now + datetime.timedelta(seconds=delay)).isoformat(), now.isoformat(), job_id, worker_id)
+            )
+            self.conn.commit()
+
+    def get(self, job_id):
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if not row:
+            return None
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'] or '{}')
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def stats(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) AS total FROM jobs GROUP BY status").fetchall()
+        return {row['status']: row['total'] for row in rows}
+
+    def latency_percentiles(self, hours=24):
+        since = (self._now() - datetime.timedelta(hours=hours)).isoformat()
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT priority, created_at, started_at, updated_at FROM jobs "
+                "WHERE status IN ('completed', 'error') AND started_at IS NOT NULL AND created_at >= ?",
+                (since,)
+            ).fetchall()
+
+        samples = {}
+        for row in rows:
+            created = datetime.datetime.fromisoformat(row['created_at'])
+            wait = (datetime.datetime.fromisoformat(row['started_at']) - created).total_seconds()
+            total = (datetime.datetime.fromisoformat(row['updated_at']) - created).total_seconds()
+            entry = samples.setdefault(row['priority'] or DEFAULT_PRIORITY, {'wait': [], 'total': []})
+            entry['wait'].append(wait)
+            entry['total'].append(total)
+
+        return {
+            priority: {
+                'count': len(samples[priority]['total']),
+                'wait': percentiles(samples[priority]['wait']),
+                'total': percentiles(samples[priority]['total'])
+            }
+            for priority in sorted(samples, key=priority_rank)
+        }
+
+    def purge(self, keep_days=7):
+        """
+        Elimina los trabajos terminados hace más de keep_days días.
+
+        Returns:
+            int: Número de trabajos eliminados
+        """
+        limit = (self._now() - datetime.timedelta(days=keep_days)).isoformat()
+        with self.lock:
+            cursor = self.conn.execute(
+                "DELETE FROM jobs WHERE status IN ('completed', 'error') AND updated_at < ?", (limit,)
+            )
+            self.conn.commit()
+        return cursor.rowcount
+
+def get_job_queue():
+    """
+    Devuelve la cola de trabajos compartida por el proceso.
+
+    El almacén se elige con JOB_QUEUE_BACKEND: 'sqlite' (por defecto) o la ruta
+    de una clase compatible con JobQueue ('modulo:Clase').
+
+    Returns:
+        JobQueue: Cola abierta
+    """
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            backend = os.getenv("JOB_QUEUE_BACKEND", "sqlite")
+            if backend == 'sqlite':
+                _queue = SQLiteJobQueue()
+                _queue.purge()
+            else:
+                module_name, class_name = backend.split(':', 1)
+                _queue = getattr(importlib.import_module(module_name), class_name)()
+            logger.info(f"Cola de trabajos: {type(_queue).__name__}")
+        return _queue
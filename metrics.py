@@ -0,0 +1,239 @@
+# metrics.py
+import time
+import threading
+import contextvars
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Límites de los histogramas de duración (segundos)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_registry = []
+_current_run = contextvars.ContextVar('current_run', default=None)
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+class Counter:
+    """Contador acumulativo con etiquetas, en formato Prometheus."""
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, *label_values, amount=1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def get(self, *label_values):
+        return self.values.get(label_values, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for label_values, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+class Gauge(Counter):
+    """Valor instantáneo con etiquetas, en formato Prometheus."""
+
+    def set(self, *label_values, value):
+        with self.lock:
+            self.values[label_values] = value
+
+    def render(self):
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+class Histogram:
+    """Histograma con etiquetas, en formato Prometheus."""
+
+    def __init__(self, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self.lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, *label_values, value):
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for label_values, series in sorted(self.series.items()):
+                for bound, count in zip(self.buckets, series['buckets']):
+                    labels = _format_labels(self.labels + ('le',), label_values + (bound,))
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.labels + ('le',), label_values + ('+Inf',))
+                lines.append(f"{self.name}_bucket{labels} {series['count']}")
+                labels = _format_labels(self.labels, label_values)
+                lines.append(f"{self.name}_sum{labels} {series['sum']:.6f}")
+                lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+# Métricas del sistema
+STAGE_SECONDS = Histogram('news_stage_duration_seconds', 'Duración de cada etapa de un informe', ['stage'])
+API_CALLS = Counter('news_api_calls_total', 'Llamadas a APIs externas', ['service', 'status'])
+RETRIES = Counter('news_api_retries_total', 'Reintentos de llamadas a APIs externas', ['service'])
+CACHE_LOOKUPS = Counter('news_cache_lookups_total', 'Consultas a cachés locales', ['cache', 'result'])
+PAYLOAD_BYTES = Counter('news_payload_bytes_total', 'Bytes enviados o recibidos de APIs externas',
+                        ['service', 'direction'])
+REPORTS = Counter('news_reports_total', 'Informes generados', ['status'])
+JOB_LATENCY = Histogram('news_job_latency_seconds', 'Espera en cola y duración total de los trabajos por prioridad',
+                        ['priority', 'phase'], buckets=(1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600))
+
+class RunMetrics:
+    """Tiempos por etapa y contadores de una única ejecución del informe."""
+
+    def __init__(self):
+        self.timings = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+        # Perfil de CPU y memoria por etapa (profiling.RunProfiler), solo si se pidió
+        self.profiler = None
+        # Clase de prioridad del informe (rate_limiter.PRIORITIES), para el limitador de llamadas
+        self.priority = None
+
+    def add_timing(self, stage, seconds):
+        with self.lock:
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    def add(self, key, amount=1):
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                'timings': {stage: round(seconds, 4) for stage, seconds in self.timings.items()},
+                'counters': dict(self.counters)
+            }
+
+def current_run():
+    """Devuelve las métricas de la ejecución en curso (o None)."""
+    return _current_run.get()
+
+@contextmanager
+def track_run(run=None):
+    """
+    Asocia las métricas registradas dentro del bloque a una ejecución.
+
+    Args:
+        run (RunMetrics): Ejecución a la que asociarlas (por defecto, una nueva)
+
+    Yields:
+        RunMetrics: Métricas de la ejecución
+    """
+    run = run or RunMetrics()
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+
+def bind(func):
+    """
+    Envuelve una función para que, al ejecutarse en otro hilo, siga registrando
+    sus métricas en la ejecución actual.
+
+    Args:
+        func: Función a envolver
+
+    Returns:
+        function: Función envuelta
+    """
+    run = current_run()
+
+    def wrapper(*args, **kwargs):
+        with track_run(run) if run else _noop():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+@contextmanager
+def _noop():
+    yield None
+
+@contextmanager
+def stage(name):
+    """
+    Mide la duración de una etapa del informe.
+
+    Args:
+        name (str): Nombre de la etapa ('search', 'enrichment', 'summarization', ...)
+    """
+    run = current_run()
+    profiling = run.profiler.stage(name) if run and run.profiler else _noop()
+    start = time.perf_counter()
+    try:
+        with profiling:
+            yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(name, value=elapsed)
+        if run:
+            run.add_timing(name, elapsed)
+
+def count_api_call(service, status='ok'):
+    """Registra una llamada a una API externa ('newsapi', 'notion', 'openai', ...)."""
+    API_CALLS.inc(service, status)
+    run = current_run()
+    if run:
+        run.add(f'api_calls_{service}')
+        if status != 'ok':
+            run.add(f'api_errors_{service}')
+
+def count_retry(service):
+    """Registra un reintento de una llamada a una API externa."""
+    RETRIES.inc(service)
+    run = current_run()
+    if run:
+        run.add(f'retries_{service}')
+
+def count_cache(cache, hit):
+    """Registra un acierto o fallo de una caché local."""
+    CACHE_LOOKUPS.inc(cache, 'hit' if hit else 'miss')
+    run = current_run()
+    if run:
+        run.add(f"cache_{'hits' if hit else 'misses'}_{cache}")
+
+def add_payload_bytes(service, nbytes, direction='out'):
+    """Registra los bytes enviados ('out') o recibidos ('in') de una API externa."""
+    PAYLOAD_BYTES.inc(service, direction, amount=nbytes)
+    run = current_run()
+    if run:
+        run.add(f'payload_bytes_{direction}_{service}', nbytes)
+
+def render_prometheus():
+    """
+    Genera el texto de todas las métricas en el formato de exposición de Prometheus.
+
+    Returns:
+        str: Métricas en texto plano
+    """
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
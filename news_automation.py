@@ -9,11 +9,29 @@ import argparse
 import logging
 from dotenv import load_dotenv
 from newsapi import NewsApiClient
+from newsapi import const as newsapi_const
 from notion_client import Client
-import hashlib
 import openai  # Para resúmenes con IA
 import threading
 import random
+import gc
+from articles import prepare_article, merge_by_recency
+from rss_feeds import get_feed_fetcher
+from article_index import get_article_index
+from ranking import rank_articles
+import metrics
+from report_cache import get_report_cache, make_report_key
+from image_preflight import ImagePreflight
+from checkpoints import get_checkpoint_store
+from job_queue import get_job_queue
+from profiling import profile_run, format_profile_summary
+from notion_mirror import get_notion_mirror
+from circuit_breaker import get_breaker, is_service_failure, CircuitOpenError
+from rate_limiter import get_rate_limiter, DEFAULT_PRIORITY
+from quota import get_quota_ledger, get_quota_planner, record_call
+from topic_watch import get_watch_store, next_interval, budget_interval
+from archive import get_archive, format_report_markdown
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -77,18 +95,290 @@ notion_token = format_api_token(os.getenv("NOTION_TOKEN"), 'notion_token')
 notion_db_id = format_api_token(os.getenv("NOTION_DATABASE_ID"), 'notion_db')
 NOTION_TOKEN = notion_token
 NOTION_DATABASE_ID = notion_db_id
-notion = Client(auth=NOTION_TOKEN)
+# NOTION_BASE_URL permite apuntar a otro servidor (por ejemplo, los simuladores de benchmarks/)
+NOTION_BASE_URL = os.getenv("NOTION_BASE_URL", "")
+notion = Client(auth=NOTION_TOKEN, base_url=NOTION_BASE_URL) if NOTION_BASE_URL else Client(auth=NOTION_TOKEN)
+
+# Segundos tras los que la copia local de la base de datos de Notion se vuelve a sincronizar
+NOTION_MIRROR_MAX_AGE = float(os.getenv("NOTION_MIRROR_MAX_AGE", 300))
+
+# Notion no admite más de 100 bloques hijos por petición ni textos de más de 2000 caracteres
+NOTION_MAX_CHILDREN = 100
+NOTION_MAX_TEXT = 2000
+# Presupuesto de memoria de los bloques pendientes de enviar (bytes de JSON por lote); también
+# mantiene cada petición por debajo del límite de tamaño de Notion (500 KB)
+NOTION_BATCH_MAX_BYTES = int(os.getenv("NOTION_BATCH_MAX_BYTES", 400 * 1024))
 
 # Configuración de NewsAPI
 NEWS_API_KEY = format_api_token(os.getenv("NEWS_API_KEY"), 'newsapi')
 newsapi = NewsApiClient(api_key=NEWS_API_KEY)
+NEWSAPI_BASE_URL = os.getenv("NEWSAPI_BASE_URL", "").rstrip('/')
+if NEWSAPI_BASE_URL:
+    newsapi_const.EVERYTHING_URL = f"{NEWSAPI_BASE_URL}/v2/everything"
+    newsapi_const.TOP_HEADLINES_URL = f"{NEWSAPI_BASE_URL}/v2/top-headlines"
+    newsapi_const.SOURCES_URL = f"{NEWSAPI_BASE_URL}/v2/sources"
 
 # Configuración de OpenAI (opcional, para resúmenes)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 if OPENAI_API_KEY:
     openai.api_key = OPENAI_API_KEY
+if os.getenv("OPENAI_API_BASE"):
+    openai.api_base = os.getenv("OPENAI_API_BASE")
+
+# Reintentos ante errores de límite de tasa (429) de las APIs externas
+API_MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", 3))
+API_RETRY_BACKOFF = float(os.getenv("API_RETRY_BACKOFF", 1.0))
+
+# Feeds RSS/Atom (opcional, alternativa a NewsAPI separada por comas)
+RSS_FEEDS = [url.strip() for url in os.getenv("RSS_FEEDS", "").split(',') if url.strip()]
+
+# Reintentos de un informe completo, continuando desde la última etapa terminada
+REPORT_MAX_ATTEMPTS = max(1, int(os.getenv("REPORT_MAX_ATTEMPTS", 2)))
+REPORT_RETRY_DELAY = float(os.getenv("REPORT_RETRY_DELAY", 30))
+# Un informe 'running' sin actualizarse en estos minutos se considera interrumpido
+RUN_STALE_MINUTES = float(os.getenv("RUN_STALE_MINUTES", 30))
+# Cada cuántos minutos el programador reanuda los informes pendientes
+RESUME_INTERVAL_MINUTES = int(os.getenv("RESUME_INTERVAL_MINUTES", 5))
+# Reanudaciones automáticas de un mismo informe antes de dejarlo para 'reanudar <run_id>'
+RUN_MAX_RESUMES = int(os.getenv("RUN_MAX_RESUMES", 12))
+
+# Modo vigilancia: intervalo de consulta de cada tema (se adapta entre estos límites),
+# llamadas diarias a NewsAPI que puede gastar y artículos pedidos por consulta
+WATCH_MIN_INTERVAL = float(os.getenv("WATCH_MIN_INTERVAL", 120))
+WATCH_MAX_INTERVAL = float(os.getenv("WATCH_MAX_INTERVAL", 3600))
+WATCH_DAILY_BUDGET = int(os.getenv("WATCH_DAILY_BUDGET", 100))
+WATCH_PAGE_SIZE = int(os.getenv("WATCH_PAGE_SIZE", 20))
+# Páginas como máximo por idioma en cada consulta cuando hay muchos artículos nuevos
+WATCH_MAX_PAGES = int(os.getenv("WATCH_MAX_PAGES", 5))
+
+# 'local': la web y el programador encolan y procesan los informes en hilos propios
+# (de la misma cola; la web reserva WEB_RESERVED_THREADS para los interactivos).
+# 'distributed': la web y el programador solo encolan; los procesos 'worker' los ejecutan.
+JOB_QUEUE_MODE = os.getenv("JOB_QUEUE_MODE", "local")
+# Hilos worker del programador en modo local
+SCHEDULER_WORKER_THREADS = int(os.getenv("SCHEDULER_WORKER_THREADS", 1))
+
+# Si se activa, una tarea programada no se ejecuta si hoy ya hay en Notion algún informe del
+# mismo tema (aunque tenga otras opciones); por defecto solo se omite un informe idéntico
+SCHEDULE_SKIP_PUBLISHED = os.getenv("SCHEDULE_SKIP_PUBLISHED", "0") not in ("0", "false", "no")
+
+# Idiomas de búsqueda por defecto (separados por comas); con varios se buscan en paralelo
+NEWS_LANGUAGES = [code.strip().lower() for code in os.getenv("NEWS_LANGUAGES", "es").split(',') if code.strip()] or ['es']
+
+# Informes históricos (historico): días de cada ventana y ventanas que se piden a la vez
+BACKFILL_WINDOW_DAYS = max(1, int(os.getenv("BACKFILL_WINDOW_DAYS", 7)))
+BACKFILL_WORKERS = max(1, int(os.getenv("BACKFILL_WORKERS", 4)))
+
+# Cuántos candidatos se piden por cada resultado final para poder elegir los mejores
+RANKING_OVERFETCH = max(1, int(os.getenv("RANKING_OVERFETCH", 3)))
+
+# Comprobación previa de imágenes (desactivable con IMAGE_PREFLIGHT=0)
+IMAGE_PREFLIGHT = os.getenv("IMAGE_PREFLIGHT", "1") not in ("0", "false", "no")
+IMAGE_CACHE_TTL = int(os.getenv("IMAGE_CACHE_TTL", 24 * 3600))
+IMAGE_PREFLIGHT_DEADLINE = float(os.getenv("IMAGE_PREFLIGHT_DEADLINE", 5))
+image_preflight = None
+
+# Resúmenes por lotes: varios artículos por llamada a OpenAI
+AI_SUMMARY_BATCH = os.getenv("AI_SUMMARY_BATCH", "1") not in ("0", "false", "no")
+AI_BATCH_PROMPT_TOKENS = int(os.getenv("AI_BATCH_PROMPT_TOKENS", 2000))
+AI_MODEL_MAX_TOKENS = 4000  # Contexto de text-davinci-003 (prompt + respuesta)
+AI_BATCH_WORKERS = int(os.getenv("AI_BATCH_WORKERS", 3))
+
+# NewsAPI devuelve como máximo 100 artículos por página; por encima se pagina
+NEWSAPI_PAGE_SIZE = 100
+MAX_RESULTS_LIMIT = int(os.getenv("MAX_RESULTS_LIMIT", 500))
+
+class ReportCancelledError(Exception):
+    """El informe se canceló (por ejemplo, el worker perdió el alquiler de su trabajo)."""
+
+def is_rate_limit_error(error):
+    """
+    Indica si una excepción de un cliente de API corresponde a un límite de tasa.
+
+    Args:
+        error (Exception): Excepción lanzada por el cliente
+
+    Returns:
+        bool: True si el error es un 429 / rate limit
+    """
+    if getattr(error, 'code', None) == 'rate_limited' or getattr(error, 'status', None) == 429:
+        return True
+    error_message = str(error).lower()
+    return "rate limit" in error_message or "ratelimited" in error_message or "too many requests" in error_message
+
+def call_api(service, func, *args, **kwargs):
+    """
+    Llama a una API externa registrando la llamada en las métricas y
+    reintentando con espera exponencial si la API responde con un límite de tasa.
+    Si el servicio acumula fallos, su circuito se abre y las llamadas fallan al instante.
+    Si el servicio tiene un límite de llamadas (API_RATE_LIMITS), cada llamada espera
+    su turno según la prioridad del informe en curso. Cada llamada que sale se
+    suma a la cuota diaria del servicio.
+
+    Args:
+        service (str): Nombre del servicio ('newsapi', 'notion', 'openai')
+        func: Función del cliente de la API
+        *args, **kwargs: Argumentos para la función
+
+    Returns:
+        La respuesta de la API
+
+    Raises:
+        CircuitOpenError: Si el circuito del servicio está abierto (sin llegar a llamar a la API)
+    """
+    breaker = get_breaker(service)
+    try:
+        breaker.before_call()
+    except CircuitOpenError:
+        metrics.count_api_call(service, 'rejected')
+        raise
+
+    limiter = get_rate_limiter(service)
+    run = metrics.current_run()
+    priority = (run.priority if run else None) or DEFAULT_PRIORITY
+
+    attempt = 0
+    while True:
+        if limiter:
+            limiter.acquire(priority)
+        record_call(service)
+        try:
+            response = func(*args, **kwargs)
+        except Exception as e:
+            metrics.count_api_call(service, 'error')
+            if attempt >= API_MAX_RETRIES or not is_rate_limit_error(e):
+                # Los errores de la petición (4xx) indican que el servicio responde
+                if is_service_failure(e):
+                    breaker.record_failure(e)
+                else:
+                    breaker.record_success()
+                raise
+            # Respetar Retry-After si la API lo indica
+            headers = getattr(e, 'headers', None) or {}
+            try:
+                wait = float(headers.get('retry-after'))
+            except (TypeError, ValueError):
+                wait = API_RETRY_BACKOFF * (2 ** attempt)
+            attempt += 1
+            metrics.count_retry(service)
+            logger.warning(f"Límite de tasa en {service}, reintento {attempt}/{API_MAX_RETRIES} en {wait:.1f}s")
+            time.sleep(wait)
+            continue
+        metrics.count_api_call(service, 'ok')
+        breaker.record_success()
+        return response
+
+def iter_news_pages(topic, language='es', max_articles=100, **params):
+    """
+    Recorre las páginas de resultados de NewsAPI (get_everything) como un generador.
+
+    Mientras se procesa una página, la siguiente ya se está descargando en segundo plano.
+    El recorrido termina al alcanzar max_articles, cuando no quedan más resultados o
+    cuando el plan de NewsAPI no permite pedir más páginas.
+
+    Args:
+        topic (str): Tema de búsqueda
+        language (str): Idioma de las noticias
+        max_articles (int): Número máximo de artículos a pedir en total
+        **params: Parámetros adicionales de get_everything (from_param, to, sort_by...)
+
+    Yields:
+        list: Artículos de cada página, ya preparados con prepare_article
+    """
+    page_size = min(NEWSAPI_PAGE_SIZE, max_articles)
+    last_page = (max_articles + page_size - 1) // page_size
+    params.setdefault('sort_by', 'publishedAt')
+
+    def fetch_page(page):
+        try:
+            return call_api(
+                'newsapi', newsapi.get_everything,
+                q=topic,
+                language=language,
+                page_size=page_size,
+                page=page,
+                **params
+            )
+        except Exception as e:
+            # El plan gratuito/desarrollador no permite pasar de 100 resultados
+            if page > 1 and 'maximumResultsReached' in str(e):
+                logger.info(f"NewsAPI no permite pedir más allá de la página {page - 1}")
+                return None
+            raise
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(metrics.bind(fetch_page), 1)
+    try:
+        for page in range(1, last_page + 1):
+            news_response = future.result()
+            if news_response is None:
+                return
+
+            articles = news_response.get('articles', [])
+            total_results = news_response.get('totalResults', 0)
+            has_more = (page < last_page and len(articles) == page_size and page * page_size < total_results)
+
+            # Descargar la siguiente página mientras se procesa esta
+            if has_more:
+                future = executor.submit(metrics.bind(fetch_page), page + 1)
+
+            metrics.add_payload_bytes('newsapi', len(json.dumps(news_response)), direction='in')
+            for article in articles:
+                prepare_article(article)
+            yield articles
+
+            if not has_more:
+                return
+    finally:
+        # Si el consumidor deja de pedir páginas, la siguiente no llega a descargarse
+        future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def iter_news(topic, language='es', max_articles=100, **params):
+    """
+    Devuelve los artículos de NewsAPI de uno en uno, sin duplicados, a medida que llegan las páginas.
 
-def search_news(topic, language='es', max_results=10):
+    Args:
+        topic (str): Tema de búsqueda
+        language (str): Idioma de las noticias
+        max_articles (int): Número de artículos únicos tras el que se deja de pedir páginas
+        **params: Parámetros adicionales de get_everything
+
+    Yields:
+        dict: Artículo preparado
+    """
+    seen = set()
+    for articles in iter_news_pages(topic, language=language, max_articles=max_articles, **params):
+        # Guardar cada página en el índice local en cuanto llega
+        index_articles(articles, topic)
+        for article in articles:
+            if article['article_id'] in seen:
+                continue
+            seen.add(article['article_id'])
+            yield article
+            if len(seen) >= max_articles:
+                return
+
+def parse_languages(languages):
+    """
+    Normaliza una lista de idiomas ('es,en' o ['es', 'en']) sin repeticiones.
+
+    Args:
+        languages (str|list): Códigos de idioma
+
+    Returns:
+        list: Códigos en minúsculas, en el orden indicado (None si no hay ninguno)
+    """
+    if isinstance(languages, str):
+        languages = languages.split(',')
+    codes = []
+    for code in languages or []:
+        code = code.strip().lower()
+        if code and code not in codes:
+            codes.append(code)
+    return codes or None
+
+def search_news(topic, language='es', max_results=10, languages=None):
     """
     Busca noticias sobre un tema específico.
 
@@ -96,10 +386,18 @@ def search_news(topic, language='es', max_results=10):
         topic (str): Tema de búsqueda
         language (str): Idioma de las noticias (por defecto 'es' para español)
         max_results (int): Número máximo de resultados a devolver
+        languages (list): Si se indican varios idiomas, se busca en todos a la vez
+                          (ver search_news_languages)
 
     Returns:
         list: Lista de artículos de noticias
     """
+    languages = parse_languages(languages)
+    if languages and len(languages) > 1:
+        return search_news_languages(topic, languages, max_results)
+    if languages:
+        language = languages[0]
+
     try:
         # Validar y convertir max_results a entero
         try:
@@ -107,8 +405,8 @@ def search_news(topic, language='es', max_results=10):
         except (ValueError, TypeError):
             max_results = 10
 
-        # Limitar max_results entre 5 y 100 (evitar abusar de la API)
-        max_results = max(5, min(100, max_results))
+        # Limitar max_results entre 5 y MAX_RESULTS_LIMIT (evitar abusar de la API)
+        max_results = max(5, min(MAX_RESULTS_LIMIT, max_results))
 
         # Calcular fecha para la búsqueda (últimos 7 días)
         end_date = datetime.datetime.now().date()
@@ -118,62 +416,319 @@ def search_news(topic, language='es', max_results=10):
         logger.info(f"Buscando noticias desde {start_date.isoformat()} hasta {end_date.isoformat()}")
         logger.info(f"Máximo de resultados solicitados: {max_results}")
 
+        # Pedir más candidatos de los necesarios para quedarnos con los mejores
+        # (más de 100 se obtienen paginando)
+        candidates = max_results * RANKING_OVERFETCH
+
+        mode = plan_news_search(topic, candidates)
+        if mode == 'cached':
+            articles = [prepare_article(article) for article in
+                        search_local_index(topic, from_date=start_date.isoformat(), limit=candidates)]
+            logger.info(f"Se encontraron {len(articles)} artículos sobre '{topic}' en el índice local")
+            return rank_articles(articles, topic, max_results)
+        if mode == 'single':
+            # Una sola página y sin estrategias alternativas
+            candidates = min(candidates, NEWSAPI_PAGE_SIZE)
+
         # ESTRATEGIA 1: Búsqueda con rango de fechas
-        news_response = newsapi.get_everything(
-            q=topic,
+        # (las páginas se deduplican e indexan según llegan; el ranking necesita
+        # todos los candidatos a la vez para BM25 y la diversidad de fuentes)
+        articles = list(iter_news(
+            topic,
             language=language,
+            max_articles=candidates,
             from_param=start_date.isoformat(),
-            to=end_date.isoformat(),
-            sort_by='publishedAt',  # Ordenar por fecha de publicación
-            page_size=max_results
-        )
+            to=end_date.isoformat()
+        ))
 
         # Si no hay resultados, intentar con una búsqueda más amplia
-        if len(news_response['articles']) == 0:
+        if len(articles) == 0 and mode == 'full':
             logger.info("No se encontraron resultados recientes. Ampliando búsqueda...")
             # ESTRATEGIA 2: Búsqueda sin restricción de fechas
-            news_response = newsapi.get_everything(
-                q=topic,
-                language=language,
-                sort_by='publishedAt',
-                page_size=max_results
-            )
+            articles = list(iter_news(topic, language=language, max_articles=candidates))
 
         # Otra alternativa: buscar en los titulares principales
-        if len(news_response['articles']) == 0:
+        if len(articles) == 0 and mode == 'full':
             logger.info("Intentando con búsqueda de titulares principales...")
             # ESTRATEGIA 3: Buscar en titulares
-            news_response = newsapi.get_top_headlines(
+            news_response = call_api(
+                'newsapi', newsapi.get_top_headlines,
                 q=topic,
                 language=language,
-                page_size=max_results
+                page_size=min(NEWSAPI_PAGE_SIZE, candidates)
             )
+            metrics.add_payload_bytes('newsapi', len(json.dumps(news_response)), direction='in')
+            articles = [prepare_article(article) for article in news_response['articles']]
+            index_articles(articles, topic)
 
-        # Procesar cada artículo para añadir información adicional
-        for article in news_response['articles']:
-            # Generar un ID único para el artículo (útil para caché y referencia)
-            article_id = hashlib.md5(f"{article.get('url', '')}{article.get('title', '')}".encode()).hexdigest()
-            article['article_id'] = article_id
+        logger.info(f"Se encontraron {len(articles)} artículos sobre '{topic}'")
 
-            # Añadir la imagen del artículo si existe
-            if 'urlToImage' in article and article['urlToImage']:
-                article['image_url'] = article['urlToImage']
+        # Quedarse con los mejores artículos por relevancia, actualidad y diversidad de fuentes
+        return rank_articles(articles, topic, max_results)
 
-            # Formatear la fecha
-            if 'publishedAt' in article and article['publishedAt']:
-                try:
-                    date_obj = datetime.datetime.fromisoformat(article['publishedAt'].replace('Z', '+00:00'))
-                    article['formatted_date'] = date_obj.strftime('%d-%m-%Y %H:%M')
-                except:
-                    article['formatted_date'] = article['publishedAt']
+    except Exception as e:
+        logger.error(f"Error al buscar noticias: {str(e)}")
+        return []
 
-        logger.info(f"Se encontraron {len(news_response['articles'])} artículos sobre '{topic}'")
+def plan_news_search(topic, candidates):
+    """
+    Decide, según la cuota diaria de NewsAPI y la prioridad del informe en curso,
+    cómo buscar un tema: con todas las estrategias ('full'), con una sola llamada
+    ('single') o solo en el índice local ('cached').
 
-        # Aplicar límite de resultados
-        return news_response['articles'][:max_results]
+    Args:
+        topic (str): Tema de búsqueda
+        candidates (int): Artículos que se quieren obtener
 
+    Returns:
+        str: Modo de búsqueda
+    """
+    run = metrics.current_run()
+    priority = (run.priority if run else None) or DEFAULT_PRIORITY
+    # Páginas de la estrategia 1 más las dos estrategias alternativas
+    full_calls = (candidates + NEWSAPI_PAGE_SIZE - 1) // NEWSAPI_PAGE_SIZE + 2
+    try:
+        mode = get_quota_planner().plan_search('newsapi', priority, topic, full_calls)
     except Exception as e:
-        logger.error(f"Error al buscar noticias: {str(e)}")
+        logger.warning(f"No se pudo consultar la cuota de NewsAPI: {str(e)}")
+        return 'full'
+    if mode != 'full':
+        logger.warning(f"Cuota diaria de NewsAPI casi agotada: búsqueda '{mode}' para '{topic}' (prioridad {priority})")
+    return mode
+
+def search_news_languages(topic, languages, max_results=10):
+    """
+    Busca noticias sobre un tema en varios idiomas a la vez (una búsqueda por
+    idioma en paralelo, por lo que tarda lo que la más lenta) y combina los
+    resultados sin duplicados, intercalando los idiomas por fecha.
+
+    Args:
+        topic (str): Tema de búsqueda
+        languages (list): Códigos de idioma
+        max_results (int): Número máximo de resultados en total
+
+    Returns:
+        list: Lista de artículos de noticias (cada uno con su 'language')
+    """
+    try:
+        max_results = max(5, min(MAX_RESULTS_LIMIT, int(max_results)))
+    except (ValueError, TypeError):
+        max_results = 10
+
+    def search_language(language):
+        # Cada idioma puede llenar el informe por sí solo si los demás no tienen resultados
+        articles = search_news(topic, language=language, max_results=max_results)
+        for article in articles:
+            article['language'] = language
+        return articles
+
+    with ThreadPoolExecutor(max_workers=len(languages)) as executor:
+        results = list(executor.map(metrics.bind(search_language), languages))
+
+    for language, articles in zip(languages, results):
+        logger.info(f"Idioma '{language}': {len(articles)} artículos")
+    return merge_by_recency(results, max_results)
+
+def date_windows(from_date, to_date, days=7):
+    """
+    Divide un rango de fechas en ventanas consecutivas que no se solapan.
+
+    Args:
+        from_date (str): Fecha inicial (YYYY-MM-DD)
+        to_date (str): Fecha final incluida (YYYY-MM-DD)
+        days (int): Días de cada ventana (la última puede ser más corta)
+
+    Returns:
+        list: Pares (inicio, fin) en formato YYYY-MM-DD, de la más antigua a la más reciente
+
+    Raises:
+        ValueError: Si las fechas no son válidas, el rango está invertido o days < 1
+    """
+    start = datetime.date.fromisoformat(from_date)
+    end = datetime.date.fromisoformat(to_date)
+    if days < 1:
+        raise ValueError(f"La ventana debe ser de al menos un día (se indicó {days})")
+    if start > end:
+        raise ValueError(f"La fecha inicial ({from_date}) es posterior a la final ({to_date})")
+    windows = []
+    while start <= end:
+        window_end = min(end, start + datetime.timedelta(days=days - 1))
+        windows.append((start.isoformat(), window_end.isoformat()))
+        start = window_end + datetime.timedelta(days=1)
+    return windows
+
+def search_news_history(topic, from_date, to_date, max_results=100, languages=None, window_days=None,
+                        run_id=None, progress=None):
+    """
+    Busca noticias de un rango de fechas largo: lo divide en ventanas, pide
+    cada ventana e idioma en paralelo (una página por ventana, respetando el
+    limitador de llamadas) y combina los resultados a medida que llegan, sin
+    duplicados y repartidos entre todas las ventanas para que no dominen los
+    últimos días.
+
+    Cada ventana terminada se guarda en un punto de control de la ejecución, así
+    que al reanudar solo se piden las que faltan.
+
+    Args:
+        topic (str): Tema de búsqueda
+        from_date (str): Fecha inicial (YYYY-MM-DD)
+        to_date (str): Fecha final incluida (YYYY-MM-DD)
+        max_results (int): Número máximo de artículos del informe
+        languages (list): Idiomas en los que buscar (por defecto NEWS_LANGUAGES)
+        window_days (int): Días de cada ventana (por defecto BACKFILL_WINDOW_DAYS)
+        run_id (str): Ejecución con puntos de control
+        progress (callable): Función que recibe un mensaje por cada ventana terminada
+
+    Returns:
+        list: Artículos del informe, del más reciente al más antiguo
+
+    Raises:
+        RuntimeError: Si la cuota diaria de NewsAPI no alcanza para todas las ventanas
+                      (las terminadas quedan guardadas para reanudar)
+    """
+    progress = progress or (lambda message: None)
+    languages = parse_languages(languages) or NEWS_LANGUAGES
+    max_results = max(5, min(MAX_RESULTS_LIMIT, int(max_results)))
+    windows = date_windows(from_date, to_date, window_days or BACKFILL_WINDOW_DAYS)
+    tasks = [(start, end, language) for start, end in windows for language in languages]
+    # Una página por ventana con su parte de los candidatos
+    share = (max_results + len(windows) - 1) // len(windows)
+    page_size = max(10, min(NEWSAPI_PAGE_SIZE, share * RANKING_OVERFETCH))
+
+    results = {}
+    for task in tasks:
+        saved = load_checkpoint(run_id, f"window:{task[0]}:{task[2]}")
+        if saved is not None:
+            results[task] = saved
+    pending = [task for task in tasks if task not in results]
+    if results:
+        logger.info(f"Reanudando '{topic}': {len(results)}/{len(tasks)} ventanas ya descargadas")
+
+    run = metrics.current_run()
+    available = get_quota_planner().available('newsapi', (run.priority if run else None) or 'backfill', topic)
+    skipped = []
+    if available is not None and available < len(pending):
+        skipped, pending = pending[available:], pending[:available]
+
+    def fetch_window(task):
+        start, end, language = task
+        articles = list(iter_news(topic, language=language, max_articles=page_size,
+                                  from_param=start, to=end))
+        for article in articles:
+            article['language'] = language
+        return rank_articles(articles, topic, max_results)
+
+    if pending:
+        progress(f"Buscando noticias en {len(pending)} ventanas de {from_date} a {to_date}...")
+    done = len(results)
+    error = None
+    with ThreadPoolExecutor(max_workers=min(BACKFILL_WORKERS, len(pending)) or 1) as executor:
+        futures = {executor.submit(metrics.bind(fetch_window), task): task for task in pending}
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                results[task] = future.result()
+            except Exception as e:
+                logger.error(f"Error en la ventana {task[0]} - {task[1]} ({task[2]}): {str(e)}")
+                error = error or e
+                continue
+            save_checkpoint(run_id, f"window:{task[0]}:{task[2]}", results[task])
+            done += 1
+            progress(f"Ventana {done}/{len(tasks)} ({task[0]} - {task[1]}, {task[2]}): {len(results[task])} artículos")
+
+    if error:
+        raise error
+    if skipped:
+        raise RuntimeError(f"Cuota diaria de NewsAPI agotada: faltan {len(skipped)} ventanas "
+                           f"(se pueden reanudar con 'reanudar {run_id}')")
+
+    # Repartir el informe entre las ventanas (y los idiomas) sin duplicados
+    merged = merge_by_recency([results[task] for task in tasks], max_results)
+    merged.sort(key=lambda article: article.get('publishedAt') or '', reverse=True)
+    logger.info(f"Se encontraron {len(merged)} artículos sobre '{topic}' entre {from_date} y {to_date}")
+    return merged
+
+def search_rss_news(topic, feed_urls=None, max_results=10):
+    """
+    Busca noticias sobre un tema en feeds RSS/Atom en lugar de NewsAPI.
+
+    Los feeds se consultan de forma incremental (solo se procesan los artículos
+    publicados desde la última consulta de cada feed para este tema) y los nuevos
+    se guardan en el índice local. El informe se forma con los artículos del tema
+    de los últimos 7 días que hay en el índice, de modo que repetirlo o recibir un
+    304 no lo deja vacío.
+
+    Args:
+        topic (str): Tema de búsqueda
+        feed_urls (list): URLs de los feeds (por defecto, RSS_FEEDS)
+        max_results (int): Número máximo de resultados a devolver
+
+    Returns:
+        list: Lista de artículos de noticias con la misma estructura que search_news
+    """
+    feed_urls = feed_urls or RSS_FEEDS
+    if not feed_urls:
+        logger.warning("No hay feeds RSS configurados")
+        return []
+
+    try:
+        feed_fetcher = get_feed_fetcher()
+        new_articles = feed_fetcher.poll(feed_urls, topic)
+
+        # Guardar los artículos nuevos que mencionan todas las palabras del tema
+        words = topic.lower().split()
+        matching = []
+        for article in new_articles:
+            text = f"{article.get('title') or ''} {article.get('description') or ''}".lower()
+            if all(word in text for word in words):
+                matching.append(article)
+        index_articles(matching, topic)
+
+        start_date = datetime.datetime.now().date() - datetime.timedelta(days=7)
+        articles = [prepare_article(article) for article in
+                    search_local_index(topic, from_date=start_date.isoformat(),
+                                       limit=max_results * RANKING_OVERFETCH)]
+        articles.sort(key=lambda a: a.get('publishedAt') or '', reverse=True)
+        logger.info(f"Se encontraron {len(matching)} artículos nuevos sobre '{topic}' en {len(feed_urls)} feeds "
+                    f"({feed_fetcher.stats['bytes_saved']} bytes ahorrados por respuestas 304); "
+                    f"{len(articles)} en el índice local")
+        return articles[:max_results]
+
+    except Exception as e:
+        logger.error(f"Error al buscar noticias en feeds RSS: {str(e)}")
+        return []
+
+def index_articles(articles, topic=None):
+    """
+    Guarda los artículos en el índice local de texto completo.
+
+    Args:
+        articles (list): Lista de artículos de noticias
+        topic (str): Tema con el que se obtuvieron
+    """
+    try:
+        get_article_index().add_articles(articles, topic)
+    except Exception as e:
+        logger.warning(f"No se pudieron indexar los artículos: {str(e)}")
+
+def search_local_index(query, from_date=None, to_date=None, source=None, limit=20):
+    """
+    Busca en el histórico de artículos ya obtenidos sin llamar a NewsAPI.
+
+    Args:
+        query (str): Texto de búsqueda
+        from_date (str): Fecha mínima de publicación (YYYY-MM-DD)
+        to_date (str): Fecha máxima de publicación (YYYY-MM-DD)
+        source (str): Nombre de la fuente
+        limit (int): Número máximo de resultados
+
+    Returns:
+        list: Artículos encontrados
+    """
+    try:
+        return get_article_index().search(query, from_date=from_date, to_date=to_date, source=source, limit=limit)
+    except Exception as e:
+        logger.error(f"Error al buscar en el índice local: {str(e)}")
         return []
 
 def generate_ai_summary(text, max_length=250):
@@ -191,7 +746,8 @@ def generate_ai_summary(text, max_length=250):
         return None
 
     try:
-        response = openai.Completion.create(
+        response = call_api(
+            'openai', openai.Completion.create,
             engine="text-davinci-003",  # Motor de OpenAI
             prompt=f"Resume el siguiente texto en español en aproximadamente {max_length} caracteres:\n\n{text}",
             max_tokens=150,  # Ajustar según necesidades
@@ -204,6 +760,90 @@ def generate_ai_summary(text, max_length=250):
         logger.warning(f"Error al generar resumen con IA: {str(e)}")
         return None
 
+def estimate_tokens(text):
+    """Estimación aproximada de tokens (unos 4 caracteres por token)."""
+    return len(text or '') // 4 + 1
+
+def build_summary_batches(articles, max_length=250, prompt_budget=None):
+    """
+    Agrupa artículos en lotes cuyo prompt y respuesta caben en una sola llamada al modelo.
+
+    Args:
+        articles (list): Artículos con 'article_id' y 'description'
+        max_length (int): Longitud aproximada de cada resumen (caracteres)
+        prompt_budget (int): Tokens máximos de texto de artículos por lote
+
+    Returns:
+        list: Lista de lotes (listas de artículos)
+    """
+    prompt_budget = prompt_budget or AI_BATCH_PROMPT_TOKENS
+    # Tokens de respuesta por artículo: el resumen más la clave y la sintaxis JSON
+    answer_tokens = estimate_tokens('x' * max_length) + 20
+
+    batches, current, prompt_tokens = [], [], 0
+    for article in articles:
+        tokens = estimate_tokens(article['description']) + 15
+        answer_total = answer_tokens * (len(current) + 1)
+        if current and (prompt_tokens + tokens > prompt_budget
+                        or prompt_tokens + tokens + answer_total > AI_MODEL_MAX_TOKENS):
+            batches.append(current)
+            current, prompt_tokens = [], 0
+        current.append(article)
+        prompt_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def generate_ai_summaries_batch(articles, max_length=250):
+    """
+    Genera los resúmenes de varios artículos en una única llamada a OpenAI.
+
+    Args:
+        articles (list): Artículos con 'article_id' y 'description'
+        max_length (int): Longitud máxima aproximada de cada resumen
+
+    Returns:
+        dict: article_id -> resumen (solo los que se pudieron interpretar)
+    """
+    if not OPENAI_API_KEY or not articles:
+        return {}
+
+    sections = '\n\n'.join(f"### {article['article_id']}\n{article['description']}" for article in articles)
+    prompt = (
+        f"Resume en español cada uno de los siguientes textos en aproximadamente {max_length} caracteres.\n"
+        f"Responde únicamente con un objeto JSON cuyas claves sean los identificadores que siguen a '###' "
+        f"y cuyos valores sean los resúmenes.\n\n{sections}\n\nJSON:"
+    )
+    max_tokens = (estimate_tokens('x' * max_length) + 20) * len(articles)
+
+    try:
+        response = call_api(
+            'openai', openai.Completion.create,
+            engine="text-davinci-003",
+            prompt=prompt,
+            max_tokens=min(max_tokens, AI_MODEL_MAX_TOKENS - estimate_tokens(prompt)),
+            temperature=0.3,
+            top_p=1.0
+        )
+        text = response.choices[0].text
+    except Exception as e:
+        logger.warning(f"Error al generar resúmenes por lotes con IA: {str(e)}")
+        return {}
+
+    # Extraer el objeto JSON aunque el modelo añada texto alrededor
+    try:
+        parsed = json.loads(text[text.index('{'):text.rindex('}') + 1])
+    except ValueError:
+        logger.warning("La respuesta del lote de resúmenes no es un JSON válido")
+        return {}
+
+    expected = {article['article_id'] for article in articles}
+    return {
+        article_id: summary.strip()
+        for article_id, summary in parsed.items()
+        if article_id in expected and isinstance(summary, str) and summary.strip()
+    }
+
 def get_article_details(url):
     """
     Obtiene detalles adicionales de un artículo mediante web scraping básico.
@@ -218,7 +858,8 @@ def get_article_details(url):
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        response = requests.get(url, headers=headers, timeout=5)
+        response = call_api('scraping', requests.get, url, headers=headers, timeout=5)
+        metrics.add_payload_bytes('scraping', len(response.content), direction='in')
 
         # Si la solicitud fue exitosa
         if response.status_code == 200:
@@ -245,6 +886,12 @@ def get_article_details(url):
                 # Extraer texto sin etiquetas HTML
                 details['full_content'] = main_content.get_text(separator='\n', strip=True)
 
+                # Guardar el contenido completo en el índice local
+                try:
+                    details['indexed'] = get_article_index().update_full_content(url, details['full_content']) > 0
+                except Exception as e:
+                    logger.warning(f"No se pudo indexar el contenido de {url}: {str(e)}")
+
             return details
         else:
             return {'status': 'error', 'message': f'Error HTTP {response.status_code}'}
@@ -253,18 +900,134 @@ def get_article_details(url):
         logger.error(f"Error al obtener detalles del artículo {url}: {str(e)}")
         return {'status': 'error', 'message': str(e)}
 
-def convert_articles_to_notion_blocks(articles, include_images=True, include_ai_summary=True):
+def enrich_articles(articles, max_workers=5, keep_content=True):
     """
-    Convierte los artículos de noticias directamente a bloques de Notion.
+    Añade a cada artículo el contenido completo y la imagen principal de su página.
+
+    Args:
+        articles (list): Lista de artículos de noticias
+        max_workers (int): Número de descargas simultáneas
+        keep_content (bool): Si es False, el contenido que ya quedó guardado en el índice
+                             local no se conserva en el artículo (se marca con
+                             'full_content_indexed' y se lee al generar sus bloques)
+
+    Returns:
+        list: Los mismos artículos, enriquecidos
+    """
+    urls = [article.get('url') for article in articles]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        fetch = metrics.bind(lambda url: get_article_details(url) if url else {})
+        # Los resultados se procesan según llegan para no retener todos los textos a la vez
+        for article, details in zip(articles, executor.map(fetch, urls)):
+            if details.get('status') != 'success':
+                continue
+            if details.get('full_content'):
+                if keep_content or not details.get('indexed'):
+                    article['full_content'] = details['full_content']
+                else:
+                    article['full_content_indexed'] = True
+            if details.get('main_image') and not article.get('image_url'):
+                article['image_url'] = details['main_image']
+
+    return articles
+
+def preflight_article_images(articles):
+    """
+    Comprueba en paralelo las imágenes de los artículos y quita las que no son válidas
+    (caídas, que no son imágenes o demasiado grandes) para que Notion no las rechace.
+
+    Args:
+        articles (list): Lista de artículos de noticias
+
+    Returns:
+        list: Los mismos artículos, sin las imágenes no válidas
+    """
+    global image_preflight
+
+    urls = [article.get('image_url', article.get('urlToImage')) for article in articles]
+    if not any(urls):
+        return articles
+
+    try:
+        if image_preflight is None:
+            image_preflight = ImagePreflight(ttl_seconds=IMAGE_CACHE_TTL, deadline=IMAGE_PREFLIGHT_DEADLINE)
+        valid = image_preflight.check_urls(urls)
+    except Exception as e:
+        logger.warning(f"No se pudieron comprobar las imágenes: {str(e)}")
+        return articles
+
+    dropped = 0
+    for article, url in zip(articles, urls):
+        if url and not valid.get(url, False):
+            article['image_url'] = None
+            dropped += 1
+
+    if dropped:
+        logger.info(f"Se descartaron {dropped} imágenes no válidas")
+    return articles
+
+def summarize_articles(articles, batch=None):
+    """
+    Genera el resumen con IA de cada artículo y lo guarda en 'ai_summary'.
+
+    En modo por lotes se agrupan varios artículos por llamada; los que no se
+    pueden interpretar en la respuesta se resumen después uno a uno.
+
+    Args:
+        articles (list): Lista de artículos de noticias
+        batch (bool): Usar el modo por lotes (por defecto, AI_SUMMARY_BATCH)
+
+    Returns:
+        list: Los mismos artículos, con su resumen
+    """
+    if not OPENAI_API_KEY:
+        return articles
+
+    pending = [article for article in articles if article.get('description') and not article.get('ai_summary')]
+    batch = AI_SUMMARY_BATCH if batch is None else batch
+
+    if batch and len(pending) > 1:
+        batches = build_summary_batches(pending)
+        with ThreadPoolExecutor(max_workers=max(1, AI_BATCH_WORKERS)) as executor:
+            for summaries in executor.map(metrics.bind(generate_ai_summaries_batch), batches):
+                for article in pending:
+                    if article['article_id'] in summaries:
+                        article['ai_summary'] = summaries[article['article_id']]
+
+        failed = [article for article in pending if not article.get('ai_summary')]
+        if failed and not get_breaker('openai').is_available():
+            logger.warning(f"OpenAI no disponible: {len(failed)} artículos quedan sin resumen")
+            return articles
+        if failed:
+            logger.info(f"Resumiendo individualmente {len(failed)} artículos que no se obtuvieron en lote")
+        logger.info(f"Resúmenes por lotes: {len(pending)} artículos en {len(batches)} llamadas")
+        pending = failed
+
+    for article in pending:
+        article['ai_summary'] = generate_ai_summary(article['description'])
+
+    return articles
+
+def iter_article_blocks(articles, include_images=True, include_ai_summary=True, include_full_content=False, start=0):
+    """
+    Genera los bloques de Notion del informe artículo a artículo, sin construir
+    la lista completa en memoria.
 
     Args:
         articles (list): Lista de artículos de noticias
         include_images (bool): Si se deben incluir imágenes en los bloques
         include_ai_summary (bool): Si se debe incluir un resumen generado por IA
+        include_full_content (bool): Si se debe incluir el contenido completo de cada artículo
+        start (int): Grupos ya enviados en un intento anterior (la cabecera cuenta como uno)
 
-    Returns:
-        list: Lista de bloques de Notion
+    Yields:
+        tuple: (artículo o None para los bloques de cabecera, lista de bloques)
     """
+    if start:
+        for i, article in enumerate(articles[start - 1:], start):
+            yield article, article_to_notion_blocks(article, i, include_images, include_ai_summary, include_full_content)
+        return
+
     # Bloques iniciales (título y fecha)
     blocks = [
         {
@@ -318,7 +1081,8 @@ def convert_articles_to_notion_blocks(articles, include_images=True, include_ai_
                 ]
             }
         })
-        return blocks
+        yield None, blocks
+        return
 
     # Agregar una introducción
     blocks.append({
@@ -335,195 +1099,385 @@ def convert_articles_to_notion_blocks(articles, include_images=True, include_ai_
             ]
         }
     })
+    yield None, blocks
 
     # Agregar cada artículo como un conjunto de bloques
     for i, article in enumerate(articles, 1):
-        title = article.get('title', 'Sin título')
-        description = article.get('description', 'Sin descripción disponible.')
-        url = article.get('url', '#')
-        source = article.get('source', {}).get('name', 'Fuente desconocida')
-        published_at = article.get('formatted_date', article.get('publishedAt', 'Fecha desconocida'))
-        image_url = article.get('image_url', article.get('urlToImage', None))
-
-        # Agregar título del artículo
-        blocks.append({
-            "object": "block",
-            "type": "heading_3",
-            "heading_3": {
-                "rich_text": [
-                    {
-                        "type": "text",
-                        "text": {
-                            "content": f"{i}. {title}"
-                        }
+        yield article, article_to_notion_blocks(article, i, include_images, include_ai_summary, include_full_content)
+
+def article_to_notion_blocks(article, position, include_images=True, include_ai_summary=True, include_full_content=False):
+    """
+    Convierte un artículo en sus bloques de Notion.
+
+    Args:
+        article (dict): Artículo de noticias
+        position (int): Número del artículo en el informe
+        include_images (bool): Si se debe incluir la imagen
+        include_ai_summary (bool): Si se debe incluir el resumen generado por IA
+        include_full_content (bool): Si se debe incluir el contenido completo
+
+    Returns:
+        list: Bloques del artículo
+    """
+    title = article.get('title', 'Sin título')
+    description = article.get('description', 'Sin descripción disponible.')
+    url = article.get('url', '#')
+    source = article.get('source', {}).get('name', 'Fuente desconocida')
+    published_at = article.get('formatted_date', article.get('publishedAt', 'Fecha desconocida'))
+    image_url = article.get('image_url', article.get('urlToImage', None))
+    blocks = []
+
+    # Agregar título del artículo
+    blocks.append({
+        "object": "block",
+        "type": "heading_3",
+        "heading_3": {
+            "rich_text": [
+                {
+                    "type": "text",
+                    "text": {
+                        "content": f"{position}. {title}"
                     }
-                ]
-            }
-        })
+                }
+            ]
+        }
+    })
 
-        # Agregar metadatos (fuente y fecha)
+    # Agregar metadatos (fuente y fecha)
+    blocks.append({
+        "object": "block",
+        "type": "paragraph",
+        "paragraph": {
+            "rich_text": [
+                {
+                    "type": "text",
+                    "text": {
+                        "content": f"Fuente: {source} | Publicado: {published_at}"
+                    },
+                    "annotations": {
+                        "bold": True,
+                        "italic": True
+                    }
+                }
+            ]
+        }
+    })
+
+    # Agregar imagen si está disponible y se solicita
+    if include_images and image_url:
         blocks.append({
             "object": "block",
-            "type": "paragraph",
-            "paragraph": {
-                "rich_text": [
-                    {
-                        "type": "text",
-                        "text": {
-                            "content": f"Fuente: {source} | Publicado: {published_at}"
-                        },
-                        "annotations": {
-                            "bold": True,
-                            "italic": True
-                        }
-                    }
-                ]
+            "type": "image",
+            "image": {
+                "type": "external",
+                "external": {
+                    "url": image_url
+                }
             }
         })
 
-        # Agregar imagen si está disponible y se solicita
-        if include_images and image_url:
+    # Agregar descripción
+    blocks.append({
+        "object": "block",
+        "type": "paragraph",
+        "paragraph": {
+            "rich_text": [
+                {
+                    "type": "text",
+                    "text": {
+                        "content": description if description else "Sin descripción disponible."
+                    }
+                }
+            ]
+        }
+    })
+
+    # Agregar resumen de IA si está disponible y se solicita
+    if include_ai_summary and OPENAI_API_KEY and description:
+        # Usar el resumen ya generado por summarize_articles si existe
+        ai_summary = article['ai_summary'] if 'ai_summary' in article else generate_ai_summary(description)
+        if ai_summary:
             blocks.append({
                 "object": "block",
-                "type": "image",
-                "image": {
-                    "type": "external",
-                    "external": {
-                        "url": image_url
-                    }
+                "type": "paragraph",
+                "paragraph": {
+                    "rich_text": [
+                        {
+                            "type": "text",
+                            "text": {
+                                "content": "Resumen IA: "
+                            },
+                            "annotations": {
+                                "bold": True,
+                                "color": "blue"
+                            }
+                        },
+                        {
+                            "type": "text",
+                            "text": {
+                                "content": ai_summary
+                            }
+                        }
+                    ]
                 }
             })
 
-        # Agregar descripción
-        blocks.append({
-            "object": "block",
-            "type": "paragraph",
-            "paragraph": {
-                "rich_text": [
-                    {
-                        "type": "text",
-                        "text": {
-                            "content": description if description else "Sin descripción disponible."
+    # Agregar el contenido completo (descargado con include_full_content)
+    if include_full_content:
+        full_content = article.get('full_content')
+        if full_content is None and article.get('full_content_indexed'):
+            full_content = get_article_index().get_full_content(article['article_id'])
+        if full_content:
+            blocks.append(full_content_block(full_content))
+
+    # Agregar enlace al artículo completo
+    blocks.append({
+        "object": "block",
+        "type": "paragraph",
+        "paragraph": {
+            "rich_text": [
+                {
+                    "type": "text",
+                    "text": {
+                        "content": "Leer artículo completo",
+                        "link": {
+                            "url": url
                         }
+                    },
+                    "annotations": {
+                        "bold": True,
+                        "underline": True
                     }
-                ]
-            }
-        })
+                }
+            ]
+        }
+    })
 
-        # Agregar resumen de IA si está disponible y se solicita
-        if include_ai_summary and OPENAI_API_KEY and description:
-            ai_summary = generate_ai_summary(description)
-            if ai_summary:
-                blocks.append({
+    # Agregar separador entre artículos
+    blocks.append({
+        "object": "block",
+        "type": "divider",
+        "divider": {}
+    })
+
+    return blocks
+
+def full_content_block(text):
+    """
+    Crea un bloque desplegable con el contenido completo de un artículo, en párrafos
+    de como máximo NOTION_MAX_TEXT caracteres (límite de Notion por texto).
+
+    Args:
+        text (str): Contenido completo
+
+    Returns:
+        dict: Bloque 'toggle' con los párrafos como hijos
+    """
+    chunks = []
+    current = ''
+    for paragraph in text.split('\n'):
+        while len(paragraph) > NOTION_MAX_TEXT:
+            chunks.append(paragraph[:NOTION_MAX_TEXT])
+            paragraph = paragraph[NOTION_MAX_TEXT:]
+        if current and len(current) + len(paragraph) + 1 > NOTION_MAX_TEXT:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+
+    if len(chunks) > NOTION_MAX_CHILDREN:
+        chunks = chunks[:NOTION_MAX_CHILDREN - 1] + ["[Contenido recortado]"]
+
+    return {
+        "object": "block",
+        "type": "toggle",
+        "toggle": {
+            "rich_text": [
+                {
+                    "type": "text",
+                    "text": {
+                        "content": "Contenido completo"
+                    }
+                }
+            ],
+            "children": [
+                {
                     "object": "block",
                     "type": "paragraph",
                     "paragraph": {
-                        "rich_text": [
-                            {
-                                "type": "text",
-                                "text": {
-                                    "content": "Resumen IA: "
-                                },
-                                "annotations": {
-                                    "bold": True,
-                                    "color": "blue"
-                                }
-                            },
-                            {
-                                "type": "text",
-                                "text": {
-                                    "content": ai_summary
-                                }
-                            }
-                        ]
+                        "rich_text": [{"type": "text", "text": {"content": chunk}}]
                     }
-                })
+                }
+                for chunk in chunks
+            ]
+        }
+    }
 
-        # Agregar enlace al artículo completo
-        blocks.append({
-            "object": "block",
-            "type": "paragraph",
-            "paragraph": {
-                "rich_text": [
-                    {
-                        "type": "text",
-                        "text": {
-                            "content": "Leer artículo completo",
-                            "link": {
-                                "url": url
-                            }
-                        },
-                        "annotations": {
-                            "bold": True,
-                            "underline": True
-                        }
-                    }
-                ]
-            }
-        })
+def convert_articles_to_notion_blocks(articles, include_images=True, include_ai_summary=True, include_full_content=False):
+    """
+    Convierte los artículos de noticias directamente a bloques de Notion.
 
-        # Agregar separador entre artículos
-        blocks.append({
-            "object": "block",
-            "type": "divider",
-            "divider": {}
-        })
+    Args:
+        articles (list): Lista de artículos de noticias
+        include_images (bool): Si se deben incluir imágenes en los bloques
+        include_ai_summary (bool): Si se debe incluir un resumen generado por IA
+        include_full_content (bool): Si se debe incluir el contenido completo de cada artículo
 
-    return blocks
+    Returns:
+        list: Lista de bloques de Notion
+    """
+    return [
+        block
+        for _, blocks in iter_article_blocks(articles, include_images, include_ai_summary, include_full_content)
+        for block in blocks
+    ]
+
+def iter_block_batches(block_groups, max_blocks=NOTION_MAX_CHILDREN, max_bytes=None):
+    """
+    Agrupa los bloques en lotes para Notion: como máximo max_blocks bloques y,
+    salvo que un solo artículo lo supere, max_bytes bytes de JSON por lote.
+    Los lotes terminan siempre al final de un grupo.
+
+    Args:
+        block_groups (iterable): Pares (artículo, bloques) de iter_article_blocks
+        max_blocks (int): Bloques por lote
+        max_bytes (int): Presupuesto de memoria por lote (por defecto, NOTION_BATCH_MAX_BYTES)
 
-def create_notion_page(topic, articles, include_images=True, include_ai_summary=False):
+    Yields:
+        tuple: (bloques del lote, número de grupos del lote, artículos del lote)
+    """
+    max_bytes = max_bytes or NOTION_BATCH_MAX_BYTES
+    batch, batch_articles, batch_groups, batch_bytes = [], [], 0, 0
+    for article, blocks in block_groups:
+        size = len(json.dumps(blocks))
+        if batch and (len(batch) + len(blocks) > max_blocks or batch_bytes + size > max_bytes):
+            yield batch, batch_groups, batch_articles
+            batch, batch_articles, batch_groups, batch_bytes = [], [], 0, 0
+        batch.extend(blocks)
+        batch_bytes += size
+        batch_groups += 1
+        if article is not None:
+            batch_articles.append(article)
+    if batch_groups:
+        yield batch, batch_groups, batch_articles
+
+def release_article_bodies(articles):
+    """Libera el texto completo de los artículos cuyos bloques ya se enviaron a Notion."""
+    for article in articles:
+        article.pop('full_content', None)
+        article.pop('content', None)
+
+def create_notion_page(topic, articles, include_images=True, include_ai_summary=False, run_id=None,
+                       include_full_content=False, cancel_event=None):
     """
     Crea una nueva página en Notion con el informe de noticias.
 
+    Los bloques se generan artículo a artículo y se envían por lotes (la página se
+    crea con el primero); el texto completo de cada artículo se libera en cuanto
+    sus bloques se han enviado, así que la memoria no crece con el tamaño del informe.
+
     Args:
         topic (str): Tema de búsqueda
         articles (list): Lista de artículos de noticias
         include_images (bool): Si se deben incluir imágenes en el informe
         include_ai_summary (bool): Si se debe incluir resumen generado por IA
+        run_id (str): Ejecución con puntos de control; si la página ya se creó en un
+                      intento anterior, solo se añaden los artículos que faltan
+        include_full_content (bool): Si se debe incluir el contenido completo de cada artículo
+        cancel_event (threading.Event): Si se activa, no se hacen más escrituras en Notion
 
     Returns:
         str: URL de la página creada
+
+    Raises:
+        ReportCancelledError: Si se activó cancel_event
     """
     try:
         # Crear una nueva página en la base de datos de Notion
         today = datetime.datetime.now().strftime('%d-%m-%Y')
 
-        # Convertir los artículos directamente a bloques de Notion
-        blocks = convert_articles_to_notion_blocks(
+        # Página creada en un intento anterior: ID y grupos de bloques (cabecera y artículos) ya añadidos
+        page = load_checkpoint(run_id, 'notion_page')
+        if page is None:
+            # Descartar imágenes caídas antes de enviarlas a Notion
+            if include_images and IMAGE_PREFLIGHT and articles:
+                with metrics.stage('image_preflight'):
+                    preflight_article_images(articles)
+        else:
+            logger.info(f"Reanudando la página {page['page_id']} ({page['groups_sent']}/{len(articles) + 1} grupos de bloques)")
+
+        block_groups = iter_article_blocks(
             articles,
             include_images=include_images,
-            include_ai_summary=include_ai_summary
-        )
-
-        # Propiedades básicas de la página
-        new_page = notion.pages.create(
-            parent={"database_id": NOTION_DATABASE_ID},
-            properties={
-                "title": {
-                    "title": [
-                        {
-                            "text": {
-                                "content": f"Informe de Noticias: {topic} - {today}"
-                            }
-                        }
-                    ]
-                },
-                # Se pueden añadir más propiedades aquí según la estructura de la base de datos
-            },
-            children=blocks
+            include_ai_summary=include_ai_summary,
+            include_full_content=include_full_content,
+            start=page['groups_sent'] if page else 0
         )
-
-        page_id = new_page['id']
+        batches = iter_block_batches(block_groups)
+
+        while True:
+            # Convertir los artículos a bloques de Notion (solo los de un lote cada vez)
+            with metrics.stage('block_build'):
+                batch = next(batches, None)
+            if batch is None:
+                break
+            blocks, groups, sent_articles = batch
+            # Otro worker puede haber recibido el trabajo: no escribir en una página que ya no es nuestra
+            if cancel_event is not None and cancel_event.is_set():
+                raise ReportCancelledError(f"Informe '{topic}' cancelado antes de escribir en Notion")
+            metrics.add_payload_bytes('notion', len(json.dumps(blocks)))
+
+            with metrics.stage('notion_write'):
+                if page is None:
+                    # Propiedades básicas de la página
+                    new_page = call_api(
+                        'notion', notion.pages.create,
+                        parent={"database_id": NOTION_DATABASE_ID},
+                        properties={
+                            "title": {
+                                "title": [
+                                    {
+                                        "text": {
+                                            "content": f"Informe de Noticias: {topic} - {today}"
+                                        }
+                                    }
+                                ]
+                            },
+                            # Se pueden añadir más propiedades aquí según la estructura de la base de datos
+                        },
+                        children=blocks
+                    )
+                    page = {'page_id': new_page['id'], 'groups_sent': 0}
+                    remember_notion_page(new_page)
+                else:
+                    call_api(
+                        'notion', notion.blocks.children.append,
+                        block_id=page['page_id'],
+                        children=blocks
+                    )
+            page['groups_sent'] += groups
+            save_checkpoint(run_id, 'notion_page', page)
+            release_article_bodies(sent_articles)
+            # Las peticiones del cliente de Notion quedan en ciclos de referencias: sin recogerlos,
+            # los cuerpos de los lotes ya enviados se acumulan hasta la siguiente recolección
+            gc.collect(1)
+
+        page_id = page['page_id']
         page_url = f"https://notion.so/{page_id.replace('-', '')}"
 
         logger.info(f"Página creada en Notion: {page_url}")
         return page_url
 
+    except (CircuitOpenError, ReportCancelledError):
+        # El llamador decide si aplazar el informe
+        raise
     except Exception as e:
         logger.error(f"Error al crear página en Notion: {str(e)}")
         return None
 
-def send_notification(page_url, topic, method='console'):
+def send_notification(page_url, topic, method='console', alert=None):
     """
     Envía una notificación sobre el informe generado.
 
@@ -531,15 +1485,23 @@ def send_notification(page_url, topic, method='console'):
         page_url (str): URL de la página creada
         topic (str): Tema del informe
         method (str): Método de notificación ('console', 'email', 'slack')
+        alert (str): Si se indica, se envía como alerta con este texto en lugar
+                     del aviso de informe nuevo (modo vigilancia)
 
     Returns:
         bool: True si la notificación se envió correctamente
     """
     message = f"Nuevo informe de noticias sobre '{topic}' disponible en {page_url}"
+    title = "Nuevo Informe de Noticias"
+    summary = f"Se ha generado un nuevo informe sobre el tema: <strong>{topic}</strong>"
+    if alert:
+        message = f"{alert}\n{page_url}"
+        title = f"Alerta de Noticias: {topic}"
+        summary = alert.replace('\n', '<br>')
 
     if method == 'console':
         # Notificación básica por consola
-        print(f"\n📰 ¡INFORME GENERADO! 📰\n{message}\n")
+        print(f"\n📰 {'¡ALERTA!' if alert else '¡INFORME GENERADO!'} 📰\n{message}\n")
         return True
 
     elif method == 'email':
@@ -565,8 +1527,8 @@ def send_notification(page_url, topic, method='console'):
             msg = MIMEText(f"""
             <html>
             <body>
-                <h2>Nuevo Informe de Noticias</h2>
-                <p>Se ha generado un nuevo informe sobre el tema: <strong>{topic}</strong></p>
+                <h2>{title}</h2>
+                <p>{summary}</p>
                 <p><a href="{page_url}" style="background-color:#4CAF50;color:white;padding:10px 15px;text-decoration:none;border-radius:4px;">
                     Ver Informe en Notion
                 </a></p>
@@ -574,7 +1536,7 @@ def send_notification(page_url, topic, method='console'):
             </html>
             """, 'html')
 
-            msg['Subject'] = f"Nuevo Informe de Noticias: {topic}"
+            msg['Subject'] = title if alert else f"{title}: {topic}"
             msg['From'] = smtp_user
             msg['To'] = recipient
 
@@ -602,13 +1564,13 @@ def send_notification(page_url, topic, method='console'):
 
             # Preparar payload para Slack
             payload = {
-                "text": "📰 *Nuevo Informe de Noticias* 📰",
+                "text": f"📰 *{title}* 📰",
                 "blocks": [
                     {
                         "type": "section",
                         "text": {
                             "type": "mrkdwn",
-                            "text": f"*Nuevo informe sobre:* {topic}"
+                            "text": alert or f"*Nuevo informe sobre:* {topic}"
                         }
                     },
                     {
@@ -656,19 +1618,41 @@ def send_notification(page_url, topic, method='console'):
         logger.warning(f"Método de notificación '{method}' no implementado")
         return False
 
-def generate_news_report(topic, max_results=10, include_images=True, include_ai_summary=False, notification_method='console'):
+def generate_news_report(topic, max_results=10, include_images=True, include_ai_summary=False, notification_method='console',
+                         rss_feeds=None, include_full_content=False, force_refresh=False, run_id=None, progress=None,
+                         profile=False, languages=None, priority=DEFAULT_PRIORITY, date_range=None, window_days=None,
+                         cancel_event=None, max_attempts=None):
     """
     Función principal que genera un informe completo de noticias y lo publica en Notion.
 
+    Cada etapa guarda su resultado en un punto de control; si una etapa falla, el
+    informe se reintenta (REPORT_MAX_ATTEMPTS) continuando desde la última etapa
+    terminada, y se puede reanudar más tarde con resume_news_report.
+
     Args:
         topic (str): Tema de búsqueda
         max_results (int): Número máximo de resultados a incluir
         include_images (bool): Si se deben incluir imágenes en el informe
         include_ai_summary (bool): Si se debe incluir resumen generado por IA
-        notification_method (str): Método para enviar notificaciones
+        notification_method (str): Método para enviar notificaciones (None para no enviarlas)
+        rss_feeds (list): Si se indica, buscar en estos feeds RSS en lugar de NewsAPI
+        include_full_content (bool): Si se debe descargar el contenido completo de cada artículo
+        force_refresh (bool): Generar un informe nuevo aunque ya exista uno igual de hoy
+        run_id (str): Ejecución anterior que se quiere reanudar
+        progress (callable): Función que recibe un mensaje de progreso por etapa
+        profile (bool): Guardar un perfil de CPU y memoria por etapa (resumen en result['profile'])
+        languages (list): Idiomas en los que buscar a la vez (por defecto NEWS_LANGUAGES)
+        priority (str): Clase de prioridad ('interactive', 'scheduled', 'backfill') con la que
+                        el informe usa el presupuesto de llamadas de cada API
+        date_range (list): Fechas inicial y final (YYYY-MM-DD) de un informe histórico
+                           (ver search_news_history); por defecto, los últimos 7 días
+        window_days (int): Días de cada ventana del informe histórico
+        cancel_event (threading.Event): Si se activa, el informe se detiene antes de la siguiente
+                                        escritura en Notion (result['cancelled'])
+        max_attempts (int): Intentos del informe (por defecto REPORT_MAX_ATTEMPTS)
 
     Returns:
-        dict: Diccionario con información del resultado
+        dict: Diccionario con información del resultado (incluye 'run_id', 'timings' por etapa y 'counters')
     """
     result = {
         'success': False,
@@ -677,48 +1661,468 @@ def generate_news_report(topic, max_results=10, include_images=True, include_ai_
         'articles_count': 0
     }
 
-    try:
+    languages = parse_languages(languages)
+    if date_range:
+        # Un rango no válido no se arregla reintentando
+        try:
+            date_windows(date_range[0], date_range[1], window_days or BACKFILL_WINDOW_DAYS)
+        except (ValueError, TypeError, IndexError) as e:
+            result['message'] = f"Error: rango de fechas no válido: {str(e)}"
+            return result
+    options = report_options(include_images, include_ai_summary, include_full_content, rss_feeds, languages, date_range)
+
+    # Las métricas de esta ejecución se devuelven en result['timings'] y result['counters']
+    with metrics.track_run() as run, profile_run(run, topic, enabled=profile) as profiler:
+        run.priority = priority
         logger.info(f"Generando informe de noticias sobre: {topic}")
 
-        # Paso 1: Buscar noticias
-        articles = search_news(topic, max_results=max_results)
-        result['articles_count'] = len(articles)
+        # Si ya se publicó hoy un informe idéntico, devolverlo sin repetir el trabajo
+        cached = None if force_refresh else find_cached_report(topic, max_results, options)
+        if cached:
+            logger.info(f"Informe ya generado hoy para '{topic}': {cached['page_url']}")
+            finish_checkpoint_run(run_id, 'completed')
+            result.update({
+                'success': True,
+                'cached': True,
+                'page_url': cached['page_url'],
+                'articles_count': cached['articles_count'],
+                'message': f"Informe ya generado hoy con {cached['articles_count']} artículos"
+            })
+            metrics.REPORTS.inc('cached')
+            result.update(run.as_dict())
+            return result
 
-        if not articles:
-            logger.warning(f"No se encontraron noticias sobre '{topic}'")
-            result['message'] = f"No se encontraron noticias sobre '{topic}'"
-            # Continuamos de todos modos para crear un informe "vacío"
+        if not run_id:
+            run_id = start_checkpoint_run(topic, {
+                'max_results': max_results,
+                'include_images': include_images,
+                'include_ai_summary': include_ai_summary,
+                'notification_method': notification_method,
+                'rss_feeds': rss_feeds,
+                'include_full_content': include_full_content,
+                'languages': languages,
+                'date_range': date_range,
+                'window_days': window_days,
+                # Al reanudar, el informe conserva su clase de prioridad (un relleno sigue siendo 'backfill')
+                'priority': priority
+            })
+        result['run_id'] = run_id
+
+        max_attempts = max_attempts or REPORT_MAX_ATTEMPTS
+        for attempt in range(1, max_attempts + 1):
+            degraded = []
+            try:
+                finish_checkpoint_run(run_id, 'running')
+                page_url, articles = run_report_stages(
+                    topic, max_results, include_images, include_ai_summary, rss_feeds,
+                    include_full_content, run_id, progress or (lambda message: None), degraded, languages,
+                    date_range, window_days, cancel_event
+                )
+                articles_count = len(articles)
+                result['articles_count'] = articles_count
+                result['page_url'] = page_url
+                remember_report(topic, max_results, options, page_url, articles_count)
+
+                # Paso 3: Enviar notificación
+                if notification_method:
+                    with metrics.stage('notification'):
+                        send_notification(page_url, topic, method=notification_method)
+
+                logger.info(f"Informe completo generado con éxito para el tema: {topic}")
+                result['success'] = True
+                if articles_count:
+                    result['message'] = f"Informe generado exitosamente con {articles_count} artículos"
+                else:
+                    result['message'] = f"No se encontraron noticias sobre '{topic}'"
+                if degraded:
+                    result['degraded'] = degraded
+                    result['message'] += f" (modo degradado: {', '.join(degraded)})"
+                finish_checkpoint_run(run_id, 'completed')
+                archive_report(run_id, topic, articles, page_url, options, run.as_dict())
+                break
+
+            except CircuitOpenError as e:
+                # Sin Notion no se reintenta ahora: el informe queda aplazado con sus puntos de control
+                logger.warning(f"Informe '{topic}' aplazado: {str(e)}")
+                result['deferred'] = True
+                result['retry_in'] = e.retry_in
+                result['message'] = f"{str(e)}. El informe se publicará cuando el servicio se recupere"
+                finish_checkpoint_run(run_id, 'deferred', str(e))
+                break
+
+            except ReportCancelledError as e:
+                # Quien continúe el informe sigue usando sus puntos de control: no se cambia su estado
+                logger.warning(str(e))
+                result['cancelled'] = True
+                result['message'] = str(e)
+                break
+
+            except Exception as e:
+                logger.error(f"Error al generar informe de noticias (intento {attempt}/{max_attempts}): {str(e)}")
+                result['message'] = f"Error: {str(e)}"
+                finish_checkpoint_run(run_id, 'failed', str(e))
+                if attempt < max_attempts:
+                    metrics.count_retry('report')
+                    time.sleep(REPORT_RETRY_DELAY * attempt)
+
+    metrics.REPORTS.inc('success' if result['success'] else 'deferred' if result.get('deferred')
+                        else 'cancelled' if result.get('cancelled') else 'error')
+    result.update(run.as_dict())
+    if profiler and profiler.report:
+        result['profile'] = profiler.report
+    logger.info(f"Tiempos por etapa (s): {result['timings']}")
+    return result
+
+def run_report_stages(topic, max_results, include_images, include_ai_summary, rss_feeds,
+                      include_full_content, run_id, progress, degraded=None, languages=None, date_range=None,
+                      window_days=None, cancel_event=None):
+    """
+    Ejecuta las etapas de un informe saltando las que ya tienen punto de control.
 
-        # Paso 2: Crear página en Notion directamente con los artículos
-        page_url = create_notion_page(
-            topic,
-            articles,
-            include_images=include_images,
-            include_ai_summary=include_ai_summary
-        )
+    Etapas: 'articles' (búsqueda, con una etapa 'window:...' por ventana en los
+    informes históricos), 'enrichment' (contenido completo), 'summaries'
+    (resúmenes con IA) y, dentro de create_notion_page, 'notion_page' (página y
+    artículos ya enviados).
 
-        if not page_url:
-            logger.error("No se pudo crear la página en Notion")
-            result['message'] = "Error al crear la página en Notion"
-            return result
+    Si el circuito de un servicio está abierto el informe se degrada: la búsqueda
+    usa los feeds RSS configurados o el índice local en lugar de NewsAPI y se
+    omiten los resúmenes con IA. Cada degradación se añade a la lista degraded.
+
+    Returns:
+        tuple: (URL de la página de Notion, artículos del informe)
+
+    Raises:
+        CircuitOpenError: Si Notion no está disponible (el informe queda pendiente)
+        ReportCancelledError: Si se activó cancel_event
+        RuntimeError: Si no se pudo crear o completar la página en Notion
+    """
+    degraded = [] if degraded is None else degraded
+
+    # Paso 1: Buscar noticias
+    articles = load_checkpoint(run_id, 'enrichment')
+    enriched = articles is not None
+    if articles is None:
+        articles = load_checkpoint(run_id, 'articles')
+    if articles is None:
+        progress('Buscando noticias...')
+        with metrics.stage('search'):
+            if rss_feeds:
+                articles = search_rss_news(topic, feed_urls=rss_feeds, max_results=max_results)
+            elif get_breaker('newsapi').is_available() and date_range:
+                articles = search_news_history(topic, date_range[0], date_range[1], max_results, languages,
+                                               window_days, run_id, progress)
+            elif get_breaker('newsapi').is_available():
+                articles = search_news(topic, max_results=max_results, languages=languages or NEWS_LANGUAGES)
+            elif RSS_FEEDS:
+                logger.warning("NewsAPI no disponible: se usan los feeds RSS configurados")
+                degraded.append('search_rss')
+                articles = search_rss_news(topic, feed_urls=RSS_FEEDS, max_results=max_results)
+            else:
+                logger.warning("NewsAPI no disponible: se usan los artículos del índice local")
+                degraded.append('search_local_index')
+                from_date, to_date = date_range or (None, None)
+                articles = [prepare_article(article) for article in
+                            search_local_index(topic, from_date=from_date, to_date=to_date, limit=max_results)]
+        save_checkpoint(run_id, 'articles', articles)
+    else:
+        logger.info(f"Reanudando '{topic}' con {len(articles)} artículos guardados")
+
+    if not articles:
+        logger.warning(f"No se encontraron noticias sobre '{topic}'")
+        # Continuamos de todos modos para crear un informe "vacío"
+
+    # Paso opcional: descargar el contenido completo (queda guardado en el índice local)
+    if articles and include_full_content and not enriched:
+        progress('Descargando el contenido completo de los artículos...')
+        with metrics.stage('enrichment'):
+            # El texto completo queda en el índice local y se lee al generar los bloques
+            enrich_articles(articles, keep_content=False)
+        save_checkpoint(run_id, 'enrichment', articles)
+
+    # Paso opcional: resúmenes con IA (se omiten si OpenAI no está disponible)
+    if articles and include_ai_summary and not get_breaker('openai').is_available():
+        logger.warning("OpenAI no disponible: el informe se publica sin resúmenes con IA")
+        degraded.append('no_ai_summary')
+        include_ai_summary = False
+
+    if articles and include_ai_summary:
+        summaries = load_checkpoint(run_id, 'summaries')
+        if summaries is None:
+            progress('Generando resúmenes con IA...')
+            with metrics.stage('summarization'):
+                summarize_articles(articles)
+            save_checkpoint(run_id, 'summaries', {
+                article['article_id']: article['ai_summary'] for article in articles if 'ai_summary' in article
+            })
+        else:
+            for article in articles:
+                if article['article_id'] in summaries:
+                    article['ai_summary'] = summaries[article['article_id']]
+
+    # Paso 2: Crear página en Notion directamente con los artículos
+    notion_breaker = get_breaker('notion')
+    if not notion_breaker.is_available():
+        raise CircuitOpenError('notion', notion_breaker.snapshot()['retry_in'] or 0)
+    progress(f"Se encontraron {len(articles)} artículos. Creando página en Notion...")
+    page_url = create_notion_page(
+        topic,
+        articles,
+        include_images=include_images,
+        include_ai_summary=include_ai_summary,
+        run_id=run_id,
+        include_full_content=include_full_content,
+        cancel_event=cancel_event
+    )
+
+    if not page_url:
+        raise RuntimeError("Error al crear la página en Notion")
+
+    return page_url, articles
+
+def resume_news_report(run_id, max_attempts=None, claimed=False):
+    """
+    Reanuda un informe interrumpido desde su última etapa terminada.
+
+    Args:
+        run_id (str): ID de la ejecución
+        max_attempts (int): Intentos del informe (por defecto REPORT_MAX_ATTEMPTS)
+        claimed (bool): La ejecución ya se reclamó con CheckpointStore.claim_run
+
+    Returns:
+        dict: Resultado como el de generate_news_report
+    """
+    try:
+        store = get_checkpoint_store()
+        saved_run = store.get_run(run_id)
+        if saved_run and saved_run['status'] != 'completed' and not claimed:
+            # Solo un proceso reanuda cada ejecución; las que siguen en curso no se tocan
+            claimed = store.claim_run(run_id, ('failed', 'deferred', 'queued'),
+                                      stale_minutes=RUN_STALE_MINUTES) is not None
+            if not claimed:
+                return {'success': False, 'message': f"La ejecución {run_id} ya está en curso",
+                        'page_url': None, 'articles_count': 0, 'run_id': run_id}
+    except Exception as e:
+        logger.error(f"No se pudieron leer los puntos de control: {str(e)}")
+        saved_run = None
+
+    if not saved_run:
+        return {'success': False, 'message': f"No existe la ejecución {run_id}", 'page_url': None, 'articles_count': 0}
+    if saved_run['status'] == 'completed':
+        return {'success': True, 'message': f"La ejecución {run_id} ya estaba completada",
+                'page_url': None, 'articles_count': 0, 'run_id': run_id}
+
+    logger.info(f"Reanudando la ejecución {run_id} ('{saved_run['topic']}') desde la etapa {saved_run['stage'] or 'inicial'}")
+    return generate_news_report(saved_run['topic'], run_id=run_id, force_refresh=True, max_attempts=max_attempts,
+                                **saved_run['params'])
+
+def resume_pending_runs(max_age_hours=24, include_failed=False, max_resumes=RUN_MAX_RESUMES):
+    """
+    Reanuda los informes que quedaron sin terminar: aplazados por un servicio
+    caído o interrumpidos (sin actualizarse en RUN_STALE_MINUTES) y, si se pide,
+    también los fallidos. Cada informe se intenta una sola vez por reanudación y
+    se deja de reanudar tras max_resumes veces, para que un fallo permanente no
+    se repita indefinidamente. Si otro proceso reclama antes la misma ejecución,
+    se omite.
+
+    Args:
+        max_age_hours (float): Solo se reanudan los actualizados en las últimas horas indicadas
+        include_failed (bool): Reanudar también los informes fallidos (reanudar desde la línea de comandos)
+        max_resumes (int): Reanudaciones máximas de cada informe (None para no limitarlas)
+
+    Returns:
+        list: Resultados de los informes reanudados
+    """
+    store = get_checkpoint_store()
+    statuses = ('failed', 'deferred') if include_failed else ('deferred',)
+    try:
+        pending = store.pending_runs(max_age_hours, stale_minutes=RUN_STALE_MINUTES,
+                                     include_failed=include_failed, max_resumes=max_resumes)
+    except Exception as e:
+        logger.error(f"No se pudieron leer los puntos de control: {str(e)}")
+        return []
+
+    if pending:
+        logger.info(f"Reanudando {len(pending)} informes sin terminar")
+    results = []
+    for saved_run in pending:
+        try:
+            resumes = store.claim_run(saved_run['run_id'], statuses, stale_minutes=RUN_STALE_MINUTES,
+                                      max_resumes=max_resumes)
+        except Exception as e:
+            logger.error(f"No se pudo reclamar la ejecución {saved_run['run_id']}: {str(e)}")
+            continue
+        if resumes is None:
+            logger.info(f"La ejecución {saved_run['run_id']} ya la ha reclamado otro proceso")
+            continue
+        if max_resumes is not None and resumes >= max_resumes:
+            logger.warning(f"Última reanudación automática de {saved_run['run_id']} ({resumes}/{max_resumes}); "
+                           f"después solo se podrá reanudar con 'reanudar {saved_run['run_id']}'")
+        results.append(resume_news_report(saved_run['run_id'], max_attempts=1, claimed=True))
+    return results
+
+def start_checkpoint_run(topic, params):
+    """
+    Registra una nueva ejecución en el almacén de puntos de control.
+
+    Returns:
+        str: ID de la ejecución o None si no se pudo registrar
+    """
+    try:
+        return get_checkpoint_store().create_run(topic, params)
+    except Exception as e:
+        logger.warning(f"No se pudo registrar la ejecución, se continúa sin puntos de control: {str(e)}")
+        return None
+
+def finish_checkpoint_run(run_id, status, error=None):
+    """Actualiza el estado de una ejecución ('completed' o 'failed')."""
+    if not run_id:
+        return
+    try:
+        get_checkpoint_store().set_status(run_id, status, error)
+    except Exception as e:
+        logger.warning(f"No se pudo actualizar la ejecución {run_id}: {str(e)}")
+
+def load_checkpoint(run_id, stage):
+    """
+    Recupera la salida guardada de una etapa.
+
+    Returns:
+        Los datos guardados o None si no hay ejecución o la etapa no terminó
+    """
+    if not run_id:
+        return None
+    try:
+        return get_checkpoint_store().load_stage(run_id, stage)
+    except Exception as e:
+        logger.warning(f"No se pudo leer el punto de control '{stage}': {str(e)}")
+        return None
+
+def save_checkpoint(run_id, stage, data):
+    """Guarda la salida de una etapa (si hay ejecución registrada)."""
+    if not run_id:
+        return
+    try:
+        get_checkpoint_store().save_stage(run_id, stage, data)
+    except Exception as e:
+        logger.warning(f"No se pudo guardar el punto de control '{stage}': {str(e)}")
+
+def report_options(include_images=True, include_ai_summary=False, include_full_content=False, rss_feeds=None,
+                   languages=None, date_range=None):
+    """
+    Opciones que cambian el contenido de un informe (forman parte de su clave de caché).
+
+    Returns:
+        dict: Opciones normalizadas
+    """
+    options = {
+        'include_images': bool(include_images),
+        'include_ai_summary': bool(include_ai_summary),
+        'include_full_content': bool(include_full_content),
+        'rss_feeds': sorted(rss_feeds) if rss_feeds else None
+    }
+    # Solo si se indican, para no cambiar la clave de los informes en el idioma por defecto
+    languages = parse_languages(languages)
+    if languages:
+        options['languages'] = sorted(languages)
+    if date_range:
+        options['date_range'] = list(date_range)
+    return options
+
+def find_cached_report(topic, max_results, options):
+    """
+    Busca un informe ya publicado hoy con el mismo tema, tamaño y opciones.
+
+    Args:
+        topic (str): Tema del informe
+        max_results (int): Número máximo de artículos
+        options (dict): Opciones devueltas por report_options
 
-        result['page_url'] = page_url
+    Returns:
+        dict: Informe en caché ('page_url', 'articles_count', ...) o None
+    """
+    try:
+        entry = get_report_cache().get(make_report_key(topic, max_results, options))
+    except Exception as e:
+        logger.warning(f"No se pudo consultar la caché de informes: {str(e)}")
+        return None
+    metrics.count_cache('report', entry is not None)
+    return entry
 
-        # Paso 3: Enviar notificación
-        send_notification(page_url, topic, method=notification_method)
+def remember_report(topic, max_results, options, page_url, articles_count):
+    """
+    Guarda en la caché un informe recién publicado.
 
-        logger.info(f"Informe completo generado con éxito para el tema: {topic}")
-        result['success'] = True
-        result['message'] = f"Informe generado exitosamente con {len(articles)} artículos"
+    Args:
+        topic (str): Tema del informe
+        max_results (int): Número máximo de artículos
+        options (dict): Opciones devueltas por report_options
+        page_url (str): URL de la página de Notion
+        articles_count (int): Número de artículos del informe
+    """
+    try:
+        get_report_cache().put(make_report_key(topic, max_results, options), topic, page_url, articles_count)
+    except Exception as e:
+        logger.warning(f"No se pudo guardar el informe en la caché: {str(e)}")
 
-        return result
+def archive_report(run_id, topic, articles, page_url, options, run_metrics):
+    """
+    Guarda un informe publicado y sus artículos en el archivo histórico (Parquet).
 
+    Args:
+        run_id (str): ID de la ejecución
+        topic (str): Tema del informe
+        articles (list): Artículos del informe
+        page_url (str): URL de la página de Notion
+        options (dict): Opciones devueltas por report_options
+        run_metrics (dict): 'timings' y 'counters' de la ejecución
+    """
+    archive = get_archive()
+    if archive is None:
+        return
+    try:
+        archive.add_report(run_id or f"run_{int(time.time())}", topic, articles, page_url, options,
+                           run_metrics.get('timings'), run_metrics.get('counters'))
     except Exception as e:
-        logger.error(f"Error al generar informe de noticias: {str(e)}")
-        result['message'] = f"Error: {str(e)}"
-        return result
+        logger.warning(f"No se pudo archivar el informe: {str(e)}")
+
+def export_report(topic, from_date=None, to_date=None, output=None, output_format='markdown', max_results=None):
+    """
+    Escribe sin conexión (sin Notion ni NewsAPI) el informe más reciente de un
+    tema guardado en el archivo histórico.
+
+    Args:
+        topic (str): Tema del informe
+        from_date (str): Fecha mínima (YYYY-MM-DD)
+        to_date (str): Fecha máxima (YYYY-MM-DD)
+        output (str): Archivo de salida (por defecto, se devuelve el texto sin guardarlo)
+        output_format (str): 'markdown' o 'json'
+        max_results (int): Número máximo de artículos
+
+    Returns:
+        str: Informe exportado o None si no hay informes archivados
+    """
+    archive = get_archive()
+    if archive is None:
+        logger.error("El archivo histórico requiere pyarrow (pip install pyarrow)")
+        return None
+
+    articles = archive.latest_articles(topic, from_date, to_date, limit=max_results)
+    if not articles:
+        logger.warning(f"No hay informes archivados sobre '{topic}'")
+        return None
 
-def setup_scheduled_task(topic, time_str, max_results=10, include_images=True, notification_method='console'):
+    if output_format == 'json':
+        text = json.dumps(articles, ensure_ascii=False, indent=2)
+    else:
+        text = format_report_markdown(articles[0]['topic_name'] or topic, articles, articles[0]['date'])
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text)
+        logger.info(f"Informe exportado en {output}")
+    return text
+
+def setup_scheduled_task(topic, time_str, max_results=10, include_images=True, notification_method='console',
+                         profile=False, languages=None):
     """
     Configura una tarea programada para ejecutarse diariamente a la hora especificada.
 
@@ -728,15 +2132,40 @@ def setup_scheduled_task(topic, time_str, max_results=10, include_images=True, n
         max_results (int): Número máximo de resultados
         include_images (bool): Si se deben incluir imágenes
         notification_method (str): Método de notificación
+        profile (bool): Guardar un perfil de CPU y memoria de cada ejecución
+        languages (list): Idiomas en los que buscar (por defecto NEWS_LANGUAGES)
     """
+    languages = parse_languages(languages)
+    # Reservar cada día en la cuota de NewsAPI al menos una llamada por idioma para este informe
+    expected_calls = len(languages or NEWS_LANGUAGES)
+    get_quota_ledger().expect(topic, time_str, expected_calls)
+
     def scheduled_job():
-        logger.info(f"Ejecutando tarea programada para el tema: {topic}")
-        generate_news_report(
-            topic,
-            max_results=max_results,
-            include_images=include_images,
-            notification_method=notification_method
-        )
+        get_quota_ledger().expect(topic, time_str, expected_calls)
+        # No repetir el informe si ya se publicó hoy uno idéntico (mismo tema, tamaño y opciones)
+        cached = find_cached_report(topic, max_results, report_options(include_images, languages=languages))
+        if cached:
+            logger.info(f"Ya existe un informe idéntico de hoy para '{topic}': {cached['page_url']}")
+            return
+        if SCHEDULE_SKIP_PUBLISHED:
+            # Cualquier informe del tema publicado hoy, también desde otro nodo
+            today = datetime.date.today().isoformat()
+            existing = get_report_history(topic, from_date=today, to_date=today, limit=1)
+            if existing:
+                logger.info(f"Ya existe un informe de hoy para '{topic}': {existing[0]['url']}")
+                return
+
+        # Lo ejecutan los hilos del programador (modo local) o los workers
+        # (python news_automation.py worker), detrás de los informes interactivos
+        job_id = get_job_queue().enqueue('report', {
+            'topic': topic,
+            'max_results': max_results,
+            'include_images': include_images,
+            'notification_method': notification_method,
+            'profile': profile,
+            'languages': languages
+        }, priority='scheduled')
+        logger.info(f"Tarea programada para el tema '{topic}' añadida a la cola: {job_id}")
 
     schedule.every().day.at(time_str).do(scheduled_job)
     logger.info(f"Tarea programada configurada para ejecutarse diariamente a las {time_str}")
@@ -746,10 +2175,274 @@ def run_scheduler():
     Ejecuta el bucle principal del programador de tareas.
     """
     logger.info("Iniciando programador de tareas...")
+    if JOB_QUEUE_MODE == 'local':
+        # Los informes programados se procesan en este proceso a través de la cola
+        from worker import start_worker_threads
+        start_worker_threads(SCHEDULER_WORKER_THREADS)
+    # Terminar primero los informes que quedaron a medias (proceso caído, fallos de Notion...)
+    resume_pending_runs()
+    # y volver a intentarlo periódicamente con los aplazados por un servicio caído
+    schedule.every(RESUME_INTERVAL_MINUTES).minutes.do(resume_pending_runs)
     while True:
         schedule.run_pending()
         time.sleep(60)  # Verificar cada minuto
 
+def fetch_new_articles(topic, since=None, seen_ids=(), languages=None, max_calls=None):
+    """
+    Pide a NewsAPI los artículos de un tema publicados desde since, ordenados por
+    fecha. En cada idioma se pasa de página hasta llegar a un artículo anterior
+    a since (como mucho WATCH_MAX_PAGES páginas); la primera consulta de un tema
+    pide una sola página. Cada llamada se descuenta del presupuesto diario de la
+    vigilancia antes de hacerla, aunque después falle.
+
+    Args:
+        topic (str): Tema de búsqueda
+        since (str): publishedAt del último artículo visto (None en la primera consulta)
+        seen_ids (iterable): IDs de los artículos ya vistos con ese mismo publishedAt
+        languages (list): Idiomas en los que buscar (por defecto NEWS_LANGUAGES)
+        max_calls (int): Llamadas que se pueden gastar (la primera página de cada idioma se pide siempre)
+
+    Returns:
+        tuple: (artículos nuevos del más antiguo al más reciente, llamadas realizadas)
+    """
+    store = get_watch_store()
+    languages = languages or NEWS_LANGUAGES
+    seen = set(seen_ids)
+    articles = []
+    calls = 0
+    for position, language in enumerate(languages):
+        params = {'q': topic, 'language': language, 'sort_by': 'publishedAt', 'page_size': WATCH_PAGE_SIZE}
+        if since:
+            # NewsAPI acepta fecha y hora en 'from' (incluida, de ahí seen_ids)
+            params['from_param'] = since.rstrip('Z')
+        for page in range(1, (WATCH_MAX_PAGES if since else 1) + 1):
+            # Las primeras páginas de los idiomas que faltan tienen preferencia sobre las siguientes de este
+            if page > 1 and max_calls is not None and calls + len(languages) - position > max_calls:
+                logger.warning(f"Vigilancia de '{topic}': sin presupuesto para más páginas en '{language}'")
+                break
+            store.spend(1)
+            calls += 1
+            try:
+                news_response = call_api('newsapi', newsapi.get_everything, page=page, **params)
+            except Exception as e:
+                # El plan gratuito/desarrollador no permite pasar de 100 resultados
+                if page > 1 and 'maximumResultsReached' in str(e):
+                    break
+                raise
+            metrics.add_payload_bytes('newsapi', len(json.dumps(news_response)), direction='in')
+            page_articles = news_response.get('articles', [])
+            for article in page_articles:
+                prepare_article(article)
+                published = article.get('publishedAt') or ''
+                if article['article_id'] in seen or (since and published < since):
+                    continue
+                seen.add(article['article_id'])
+                article['language'] = language
+                articles.append(article)
+
+            oldest = (page_articles[-1].get('publishedAt') or '') if page_articles else ''
+            if len(page_articles) < WATCH_PAGE_SIZE or not since or oldest < since:
+                break
+        else:
+            if since:
+                logger.warning(f"Vigilancia de '{topic}': más de {WATCH_MAX_PAGES} páginas nuevas en '{language}'; "
+                               f"se omiten las más antiguas")
+
+    articles.sort(key=lambda article: article.get('publishedAt') or '')
+    index_articles(articles, topic)
+    return articles, calls
+
+def append_watch_articles(topic, state, articles, include_images=True):
+    """
+    Añade artículos a la página de vigilancia del tema del día (la crea si no existe).
+
+    Args:
+        topic (str): Tema
+        state (dict): Estado del tema (WatchStore)
+        articles (list): Artículos nuevos
+        include_images (bool): Si se deben incluir imágenes
+
+    Returns:
+        str: URL de la página
+    """
+    store = get_watch_store()
+    today = datetime.date.today().isoformat()
+    page_id = state['page_id'] if state['page_date'] == today else None
+    position = state['articles_sent'] if page_id else 0
+
+    if include_images and IMAGE_PREFLIGHT and articles:
+        preflight_article_images(articles)
+
+    block_groups = (
+        (article, article_to_notion_blocks(article, position + i, include_images, False))
+        for i, article in enumerate(articles, 1)
+    )
+    for blocks, groups, sent_articles in iter_block_batches(block_groups):
+        metrics.add_payload_bytes('notion', len(json.dumps(blocks)))
+        if page_id is None:
+            new_page = call_api(
+                'notion', notion.pages.create,
+                parent={"database_id": NOTION_DATABASE_ID},
+                properties={
+                    "title": {
+                        "title": [{"text": {"content": f"Vigilancia: {topic} - {datetime.datetime.now().strftime('%d-%m-%Y')}"}}]
+                    }
+                },
+                children=blocks
+            )
+            page_id = new_page['id']
+            remember_notion_page(new_page)
+        else:
+            call_api('notion', notion.blocks.children.append, block_id=page_id, children=blocks)
+        position += groups
+        # Guardar tras cada lote para no repetir artículos si el proceso se cae
+        store.update(topic, page_id=page_id, page_date=today, articles_sent=position)
+
+    return f"https://notion.so/{page_id.replace('-', '')}" if page_id else None
+
+def poll_watched_topic(topic, languages=None, notification_method='console', include_images=True, max_calls=None):
+    """
+    Consulta un tema vigilado: busca artículos nuevos, los añade a la página del
+    día en Notion y envía una alerta. La primera consulta de un tema solo fija
+    el punto de partida (añade los artículos a la página sin alertar).
+
+    Args:
+        topic (str): Tema
+        languages (list): Idiomas en los que buscar
+        notification_method (str): Método de las alertas (None para no enviarlas)
+        include_images (bool): Si se deben incluir imágenes
+        max_calls (int): Llamadas que quedan en el presupuesto de la vigilancia
+
+    Returns:
+        dict: 'new_articles', 'calls' y 'page_url'
+    """
+    store = get_watch_store()
+    state = store.get(topic)
+    articles, calls = fetch_new_articles(topic, state['last_published_at'], state['boundary_ids'], languages,
+                                         max_calls)
+
+    page_url = None
+    if articles:
+        page_url = append_watch_articles(topic, state, articles, include_images)
+        latest = articles[-1]['publishedAt']
+        boundary = [article['article_id'] for article in articles if article['publishedAt'] == latest]
+        if latest == state['last_published_at']:
+            boundary += state['boundary_ids']
+        store.update(topic, last_published_at=latest, boundary_ids=boundary)
+
+        if state['last_published_at'] and notification_method and page_url:
+            titles = '\n'.join(f"• {article.get('title', 'Sin título')}" for article in articles[-5:])
+            send_notification(page_url, topic, notification_method,
+                              alert=f"{len(articles)} noticias nuevas sobre '{topic}':\n{titles}")
+
+    logger.info(f"Vigilancia de '{topic}': {len(articles)} artículos nuevos ({calls} llamadas)")
+    return {'new_articles': len(articles), 'calls': calls, 'page_url': page_url}
+
+def run_watch(topics, languages=None, notification_method='console', include_images=True, stop_event=None):
+    """
+    Vigila varios temas casi en tiempo real. Cada tema se consulta con un
+    intervalo propio que se acorta cuando aparecen artículos y se alarga cuando
+    no (entre WATCH_MIN_INTERVAL y WATCH_MAX_INTERVAL), sin bajar nunca del
+    ritmo que permite el presupuesto diario de llamadas (WATCH_DAILY_BUDGET).
+
+    Args:
+        topics (list): Temas a vigilar
+        languages (list): Idiomas en los que buscar (por defecto NEWS_LANGUAGES)
+        notification_method (str): Método de las alertas
+        include_images (bool): Si se deben incluir imágenes
+        stop_event (threading.Event): Evento para detener la vigilancia
+    """
+    stop_event = stop_event or threading.Event()
+    languages = parse_languages(languages) or NEWS_LANGUAGES
+    store = get_watch_store()
+    for topic in topics:
+        store.watch(topic, WATCH_MIN_INTERVAL)
+    calls_per_round = len(topics) * len(languages)
+    logger.info(f"Vigilando {len(topics)} temas (presupuesto: {WATCH_DAILY_BUDGET} llamadas al día)")
+
+    while not stop_event.is_set():
+        for topic in topics:
+            state = store.get(topic)
+            now = time.time()
+            if state['next_check'] > now:
+                continue
+
+            remaining = WATCH_DAILY_BUDGET - store.calls_today()
+            # La vigilancia tampoco gasta la cuota diaria que necesitan los informes programados
+            available = get_quota_planner().available('newsapi', 'backfill', topic)
+            if available is not None:
+                remaining = min(remaining, available)
+            floor = budget_interval(remaining, calls_per_round)
+            if remaining < len(languages):
+                logger.warning(f"Presupuesto diario de vigilancia agotado; '{topic}' se consultará mañana")
+                store.update(topic, next_check=now + floor)
+                continue
+
+            try:
+                result = poll_watched_topic(topic, languages, notification_method, include_images, remaining)
+                interval = next_interval(state['interval'], result['new_articles'], WATCH_MIN_INTERVAL, WATCH_MAX_INTERVAL)
+                store.update(topic, interval=interval, new_articles=result['new_articles'], checked_at=now,
+                             next_check=now + max(interval, floor))
+            except CircuitOpenError as e:
+                logger.warning(f"Vigilancia de '{topic}' en pausa: {str(e)}")
+                store.update(topic, next_check=now + max(e.retry_in, state['interval']))
+            except Exception as e:
+                logger.error(f"Error al vigilar '{topic}': {str(e)}")
+                store.update(topic, next_check=now + state['interval'])
+
+        next_check = min(store.get(topic)['next_check'] for topic in topics)
+        stop_event.wait(min(60, max(1, next_check - time.time())))
+
+def sync_notion_mirror(full=False):
+    """
+    Sincroniza la copia local de la base de datos de informes de Notion.
+
+    Args:
+        full (bool): Volver a traer todas las páginas en lugar de solo las editadas
+
+    Returns:
+        int: Páginas recibidas o None si falló la sincronización
+    """
+    try:
+        query = lambda **kwargs: call_api('notion', notion.databases.query, **kwargs)
+        return get_notion_mirror().sync(query, NOTION_DATABASE_ID, full=full)
+    except Exception as e:
+        logger.warning(f"No se pudo sincronizar la copia local de Notion: {str(e)}")
+        return None
+
+def get_report_history(topic=None, from_date=None, to_date=None, limit=50, max_age=None):
+    """
+    Consulta los informes publicados en Notion usando la copia local, que se
+    sincroniza antes si tiene más de max_age segundos.
+
+    Args:
+        topic (str): Tema del informe
+        from_date (str): Fecha mínima (YYYY-MM-DD)
+        to_date (str): Fecha máxima (YYYY-MM-DD)
+        limit (int): Número máximo de resultados
+        max_age (float): Antigüedad máxima de la copia (por defecto, NOTION_MIRROR_MAX_AGE)
+
+    Returns:
+        list: Informes ('page_id', 'title', 'topic', 'report_date', 'url', ...)
+    """
+    max_age = NOTION_MIRROR_MAX_AGE if max_age is None else max_age
+    try:
+        mirror = get_notion_mirror()
+        state = mirror.sync_state(NOTION_DATABASE_ID)
+        if not state or time.time() - state['synced_at'] > max_age:
+            sync_notion_mirror()
+        return mirror.find_reports(NOTION_DATABASE_ID, topic, from_date, to_date, limit)
+    except Exception as e:
+        logger.warning(f"No se pudo consultar la copia local de Notion: {str(e)}")
+        return []
+
+def remember_notion_page(page):
+    """Añade a la copia local una página recién creada, sin esperar a la próxima sincronización."""
+    try:
+        get_notion_mirror().upsert_pages(NOTION_DATABASE_ID, [page])
+    except Exception as e:
+        logger.warning(f"No se pudo guardar la página en la copia local de Notion: {str(e)}")
+
 def verify_database():
     """
     Verifica que la base de datos exista y sea accesible.
@@ -758,6 +2451,12 @@ def verify_database():
         # Intentar recuperar la base de datos
         database = notion.databases.retrieve(database_id=NOTION_DATABASE_ID)
         print(f"Base de datos encontrada: {database.get('title', [{'plain_text': 'Sin título'}])[0].get('plain_text', 'Sin título')}")
+
+        # Actualizar la copia local de los informes
+        received = sync_notion_mirror()
+        if received is not None:
+            print(f"Copia local actualizada: {received} páginas nuevas o editadas, "
+                  f"{get_notion_mirror().count(NOTION_DATABASE_ID)} informes en total")
         return True
     except Exception as e:
         print(f"Error al acceder a la base de datos: {str(e)}")
@@ -918,20 +2617,97 @@ def main():
     # Comando para generar un informe inmediatamente
     generate_parser = subparsers.add_parser('generar', help='Generar un informe inmediatamente')
     generate_parser.add_argument('tema', help='Tema de búsqueda')
-    generate_parser.add_argument('--max', type=int, default=10, help='Número máximo de resultados (5-100)')
+    generate_parser.add_argument('--max', type=int, default=10, help=f'Número máximo de resultados (5-{MAX_RESULTS_LIMIT})')
     generate_parser.add_argument('--no-images', action='store_true', help='No incluir imágenes en el informe')
     generate_parser.add_argument('--ai-summary', action='store_true', help='Incluir resumen generado por IA')
     generate_parser.add_argument('--notify', choices=['console', 'email', 'slack'], default='console',
                                 help='Método de notificación')
+    generate_parser.add_argument('--rss', action='append', metavar='URL',
+                                help='Buscar en este feed RSS en lugar de NewsAPI (se puede repetir)')
+    generate_parser.add_argument('--full-content', action='store_true',
+                                help='Descargar el contenido completo de cada artículo')
+    generate_parser.add_argument('--force-refresh', action='store_true',
+                                help='Generar un informe nuevo aunque ya exista uno igual de hoy')
+    generate_parser.add_argument('--profile', action='store_true',
+                                help='Guardar un perfil de CPU y memoria por etapa y mostrar los puntos calientes')
+    generate_parser.add_argument('--idiomas', metavar='es,en',
+                                help='Buscar a la vez en varios idiomas (por defecto NEWS_LANGUAGES)')
 
     # Comando para programar una tarea diaria
     schedule_parser = subparsers.add_parser('programar', help='Programar una tarea diaria')
     schedule_parser.add_argument('tema', help='Tema de búsqueda')
     schedule_parser.add_argument('hora', help='Hora de ejecución (formato HH:MM)')
-    schedule_parser.add_argument('--max', type=int, default=10, help='Número máximo de resultados (5-100)')
+    schedule_parser.add_argument('--max', type=int, default=10, help=f'Número máximo de resultados (5-{MAX_RESULTS_LIMIT})')
     schedule_parser.add_argument('--no-images', action='store_true', help='No incluir imágenes en el informe')
     schedule_parser.add_argument('--notify', choices=['console', 'email', 'slack'], default='console',
                                 help='Método de notificación')
+    schedule_parser.add_argument('--profile', action='store_true',
+                                help='Guardar un perfil de CPU y memoria de cada ejecución')
+    schedule_parser.add_argument('--idiomas', metavar='es,en',
+                                help='Buscar a la vez en varios idiomas (por defecto NEWS_LANGUAGES)')
+
+    # Comando para vigilar temas casi en tiempo real
+    watch_parser = subparsers.add_parser('vigilar', help='Vigilar temas y añadir las noticias nuevas a una página de Notion')
+    watch_parser.add_argument('temas', nargs='+', help='Temas a vigilar')
+    watch_parser.add_argument('--idiomas', metavar='es,en',
+                              help='Buscar a la vez en varios idiomas (por defecto NEWS_LANGUAGES)')
+    watch_parser.add_argument('--no-images', action='store_true', help='No incluir imágenes')
+    watch_parser.add_argument('--notify', choices=['console', 'email', 'slack'], default='console',
+                              help='Método de las alertas')
+
+    # Comando para generar un informe de un rango de fechas largo
+    backfill_parser = subparsers.add_parser('historico', help='Generar un informe de un rango de fechas largo por ventanas')
+    backfill_parser.add_argument('tema', help='Tema de búsqueda')
+    backfill_parser.add_argument('--desde', required=True, help='Fecha inicial (YYYY-MM-DD)')
+    backfill_parser.add_argument('--hasta', help='Fecha final (YYYY-MM-DD, por defecto hoy)')
+    backfill_parser.add_argument('--ventana', type=int, default=BACKFILL_WINDOW_DAYS, help='Días de cada ventana')
+    backfill_parser.add_argument('--max', type=int, default=100, help=f'Número máximo de resultados (5-{MAX_RESULTS_LIMIT})')
+    backfill_parser.add_argument('--no-images', action='store_true', help='No incluir imágenes en el informe')
+    backfill_parser.add_argument('--notify', choices=['console', 'email', 'slack'], default='console',
+                                 help='Método de notificación')
+    backfill_parser.add_argument('--idiomas', metavar='es,en',
+                                 help='Buscar a la vez en varios idiomas (por defecto NEWS_LANGUAGES)')
+
+    # Comando para exportar un informe del archivo histórico
+    export_parser = subparsers.add_parser('exportar', help='Exportar un informe archivado sin usar Notion ni las APIs')
+    export_parser.add_argument('tema', help='Tema del informe')
+    export_parser.add_argument('--desde', help='Fecha mínima (YYYY-MM-DD)')
+    export_parser.add_argument('--hasta', help='Fecha máxima (YYYY-MM-DD)')
+    export_parser.add_argument('--formato', choices=['markdown', 'json'], default='markdown', help='Formato de salida')
+    export_parser.add_argument('--salida', help='Archivo de salida (por defecto, se muestra por pantalla)')
+    export_parser.add_argument('--max', type=int, help='Número máximo de artículos')
+
+    # Comando para buscar en el histórico local
+    search_parser = subparsers.add_parser('buscar', help='Buscar en los artículos ya obtenidos (sin usar la API)')
+    search_parser.add_argument('consulta', help='Texto de búsqueda')
+    search_parser.add_argument('--desde', help='Fecha mínima de publicación (YYYY-MM-DD)')
+    search_parser.add_argument('--hasta', help='Fecha máxima de publicación (YYYY-MM-DD)')
+    search_parser.add_argument('--fuente', help='Filtrar por nombre de la fuente')
+    search_parser.add_argument('--max', type=int, default=20, help='Número máximo de resultados')
+
+    # Comando para consultar la cuota diaria de las APIs
+    quota_parser = subparsers.add_parser('cuota', help='Mostrar las llamadas de hoy a cada API y la cuota reservada')
+
+    # Comando para consultar los informes publicados
+    history_parser = subparsers.add_parser('historial', help='Listar los informes publicados (copia local de Notion)')
+    history_parser.add_argument('tema', nargs='?', help='Tema de los informes')
+    history_parser.add_argument('--desde', help='Fecha mínima (YYYY-MM-DD)')
+    history_parser.add_argument('--hasta', help='Fecha máxima (YYYY-MM-DD)')
+    history_parser.add_argument('--max', type=int, default=20, help='Número máximo de resultados')
+    history_parser.add_argument('--sincronizar-todo', action='store_true',
+                                help='Volver a traer todas las páginas de Notion antes de consultar')
+
+    # Comando para reanudar informes interrumpidos
+    resume_parser = subparsers.add_parser('reanudar', help='Reanudar informes interrumpidos desde la última etapa terminada')
+    resume_parser.add_argument('run_id', nargs='?', help='ID de la ejecución (por defecto, todas las pendientes)')
+    resume_parser.add_argument('--listar', action='store_true', help='Solo listar las ejecuciones pendientes')
+    resume_parser.add_argument('--horas', type=float, default=24, help='Antigüedad máxima de las ejecuciones pendientes')
+
+    # Comando para procesar informes de la cola compartida
+    worker_parser = subparsers.add_parser('worker', help='Procesar informes de la cola de trabajos compartida')
+    worker_parser.add_argument('--hilos', type=int, default=1, help='Informes simultáneos en este proceso')
+    worker_parser.add_argument('--reservados', type=int, default=0,
+                               help='Hilos que solo procesan informes interactivos (pedidos desde la web)')
 
     # Comando para iniciar el programador
     start_parser = subparsers.add_parser('iniciar', help='Iniciar el programador de tareas')
@@ -960,13 +2736,21 @@ def main():
             max_results=args.max,
             include_images=include_images,
             include_ai_summary=args.ai_summary,
-            notification_method=args.notify
+            notification_method=args.notify,
+            rss_feeds=args.rss,
+            include_full_content=args.full_content,
+            force_refresh=args.force_refresh,
+            profile=args.profile,
+            languages=args.idiomas,
+            priority='interactive'
         )
         if result['success']:
             print(f"✅ {result['message']}")
             print(f"📰 Ver informe en: {result['page_url']}")
         else:
             print(f"❌ Error: {result['message']}")
+        if result.get('profile'):
+            print(f"\n⏱️ {format_profile_summary(result['profile'])}")
 
     elif args.command == 'programar':
         include_images = not args.no_images
@@ -975,10 +2759,129 @@ def main():
             args.hora,
             max_results=args.max,
             include_images=include_images,
-            notification_method=args.notify
+            notification_method=args.notify,
+            profile=args.profile,
+            languages=args.idiomas
         )
         run_scheduler()
 
+    elif args.command == 'historico':
+        to_date = args.hasta or datetime.date.today().isoformat()
+        try:
+            windows = date_windows(args.desde, to_date, args.ventana)
+        except ValueError as e:
+            print(f"❌ Rango no válido (fechas en formato YYYY-MM-DD, --desde <= --hasta, --ventana >= 1): {str(e)}")
+            return
+        print(f"🗓️ {len(windows)} ventanas de {args.desde} a {to_date}")
+        result = generate_news_report(
+            args.tema,
+            max_results=args.max,
+            include_images=not args.no_images,
+            notification_method=args.notify,
+            force_refresh=True,
+            languages=args.idiomas,
+            priority='backfill',
+            date_range=[args.desde, to_date],
+            window_days=args.ventana,
+            progress=lambda message: print(f"   {message}")
+        )
+        if result['success']:
+            print(f"✅ {result['message']}")
+            print(f"📰 Ver informe en: {result['page_url']}")
+        else:
+            print(f"❌ Error: {result['message']}")
+            if result.get('run_id'):
+                print(f"   Continuar con: python news_automation.py reanudar {result['run_id']}")
+
+    elif args.command == 'vigilar':
+        print(f"👀 Vigilando {', '.join(args.temas)} (Ctrl+C para detener)")
+        try:
+            run_watch(args.temas, languages=args.idiomas, notification_method=args.notify,
+                      include_images=not args.no_images)
+        except KeyboardInterrupt:
+            print("Vigilancia detenida")
+
+    elif args.command == 'exportar':
+        start = time.time()
+        text = export_report(args.tema, from_date=args.desde, to_date=args.hasta, output=args.salida,
+                             output_format=args.formato, max_results=args.max)
+        elapsed_ms = (time.time() - start) * 1000
+        if text is None:
+            print(f"❌ No hay informes archivados sobre '{args.tema}' (¿está instalado pyarrow?)")
+        elif args.salida:
+            print(f"✅ Informe exportado en {args.salida} ({elapsed_ms:.1f} ms)")
+        else:
+            print(text)
+
+    elif args.command == 'buscar':
+        start = time.time()
+        results = search_local_index(
+            args.consulta,
+            from_date=args.desde,
+            to_date=args.hasta,
+            source=args.fuente,
+            limit=args.max
+        )
+        elapsed_ms = (time.time() - start) * 1000
+        print(f"🔎 {len(results)} resultados para '{args.consulta}' ({elapsed_ms:.1f} ms)\n")
+        for i, article in enumerate(results, 1):
+            print(f"{i}. {article['title']}")
+            print(f"   {article['source']['name']} | {article['publishedAt']}")
+            print(f"   {article['url']}")
+
+    elif args.command == 'cuota':
+        usage = get_quota_ledger().usage()
+        print("📊 Llamadas de hoy")
+        for service, calls in sorted(usage.items()):
+            print(f"   {service}: {calls}")
+        for service, status in get_quota_planner().status().items():
+            print(f"\n{service}: {status['used']}/{status['quota']} llamadas, "
+                  f"{status['reserved']} reservadas, {status['available']} disponibles")
+            for run in get_quota_ledger().upcoming(service):
+                print(f"   {run['run_time']}  '{run['topic']}' ({run['calls']} llamadas)")
+
+    elif args.command == 'historial':
+        if args.sincronizar_todo:
+            sync_notion_mirror(full=True)
+        start = time.time()
+        reports = get_report_history(args.tema, from_date=args.desde, to_date=args.hasta, limit=args.max)
+        elapsed_ms = (time.time() - start) * 1000
+        print(f"🗂️ {len(reports)} informes ({elapsed_ms:.1f} ms)\n")
+        for report in reports:
+            print(f"{report['report_date']}  {report['topic']}")
+            print(f"   {report['url']}")
+
+    elif args.command == 'reanudar':
+        if args.listar:
+            pending = get_checkpoint_store().pending_runs(args.horas)
+            print(f"⏸️ {len(pending)} ejecuciones pendientes\n")
+            for saved_run in pending:
+                print(f"{saved_run['run_id']}  '{saved_run['topic']}'  etapa: {saved_run['stage'] or '-'}  "
+                      f"estado: {saved_run['status']}  ({saved_run['updated_at']})")
+                if saved_run['error']:
+                    print(f"   Último error: {saved_run['error']}")
+        else:
+            results = [resume_news_report(args.run_id)] if args.run_id else \
+                resume_pending_runs(args.horas, include_failed=True, max_resumes=None)
+            if not results:
+                print("No hay ejecuciones pendientes")
+            for result in results:
+                if result['success']:
+                    print(f"✅ {result['message']}")
+                    if result['page_url']:
+                        print(f"📰 Ver informe en: {result['page_url']}")
+                else:
+                    print(f"❌ Error: {result['message']}")
+
+    elif args.command == 'worker':
+        from worker import run_worker
+        if args.hilos < 1 or not 0 <= args.reservados < args.hilos:
+            print("❌ --hilos debe ser al menos 1 y --reservados menor que --hilos "
+                  "(al menos un hilo debe procesar los informes programados)")
+            return
+        print(f"Worker iniciado con {args.hilos} hilos (Ctrl+C para detener)")
+        run_worker(threads=args.hilos, reserved=args.reservados)
+
     elif args.command == 'iniciar':
         run_scheduler()
 
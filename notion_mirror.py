@@ -0,0 +1,240 @@
+# notion_mirror.py
+import re
+import time
+import datetime
+import threading
+import logging
+
+from articles import topic_key
+from storage import connect
+
+logger = logging.getLogger(__name__)
+
+_mirror = None
+_mirror_lock = threading.Lock()
+
+# Título con el que create_notion_page crea los informes
+REPORT_TITLE = re.compile(r'^Informe de Noticias: (?P<topic>.+) - (?P<date>\d{2}-\d{2}-\d{4})$')
+
+def parse_report_page(page):
+    """
+    Extrae los datos de un informe de una página de Notion.
+
+    Args:
+        page (dict): Página devuelta por la API de Notion
+
+    Returns:
+        dict: 'page_id', 'title', 'topic', 'report_date' (YYYY-MM-DD), 'url', 'created_time', 'last_edited_time'
+    """
+    title = ''
+    for prop in (page.get('properties') or {}).values():
+        if prop.get('type', 'title' if 'title' in prop else None) == 'title':
+            title = ''.join(
+                part.get('plain_text') or (part.get('text') or {}).get('content', '')
+                for part in prop.get('title') or []
+            )
+            break
+
+    topic, report_date = title, (page.get('created_time') or '')[:10]
+    match = REPORT_TITLE.match(title)
+    if match:
+        topic = match.group('topic')
+        report_date = datetime.datetime.strptime(match.group('date'), '%d-%m-%Y').date().isoformat()
+
+    return {
+        'page_id': page['id'],
+        'title': title,
+        'topic': topic,
+        'report_date': report_date,
+        'url': page.get('url') or f"https://notion.so/{page['id'].replace('-', '')}",
+        'created_time': page.get('created_time'),
+        'last_edited_time': page.get('last_edited_time')
+    }
+
+class NotionMirror:
+    """
+    Copia local de las páginas de la base de datos de informes de Notion
+    (título, tema, fecha, ID), indexada por tema y fecha. Se mantiene al día de
+    forma incremental consultando solo las páginas editadas desde la última
+    sincronización.
+    """
+
+    def __init__(self, db_name='notion_mirror.db'):
+        """
+        Args:
+            db_name (str): Archivo SQLite de la copia local
+        """
+        self.lock = threading.Lock()
+        self.conn = connect(db_name)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS report_pages (
+                page_id TEXT PRIMARY KEY,
+                database_id TEXT,
+                title TEXT,
+                topic TEXT,
+                topic_key TEXT,
+                report_date TEXT,
+                url TEXT,
+                created_time TEXT,
+                last_edited_time TEXT
+            );
+            CREATE INDEX IF NOT EXISTS report_pages_topic ON report_pages (database_id, topic_key, report_date);
+            CREATE INDEX IF NOT EXISTS report_pages_date ON report_pages (database_id, report_date);
+            CREATE TABLE IF NOT EXISTS sync_state (
+                database_id TEXT PRIMARY KEY,
+                last_edited_time TEXT,
+                synced_at REAL
+            );
+        """)
+        self.conn.commit()
+
+    def upsert_pages(self, database_id, pages):
+        """
+        Guarda (o actualiza) páginas de Notion.
+
+        Args:
+            database_id (str): ID de la base de datos de Notion
+            pages (list): Páginas devueltas por la API
+
+        Returns:
+            int: Número de páginas guardadas
+        """
+        count = 0
+        with self.lock:
+            for page in pages:
+                info = parse_report_page(page)
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO report_pages (page_id, database_id, title, topic, topic_key, report_date, "
+                    "url, created_time, last_edited_time) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (info['page_id'], database_id, info['title'], info['topic'], topic_key(info['topic']),
+                     info['report_date'], info['url'], info['created_time'], info['last_edited_time'])
+                )
+                count += 1
+            self.conn.commit()
+        return count
+
+    def sync(self, query, database_id, full=False):
+        """
+        Trae de Notion las páginas editadas desde la última sincronización.
+
+        databases.query no devuelve las páginas archivadas ni las de la papelera, así
+        que solo una sincronización completa detecta los informes borrados en Notion:
+        al terminarla se eliminan de la copia las páginas que no se han recibido.
+
+        Args:
+            query (callable): Función con la firma de notion.databases.query
+            database_id (str): ID de la base de datos de Notion
+            full (bool): Volver a traer todas las páginas
+
+        Returns:
+            int: Número de páginas recibidas
+        """
+        state = None if full else self.sync_state(database_id)
+        since = state['last_edited_time'] if state else None
+
+        kwargs = {
+            'database_id': database_id,
+            'page_size': 100,
+            'sorts': [{'timestamp': 'last_edited_time', 'direction': 'ascending'}]
+        }
+        if since:
+            kwargs['filter'] = {'timestamp': 'last_edited_time', 'last_edited_time': {'on_or_after': since}}
+
+        received = 0
+        latest = since
+        cursor = None
+        seen = set()
+        while True:
+            if cursor:
+                kwargs['start_cursor'] = cursor
+            response = query(**kwargs)
+            pages = response.get('results', [])
+            self.upsert_pages(database_id, pages)
+            seen.update(page['id'] for page in pages)
+            received += len(pages)
+            for page in pages:
+                if page.get('last_edited_time') and (latest is None or page['last_edited_time'] > latest):
+                    latest = page['last_edited_time']
+            if not response.get('has_more'):
+                break
+            cursor = response.get('next_cursor')
+
+        removed = 0
+        with self.lock:
+            if full:
+                stored = [row['page_id'] for row in self.conn.execute(
+                    "SELECT page_id FROM report_pages WHERE database_id = ?", (database_id,)
+                )]
+                deleted = [(page_id,) for page_id in stored if page_id not in seen]
+                self.conn.executemany("DELETE FROM report_pages WHERE page_id = ?", deleted)
+                removed = len(deleted)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sync_state (database_id, last_edited_time, synced_at) VALUES (?, ?, ?)",
+                (database_id, latest, time.time())
+            )
+            self.conn.commit()
+        logger.info(f"Copia local de Notion sincronizada: {received} páginas nuevas o editadas"
+                    + (f", {removed} borradas en Notion" if removed else ""))
+        return received
+
+    def sync_state(self, database_id):
+        """
+        Devuelve el estado de la última sincronización.
+
+        Returns:
+            dict: 'last_edited_time' y 'synced_at' (epoch) o None si nunca se sincronizó
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM sync_state WHERE database_id = ?", (database_id,)).fetchone()
+        return dict(row) if row else None
+
+    def find_reports(self, database_id, topic=None, from_date=None, to_date=None, limit=50):
+        """
+        Busca informes en la copia local.
+
+        Args:
+            database_id (str): ID de la base de datos de Notion
+            topic (str): Tema exacto (sin distinguir mayúsculas)
+            from_date (str): Fecha mínima del informe (YYYY-MM-DD)
+            to_date (str): Fecha máxima del informe (YYYY-MM-DD)
+            limit (int): Número máximo de resultados
+
+        Returns:
+            list: Informes, del más reciente al más antiguo
+        """
+        sql = "SELECT * FROM report_pages WHERE database_id = ?"
+        params = [database_id]
+        if topic:
+            sql += " AND topic_key = ?"
+            params.append(topic_key(topic))
+        if from_date:
+            sql += " AND report_date >= ?"
+            params.append(from_date)
+        if to_date:
+            sql += " AND report_date <= ?"
+            params.append(to_date)
+        sql += " ORDER BY report_date DESC, created_time DESC LIMIT ?"
+        params.append(limit)
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self, database_id):
+        """Número de informes en la copia local."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM report_pages WHERE database_id = ?", (database_id,)
+            ).fetchone()[0]
+
+def get_notion_mirror():
+    """
+    Devuelve la copia local de Notion compartida por el proceso.
+
+    Returns:
+        NotionMirror: Copia abierta
+    """
+    global _mirror
+    with _mirror_lock:
+        if _mirror is None:
+            _mirror = NotionMirror()
+        return _mirror
@@ -0,0 +1,257 @@
+# profiling.py
+import os
+import re
+import time
+import pstats
+import cProfile
+import datetime
+import threading
+import tracemalloc
+import logging
+from contextlib import contextmanager
+
+from storage import data_path
+
+logger = logging.getLogger(__name__)
+
+# Número de funciones y líneas de asignación que se muestran por etapa
+TOP_ENTRIES = 5
+
+_tracemalloc_users = 0
+_tracemalloc_lock = threading.Lock()
+
+def _start_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+        _tracemalloc_users += 1
+
+def _stop_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+def _hotspots(stats, limit=TOP_ENTRIES):
+    """Funciones con más tiempo propio de un perfil (diccionario pstats.Stats.stats)."""
+    entries = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+    return [
+        {
+            'function': f"{os.path.basename(filename)}:{line}({name})",
+            'calls': calls,
+            'self_s': round(self_time, 4),
+            'cumulative_s': round(cumulative, 4)
+        }
+        for (filename, line, name), (_, calls, self_time, cumulative, _) in entries
+    ]
+
+def _allocations(before, after, limit=TOP_ENTRIES):
+    """Líneas que más memoria asignaron entre dos instantáneas de tracemalloc."""
+    diffs = [diff for diff in after.compare_to(before, 'lineno') if diff.size_diff > 0][:limit]
+    return [
+        {
+            'line': f"{os.path.basename(diff.traceback[0].filename)}:{diff.traceback[0].lineno}",
+            'size_kib': round(diff.size_diff / 1024, 1),
+            'blocks': diff.count_diff
+        }
+        for diff in diffs
+    ]
+
+class RunProfiler:
+    """
+    Perfil de CPU (cProfile) y de memoria (tracemalloc) de una ejecución del
+    informe, separado por etapas. metrics.stage activa el perfil de cada etapa.
+
+    Solo se perfila el hilo que ejecuta el informe; el trabajo de los hilos
+    auxiliares (descargas, resúmenes en paralelo) aparece como espera.
+    """
+
+    def __init__(self, name, output_dir=None):
+        """
+        Args:
+            name (str): Nombre de la ejecución (se usa en el directorio de salida)
+            output_dir (str): Directorio donde guardar los perfiles
+        """
+        slug = re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_') or 'informe'
+        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.output_dir = output_dir or data_path(os.path.join('profiles', f"{timestamp}_{slug}"))
+        self.stack = []
+        self.stages = {}
+        self.profiles = {}
+        self.start_time = None
+        self.thread_id = None
+        self.report = None
+
+    def _enable(self, profile):
+        try:
+            profile.enable()
+            return True
+        except ValueError as e:
+            # A partir de Python 3.12 solo puede haber un perfil activo a la vez
+            logger.warning(f"No se pudo activar el perfil de CPU: {str(e)}")
+            return False
+
+    def start(self):
+        """Empieza a perfilar la ejecución (fuera de las etapas)."""
+        _start_tracemalloc()
+        self.thread_id = threading.get_ident()
+        self.start_time = time.perf_counter()
+        self.base_snapshot = tracemalloc.take_snapshot()
+        base = cProfile.Profile()
+        self.profiles['_run'] = base
+        self.stack.append(base if self._enable(base) else None)
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Perfila una etapa.
+
+        Args:
+            name (str): Nombre de la etapa
+        """
+        if threading.get_ident() != self.thread_id:
+            # cProfile solo perfila el hilo que lo activa
+            yield
+            return
+
+        outer = self.stack[-1] if self.stack else None
+        if outer:
+            outer.disable()
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        profile = self.profiles.setdefault(name, cProfile.Profile())
+        self.stack.append(profile if self._enable(profile) else None)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            active = self.stack.pop()
+            if active:
+                active.disable()
+            peak = tracemalloc.get_traced_memory()[1]
+            after = tracemalloc.take_snapshot()
+            info = self.stages.setdefault(name, {'seconds': 0.0, 'peak_kib': 0.0, 'allocations': []})
+            info['seconds'] += elapsed
+            info['peak_kib'] = max(info['peak_kib'], round(peak / 1024, 1))
+            info['allocations'] = _allocations(before, after)
+            if outer:
+                self._enable(outer)
+
+    def finish(self):
+        """
+        Termina el perfil y guarda los archivos:
+
+        - <etapa>.prof y total.prof: perfiles de CPU (pstats; se abren con snakeviz,
+          gprof2dot o `python -m pstats`)
+        - memory.snapshot: instantánea de tracemalloc (tracemalloc.Snapshot.load)
+        - resumen.txt: puntos calientes por etapa
+
+        Returns:
+            dict: Resumen ('output_dir', 'files', 'stages' con tiempos, funciones y asignaciones)
+        """
+        while self.stack:
+            active = self.stack.pop()
+            if active:
+                active.disable()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        files = []
+        total = None
+        for name, profile in self.profiles.items():
+            if not pstats.Stats(profile).stats:
+                continue
+            path = os.path.join(self.output_dir, f"{name.lstrip('_')}.prof")
+            profile.dump_stats(path)
+            files.append(path)
+            if total is None:
+                total = pstats.Stats(path)
+            else:
+                total.add(path)
+        if total is not None:
+            path = os.path.join(self.output_dir, 'total.prof')
+            total.dump_stats(path)
+            files.append(path)
+
+        snapshot = tracemalloc.take_snapshot()
+        path = os.path.join(self.output_dir, 'memory.snapshot')
+        snapshot.dump(path)
+        files.append(path)
+        run_allocations = _allocations(self.base_snapshot, snapshot)
+        _stop_tracemalloc()
+
+        stages = {}
+        for name, info in self.stages.items():
+            profile = self.profiles.get(name)
+            stats = pstats.Stats(profile).stats if profile else {}
+            stages[name] = dict(info, seconds=round(info['seconds'], 4), hotspots=_hotspots(stats))
+
+        self.report = {
+            'output_dir': self.output_dir,
+            'files': files,
+            'total_seconds': round(time.perf_counter() - self.start_time, 4),
+            'hotspots': _hotspots(total.stats, TOP_ENTRIES * 2) if total is not None else [],
+            'allocations': run_allocations,
+            'stages': stages
+        }
+
+        path = os.path.join(self.output_dir, 'resumen.txt')
+        with open(path, 'w') as f:
+            f.write(format_profile_summary(self.report))
+        files.append(path)
+        return self.report
+
+@contextmanager
+def profile_run(run, name, enabled=True):
+    """
+    Perfila el bloque si enabled es True y asocia el perfil a las métricas de la ejecución.
+
+    Args:
+        run (metrics.RunMetrics): Ejecución en curso
+        name (str): Nombre de la ejecución
+        enabled (bool): Si se debe perfilar
+
+    Yields:
+        RunProfiler: Perfil (su resumen queda en .report al salir) o None
+    """
+    if not enabled:
+        yield None
+        return
+
+    profiler = RunProfiler(name)
+    run.profiler = profiler
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        run.profiler = None
+        try:
+            profiler.finish()
+            logger.info(f"Perfil guardado en {profiler.output_dir}\n{format_profile_summary(profiler.report)}")
+        except Exception as e:
+            logger.error(f"No se pudo guardar el perfil: {str(e)}")
+
+def format_profile_summary(report):
+    """
+    Da formato de texto al resumen de un perfil.
+
+    Args:
+        report (dict): Resumen devuelto por RunProfiler.finish
+
+    Returns:
+        str: Texto con los puntos calientes globales y por etapa
+    """
+    lines = [f"Perfil de la ejecución ({report['total_seconds']:.3f} s) en {report['output_dir']}", "",
+             "Funciones con más tiempo propio:"]
+    for entry in report['hotspots']:
+        lines.append(f"  {entry['self_s']:>8.4f} s  {entry['calls']:>7} llamadas  {entry['function']}")
+    for name, stage in report['stages'].items():
+        lines.append("")
+        lines.append(f"[{name}] {stage['seconds']:.3f} s, pico de memoria {stage['peak_kib']:.1f} KiB")
+        for entry in stage['hotspots']:
+            lines.append(f"  {entry['self_s']:>8.4f} s  {entry['calls']:>7} llamadas  {entry['function']}")
+        for allocation in stage['allocations']:
+            lines.append(f"  +{allocation['size_kib']:>8.1f} KiB  {allocation['line']}")
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,273 @@
+# quota.py
+import os
+import time
+import datetime
+import threading
+import logging
+
+import metrics
+from articles import topic_key
+from rate_limiter import DEFAULT_PRIORITY
+from storage import connect
+
+logger = logging.getLogger(__name__)
+
+# Los informes programados que no se han vuelto a ejecutar en este tiempo ya no reservan cuota
+DEMAND_MAX_AGE = 48 * 3600
+
+QUOTA_USED = metrics.Gauge('news_api_quota_used', 'Llamadas gastadas hoy de la cuota diaria de cada servicio',
+                           ['service'])
+SEARCH_MODES = metrics.Counter('news_search_mode_total', 'Búsquedas por modo elegido según la cuota diaria',
+                               ['mode'])
+
+_ledger = None
+_planner = None
+_quota_lock = threading.Lock()
+
+def parse_quotas(value):
+    """
+    Interpreta API_DAILY_QUOTAS ('newsapi:100,openai:500').
+
+    Returns:
+        dict: Llamadas al día permitidas de cada servicio
+    """
+    quotas = {}
+    for item in (value or '').split(','):
+        service, _, calls = item.partition(':')
+        try:
+            if service.strip() and int(calls) > 0:
+                quotas[service.strip()] = int(calls)
+        except ValueError:
+            logger.warning(f"Cuota diaria no válida en API_DAILY_QUOTAS: '{item}'")
+    return quotas
+
+class QuotaLedger:
+    """
+    Registro persistente de las llamadas a cada servicio por día, compartido por
+    la línea de comandos, la web, el programador y los workers (mismo archivo
+    SQLite). Guarda también las ejecuciones programadas de cada tema para que
+    el planificador les reserve cuota.
+    """
+
+    def __init__(self, db_name='quota.db'):
+        """
+        Args:
+            db_name (str): Archivo SQLite del registro
+        """
+        self.lock = threading.Lock()
+        self.conn = connect(db_name)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS api_usage (
+                day TEXT,
+                service TEXT,
+                calls INTEGER,
+                PRIMARY KEY (day, service)
+            );
+            CREATE TABLE IF NOT EXISTS scheduled_demand (
+                topic_key TEXT,
+                service TEXT,
+                topic TEXT,
+                run_time TEXT,
+                calls INTEGER,
+                updated_at REAL,
+                PRIMARY KEY (topic_key, service)
+            );
+        """)
+        self.conn.commit()
+
+    def record(self, service, calls=1):
+        """Suma llamadas a un servicio en el día de hoy."""
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO api_usage (day, service, calls) VALUES (?, ?, ?) "
+                "ON CONFLICT(day, service) DO UPDATE SET calls = calls + excluded.calls",
+                (datetime.date.today().isoformat(), service, calls)
+            )
+            self.conn.commit()
+
+    def usage(self, day=None):
+        """
+        Args:
+            day (str): Fecha (YYYY-MM-DD, por defecto hoy)
+
+        Returns:
+            dict: Llamadas de cada servicio en ese día
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT service, calls FROM api_usage WHERE day = ?", (day or datetime.date.today().isoformat(),)
+            ).fetchall()
+        return {row['service']: row['calls'] for row in rows}
+
+    def used(self, service, day=None):
+        """Llamadas gastadas por un servicio en un día (por defecto hoy)."""
+        return self.usage(day).get(service, 0)
+
+    def expect(self, topic, run_time, calls, service='newsapi'):
+        """
+        Registra (o renueva) la ejecución diaria programada de un tema.
+
+        Args:
+            topic (str): Tema
+            run_time (str): Hora de ejecución (HH:MM)
+            calls (int): Llamadas mínimas que necesita el informe
+            service (str): Servicio al que se harán esas llamadas
+        """
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO scheduled_demand (topic_key, service, topic, run_time, calls, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (topic_key(topic), service, topic, run_time, calls, time.time())
+            )
+            self.conn.commit()
+
+    def upcoming(self, service=None, exclude_topic=None, now=None):
+        """
+        Ejecuciones programadas que quedan por hacer hoy.
+
+        Args:
+            service (str): Solo las llamadas a este servicio (por defecto, todas)
+            exclude_topic (str): Tema que no se cuenta (el que está pidiendo cuota)
+            now (datetime.datetime): Instante actual (por defecto, ahora)
+
+        Returns:
+            list: Ejecuciones ('topic', 'service', 'run_time', 'calls'), por hora
+        """
+        now = now or datetime.datetime.now()
+        sql = ("SELECT topic_key, service, topic, run_time, calls FROM scheduled_demand "
+               "WHERE run_time > ? AND updated_at > ?")
+        params = [now.strftime('%H:%M'), time.time() - DEMAND_MAX_AGE]
+        if service:
+            sql += " AND service = ?"
+            params.append(service)
+        with self.lock:
+            rows = self.conn.execute(sql + " ORDER BY run_time", params).fetchall()
+        excluded = topic_key(exclude_topic) if exclude_topic else None
+        return [
+            {'topic': row['topic'], 'service': row['service'], 'run_time': row['run_time'], 'calls': row['calls']}
+            for row in rows if row['topic_key'] != excluded
+        ]
+
+class QuotaPlanner:
+    """
+    Reparte la cuota diaria restante de un servicio: primero se aparta lo que
+    necesitan los informes programados que quedan hoy; del resto, los informes
+    de relleno (backfill) y la vigilancia dejan además un margen sin tocar.
+    Cuando la cuota disponible no alcanza para una búsqueda completa (hasta tres
+    estrategias y varias páginas), se hace una sola llamada o se usa el índice local.
+    """
+
+    def __init__(self, ledger, quotas, low_priority_share=0.2):
+        """
+        Args:
+            ledger (QuotaLedger): Registro de llamadas
+            quotas (dict): Llamadas al día permitidas de cada servicio
+            low_priority_share (float): Parte de la cuota que no gastan los informes de relleno
+        """
+        self.ledger = ledger
+        self.quotas = quotas
+        self.low_priority_share = low_priority_share
+
+    def available(self, service, priority=DEFAULT_PRIORITY, topic=None):
+        """
+        Llamadas que puede gastar ahora un informe.
+
+        Args:
+            service (str): Nombre del servicio
+            priority (str): Clase de prioridad del informe
+            topic (str): Tema del informe (no se reserva cuota para sí mismo)
+
+        Returns:
+            int: Llamadas disponibles (None si el servicio no tiene cuota)
+        """
+        quota = self.quotas.get(service)
+        if quota is None:
+            return None
+        reserved = sum(run['calls'] for run in self.ledger.upcoming(service, exclude_topic=topic))
+        if priority == 'backfill':
+            reserved += int(quota * self.low_priority_share)
+        return max(0, quota - self.ledger.used(service) - reserved)
+
+    def plan_search(self, service, priority=DEFAULT_PRIORITY, topic=None, full_calls=3):
+        """
+        Elige cómo buscar según la cuota disponible.
+
+        Args:
+            service (str): Nombre del servicio
+            priority (str): Clase de prioridad del informe
+            topic (str): Tema de la búsqueda
+            full_calls (int): Llamadas que puede necesitar la búsqueda completa
+
+        Returns:
+            str: 'full' (todas las estrategias), 'single' (una llamada) o 'cached' (índice local)
+        """
+        available = self.available(service, priority, topic)
+        if available is None or available >= full_calls:
+            mode = 'full'
+        elif available >= 1:
+            mode = 'single'
+        else:
+            mode = 'cached'
+        SEARCH_MODES.inc(mode)
+        return mode
+
+    def status(self):
+        """
+        Returns:
+            dict: Cuota, llamadas gastadas, reservadas y disponibles de cada servicio con cuota
+        """
+        usage = self.ledger.usage()
+        status = {}
+        for service, quota in self.quotas.items():
+            reserved = sum(run['calls'] for run in self.ledger.upcoming(service))
+            status[service] = {
+                'quota': quota,
+                'used': usage.get(service, 0),
+                'reserved': reserved,
+                'available': max(0, quota - usage.get(service, 0) - reserved)
+            }
+        return status
+
+def record_call(service):
+    """Registra una llamada saliente en la cuota del día (sin interrumpir la llamada si falla)."""
+    try:
+        ledger = get_quota_ledger()
+        ledger.record(service)
+        QUOTA_USED.set(service, value=ledger.used(service))
+    except Exception as e:
+        logger.warning(f"No se pudo registrar la llamada a {service} en la cuota: {str(e)}")
+
+def get_quota_ledger():
+    """
+    Devuelve el registro de cuota compartido por el proceso.
+
+    Returns:
+        QuotaLedger: Registro abierto
+    """
+    global _ledger
+    with _quota_lock:
+        if _ledger is None:
+            _ledger = QuotaLedger()
+        return _ledger
+
+def get_quota_planner():
+    """
+    Devuelve el planificador de cuota del proceso.
+
+    Las cuotas se configuran con API_DAILY_QUOTAS (por defecto, las 100
+    peticiones al día del plan gratuito de NewsAPI) y el margen de los informes
+    de relleno con QUOTA_LOW_PRIORITY_SHARE.
+
+    Returns:
+        QuotaPlanner: Planificador
+    """
+    global _planner
+    ledger = get_quota_ledger()
+    with _quota_lock:
+        if _planner is None:
+            _planner = QuotaPlanner(
+                ledger,
+                parse_quotas(os.getenv("API_DAILY_QUOTAS", "newsapi:100")),
+                low_priority_share=float(os.getenv("QUOTA_LOW_PRIORITY_SHARE", 0.2))
+            )
+        return _planner
@@ -0,0 +1,153 @@
+# ranking.py
+import re
+import datetime
+import unicodedata
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Parámetros de BM25
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Peso de cada componente en la puntuación final
+RELEVANCE_WEIGHT = 0.7
+RECENCY_WEIGHT = 0.3
+
+# Horas en las que la puntuación por actualidad se reduce a la mitad
+RECENCY_HALF_LIFE_HOURS = 48.0
+
+# Factor por el que se multiplica la puntuación por cada artículo ya elegido de la misma fuente
+SOURCE_DIVERSITY_PENALTY = 0.6
+
+_WORD_RE = re.compile(r'\w+')
+
+def tokenize(text):
+    """
+    Divide un texto en palabras en minúsculas y sin acentos.
+
+    Args:
+        text (str): Texto a dividir
+
+    Returns:
+        list: Lista de palabras
+    """
+    if not text:
+        return []
+    text = text.lower()
+    if not text.isascii():
+        # Descomponer y descartar los acentos en C (mucho más rápido que carácter a carácter)
+        text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return _WORD_RE.findall(text)
+
+def bm25_scores(query, documents):
+    """
+    Calcula la puntuación BM25 de cada documento respecto a la consulta.
+
+    Args:
+        query (str): Texto de la consulta
+        documents (list): Lista de textos
+
+    Returns:
+        numpy.ndarray: Puntuación de cada documento
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    n_docs = len(documents)
+    if not terms or not n_docs:
+        return np.zeros(n_docs)
+
+    # Contar solo los términos de la consulta: un único recorrido por documento
+    # en Python y el resto de la fórmula vectorizado con NumPy
+    tf_rows = []
+    lengths = []
+    for document in documents:
+        tokens = tokenize(document)
+        lengths.append(len(tokens))
+        tf_rows.append([tokens.count(term) for term in terms])
+
+    tf = np.array(tf_rows, dtype=np.float64)
+    doc_lengths = np.array(lengths, dtype=np.float64)
+    avg_length = doc_lengths.mean() or 1.0
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths / avg_length)
+    weights = tf * (BM25_K1 + 1) / (tf + norm[:, None])
+    return weights @ idf
+
+def _parse_date(value):
+    """Convierte una fecha ISO a datetime64 (NaT si no es válida)."""
+    try:
+        return np.datetime64(value, 's')
+    except ValueError:
+        return np.datetime64('NaT')
+
+def recency_scores(articles, now=None):
+    """
+    Puntúa los artículos según su antigüedad (1 = recién publicado).
+
+    Args:
+        articles (list): Lista de artículos con 'publishedAt'
+        now (datetime): Momento de referencia (por defecto, ahora en UTC)
+
+    Returns:
+        numpy.ndarray: Puntuación de cada artículo entre 0 y 1
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    # NewsAPI devuelve las fechas en UTC ('2024-01-31T10:00:00Z'): basta con los 19 primeros caracteres
+    dates = [(article.get('publishedAt') or '')[:19] or 'NaT' for article in articles]
+    try:
+        published = np.array(dates, dtype='datetime64[s]')
+    except ValueError:
+        published = np.array([_parse_date(value) for value in dates], dtype='datetime64[s]')
+
+    delta = np.datetime64(now, 's') - published
+    ages = np.maximum(delta.astype(np.float64) / 3600, 0.0)
+    ages[np.isnat(delta)] = np.inf
+    return np.exp2(-ages / RECENCY_HALF_LIFE_HOURS)
+
+def rank_articles(articles, topic, max_results, now=None):
+    """
+    Elige los mejores artículos de un conjunto de candidatos según su relevancia
+    para el tema, su actualidad y la diversidad de fuentes.
+
+    Args:
+        articles (list): Artículos candidatos
+        topic (str): Tema de búsqueda
+        max_results (int): Número de artículos a conservar
+        now (datetime): Momento de referencia para la actualidad
+
+    Returns:
+        list: Los max_results mejores artículos, en orden de puntuación
+    """
+    if len(articles) <= 1:
+        return articles[:max_results]
+
+    documents = [f"{a.get('title') or ''} {a.get('description') or ''}" for a in articles]
+    relevance = bm25_scores(topic, documents)
+    if relevance.max() > 0:
+        relevance = relevance / relevance.max()
+
+    base = RELEVANCE_WEIGHT * relevance + RECENCY_WEIGHT * recency_scores(articles, now)
+
+    # Selección voraz penalizando las fuentes ya elegidas
+    sources = [(a.get('source') or {}).get('name') or '' for a in articles]
+    source_ids = {name: i for i, name in enumerate(dict.fromkeys(sources))}
+    source_of = np.array([source_ids[name] for name in sources])
+    penalty = np.ones(len(source_ids))
+    available = np.ones(len(articles), dtype=bool)
+
+    selected = []
+    for _ in range(min(max_results, len(articles))):
+        scores = np.where(available, base * penalty[source_of], -np.inf)
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        penalty[source_of[best]] *= SOURCE_DIVERSITY_PENALTY
+
+    ranked = []
+    for i in selected:
+        articles[i]['relevance_score'] = round(float(base[i]), 4)
+        ranked.append(articles[i])
+    return ranked
@@ -0,0 +1,121 @@
+# rate_limiter.py
+import os
+import time
+import threading
+import logging
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Clases de prioridad, de la más a la menos urgente
+PRIORITIES = ('interactive', 'scheduled', 'backfill')
+DEFAULT_PRIORITY = 'scheduled'
+
+RATE_LIMIT_WAIT = metrics.Histogram('news_rate_limit_wait_seconds',
+                                    'Espera en el limitador de llamadas por servicio y prioridad',
+                                    ['service', 'priority'])
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def priority_rank(priority):
+    """Posición de una clase de prioridad (0 la más urgente); las desconocidas van al final."""
+    return PRIORITIES.index(priority) if priority in PRIORITIES else len(PRIORITIES)
+
+class PriorityRateLimiter:
+    """
+    Cubo de fichas (token bucket) de un servicio con una parte reservada para
+    los informes interactivos: los programados solo gastan fichas si quedan
+    por encima de la reserva y los de relleno (backfill), por encima del doble.
+    Así un informe pedido desde la web no espera a que termine un lote.
+    """
+
+    def __init__(self, service, rate, burst=None, reserved_share=0.3):
+        """
+        Args:
+            service (str): Nombre del servicio
+            rate (float): Llamadas por segundo
+            burst (float): Capacidad del cubo (por defecto, dos segundos de llamadas)
+            reserved_share (float): Parte de la capacidad reservada para 'interactive'
+        """
+        self.service = service
+        self.rate = rate
+        self.capacity = max(2.0, burst or rate * 2)
+        reserve = max(1.0, self.capacity * reserved_share)
+        # Fichas que deben quedar en el cubo después de que cada clase gaste una
+        self.reserves = {
+            'interactive': 0.0,
+            'scheduled': min(reserve, self.capacity - 1),
+            'backfill': min(reserve * 2, self.capacity - 1)
+        }
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, priority=DEFAULT_PRIORITY):
+        """
+        Espera hasta poder hacer una llamada con la prioridad indicada.
+
+        Args:
+            priority (str): Clase de prioridad ('interactive', 'scheduled', 'backfill')
+
+        Returns:
+            float: Segundos de espera
+        """
+        reserve = self.reserves.get(priority, self.reserves['backfill'])
+        start = time.monotonic()
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1 + reserve:
+                    self.tokens -= 1
+                    break
+                wait = (1 + reserve - self.tokens) / self.rate
+            time.sleep(min(wait, 0.5))
+        waited = time.monotonic() - start
+        RATE_LIMIT_WAIT.observe(self.service, priority, value=waited)
+        return waited
+
+def parse_rate_limits(value):
+    """
+    Interpreta API_RATE_LIMITS ('notion:3,newsapi:5').
+
+    Returns:
+        dict: Llamadas por segundo de cada servicio
+    """
+    limits = {}
+    for item in (value or '').split(','):
+        service, _, rate = item.partition(':')
+        try:
+            if service.strip() and float(rate) > 0:
+                limits[service.strip()] = float(rate)
+        except ValueError:
+            logger.warning(f"Límite de llamadas no válido en API_RATE_LIMITS: '{item}'")
+    return limits
+
+def get_rate_limiter(service):
+    """
+    Devuelve el limitador de un servicio (None si no tiene límite configurado).
+
+    Los límites se configuran con API_RATE_LIMITS (por defecto, las 3 llamadas
+    por segundo de Notion) y la reserva interactiva con INTERACTIVE_RESERVED_SHARE.
+
+    Args:
+        service (str): Nombre del servicio
+
+    Returns:
+        PriorityRateLimiter: Limitador del servicio o None
+    """
+    with _limiters_lock:
+        if service not in _limiters:
+            rate = parse_rate_limits(os.getenv("API_RATE_LIMITS", "notion:3")).get(service)
+            _limiters[service] = PriorityRateLimiter(
+                service, rate, reserved_share=float(os.getenv("INTERACTIVE_RESERVED_SHARE", 0.3))
+            ) if rate else None
+        return _limiters[service]
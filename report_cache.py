@@ -0,0 +1,124 @@
+# report_cache.py
+import json
+import hashlib
+import datetime
+import threading
+import logging
+
+from storage import connect
+
+logger = logging.getLogger(__name__)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def make_report_key(topic, max_results, options=None, day=None):
+    """
+    Calcula la clave de caché de un informe.
+
+    Args:
+        topic (str): Tema del informe (no distingue mayúsculas ni espacios extremos)
+        max_results (int): Número máximo de artículos
+        options (dict): Opciones que cambian el contenido del informe
+        day (str): Día del informe (YYYY-MM-DD, por defecto hoy)
+
+    Returns:
+        str: Clave del informe
+    """
+    day = day or datetime.date.today().isoformat()
+    payload = json.dumps({
+        'topic': ' '.join((topic or '').lower().split()),
+        'max_results': int(max_results),
+        'options': options or {},
+        'day': day
+    }, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+class ReportCache:
+    """
+    Caché de informes ya publicados en Notion, para no repetir la búsqueda ni
+    crear páginas duplicadas con la misma petición en el mismo día.
+    """
+
+    def __init__(self, db_name='reports.db'):
+        """
+        Args:
+            db_name (str): Archivo SQLite de la caché
+        """
+        self.lock = threading.Lock()
+        self.conn = connect(db_name)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS report_cache (
+                cache_key TEXT PRIMARY KEY,
+                topic TEXT,
+                day TEXT,
+                page_url TEXT,
+                articles_count INTEGER,
+                created_at TEXT
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, cache_key):
+        """
+        Busca un informe en la caché.
+
+        Args:
+            cache_key (str): Clave calculada con make_report_key
+
+        Returns:
+            dict: Datos del informe ('page_url', 'articles_count', ...) o None
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM report_cache WHERE cache_key = ?", (cache_key,)).fetchone()
+        return dict(row) if row else None
+
+    def put(self, cache_key, topic, page_url, articles_count, day=None):
+        """
+        Guarda un informe publicado.
+
+        Args:
+            cache_key (str): Clave calculada con make_report_key
+            topic (str): Tema del informe
+            page_url (str): URL de la página de Notion
+            articles_count (int): Número de artículos del informe
+            day (str): Día del informe (YYYY-MM-DD, por defecto hoy)
+        """
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO report_cache (cache_key, topic, day, page_url, articles_count, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (cache_key, topic, day or datetime.date.today().isoformat(), page_url, articles_count,
+                 datetime.datetime.now().isoformat())
+            )
+            self.conn.commit()
+
+    def purge(self, keep_days=7):
+        """
+        Elimina las entradas de días anteriores.
+
+        Args:
+            keep_days (int): Días que se conservan
+
+        Returns:
+            int: Número de entradas eliminadas
+        """
+        limit = (datetime.date.today() - datetime.timedelta(days=keep_days)).isoformat()
+        with self.lock:
+            cursor = self.conn.execute("DELETE FROM report_cache WHERE day < ?", (limit,))
+            self.conn.commit()
+        return cursor.rowcount
+
+def get_report_cache():
+    """
+    Devuelve la caché de informes compartida por el proceso.
+
+    Returns:
+        ReportCache: Caché abierta
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ReportCache()
+            _cache.purge()
+        return _cache
@@ -0,0 +1,307 @@
+# rss_feeds.py
+import json
+import datetime
+import threading
+import logging
+import email.utils
+import xml.etree.ElementTree as ET
+import requests
+
+from articles import prepare_article, topic_key
+from storage import connect
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Número máximo de IDs vistos que se recuerdan por feed
+MAX_SEEN_IDS = 500
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+def _local_name(tag):
+    """Devuelve el nombre de una etiqueta XML sin su espacio de nombres."""
+    return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else ''
+
+def _parse_feed_date(value):
+    """
+    Convierte una fecha de RSS (RFC 822) o Atom (ISO 8601) al formato de NewsAPI.
+
+    Args:
+        value (str): Fecha tal como aparece en el feed
+
+    Returns:
+        str: Fecha en formato 'YYYY-MM-DDTHH:MM:SSZ' o None si no se puede interpretar
+    """
+    if not value:
+        return None
+    value = value.strip()
+    date_obj = None
+    try:
+        date_obj = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        pass
+    if date_obj is None:
+        # Algunas versiones de Python devuelven None en lugar de lanzar una excepción
+        try:
+            date_obj = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if date_obj.tzinfo is not None:
+        date_obj = date_obj.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return date_obj.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def _item_to_article(item, feed_title):
+    """
+    Convierte un elemento <item> (RSS) o <entry> (Atom) en un artículo con la
+    misma estructura que devuelve NewsAPI.
+
+    Args:
+        item (Element): Elemento XML del artículo
+        feed_title (str): Título del feed, usado como nombre de la fuente
+
+    Returns:
+        dict: Artículo preparado
+    """
+    fields = {}
+    image_url = None
+    link = None
+
+    for child in item:
+        name = _local_name(child.tag)
+        text = (child.text or '').strip()
+
+        if name == 'link':
+            # En Atom el enlace va en el atributo href
+            href = child.get('href')
+            if href and child.get('rel', 'alternate') == 'alternate':
+                link = link or href
+            elif text:
+                link = link or text
+        elif name in ('enclosure', 'content', 'thumbnail') and child.get('url'):
+            if not child.get('type') or child.get('type', '').startswith('image'):
+                image_url = image_url or child.get('url')
+        elif text and name not in fields:
+            fields[name] = text
+
+    article = {
+        'source': {'id': None, 'name': feed_title or 'RSS'},
+        'author': fields.get('creator') or fields.get('author'),
+        'title': fields.get('title'),
+        'description': fields.get('description') or fields.get('summary') or fields.get('content'),
+        'url': link or fields.get('guid') or fields.get('id'),
+        'urlToImage': image_url,
+        'publishedAt': _parse_feed_date(fields.get('pubDate') or fields.get('published') or fields.get('updated')),
+        'content': None
+    }
+    return prepare_article(article)
+
+class FeedFetcher:
+    """
+    Descarga feeds RSS/Atom con peticiones condicionales (ETag/Last-Modified)
+    y los procesa de forma incremental, deteniéndose en el primer artículo ya visto.
+
+    El estado (ETag, artículos vistos...) se guarda por feed y tema: un artículo
+    descartado por no tratar de un tema sigue siendo nuevo para los demás.
+    """
+
+    def __init__(self, db_name='feeds.db', timeout=10, chunk_size=8192):
+        """
+        Args:
+            db_name (str): Archivo SQLite donde se guarda el estado de cada feed
+            timeout (int): Tiempo máximo de espera por petición (segundos)
+            chunk_size (int): Tamaño de los bloques leídos de la respuesta
+        """
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.lock = threading.Lock()
+        self.conn = connect(db_name)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS feed_state (
+                url TEXT,
+                topic_key TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                last_size INTEGER DEFAULT 0,
+                seen_ids TEXT DEFAULT '[]',
+                updated_at TEXT,
+                PRIMARY KEY (url, topic_key)
+            );
+        """)
+        self.conn.commit()
+        self.stats = {
+            'requests': 0,
+            'not_modified': 0,
+            'bytes_received': 0,
+            'bytes_saved': 0,
+            'new_articles': 0,
+            'errors': 0
+        }
+
+    def _load_state(self, url, topic=None):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT * FROM feed_state WHERE url = ? AND topic_key = ?", (url, topic_key(topic))
+            ).fetchone()
+        if not row:
+            return {'etag': None, 'last_modified': None, 'last_size': 0, 'seen_ids': []}
+        return {
+            'etag': row['etag'],
+            'last_modified': row['last_modified'],
+            'last_size': row['last_size'] or 0,
+            'seen_ids': json.loads(row['seen_ids'] or '[]')
+        }
+
+    def _add_stats(self, **values):
+        # Un mismo lector lo usan a la vez varios hilos (web, workers)
+        with self.lock:
+            for name, value in values.items():
+                self.stats[name] += value
+
+    def _save_state(self, url, topic, state):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO feed_state (url, topic_key, etag, last_modified, last_size, seen_ids, "
+                "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, topic_key(topic), state['etag'], state['last_modified'], state['last_size'],
+                 json.dumps(state['seen_ids'][:MAX_SEEN_IDS]), datetime.datetime.now().isoformat())
+            )
+            self.conn.commit()
+
+    def fetch(self, url, topic=None):
+        """
+        Descarga un feed y devuelve solo los artículos nuevos desde la última consulta
+        del mismo tema.
+
+        Args:
+            url (str): URL del feed RSS/Atom
+            topic (str): Tema para el que se consulta (cada tema tiene su propio estado)
+
+        Returns:
+            dict: Resultado con 'status' ('ok', 'not_modified' o 'error'),
+                  'articles', 'bytes_received' y 'bytes_saved'
+        """
+        state = self._load_state(url, topic)
+        seen = set(state['seen_ids'])
+        result = {'status': 'ok', 'articles': [], 'bytes_received': 0, 'bytes_saved': 0}
+
+        headers = {'User-Agent': 'Mozilla/5.0 (compatible; NewsAutomation/1.0)'}
+        if state['etag']:
+            headers['If-None-Match'] = state['etag']
+        if state['last_modified']:
+            headers['If-Modified-Since'] = state['last_modified']
+
+        self._add_stats(requests=1)
+        try:
+            response = requests.get(url, headers=headers, timeout=self.timeout, stream=True)
+        except Exception as e:
+            logger.error(f"Error al descargar el feed {url}: {str(e)}")
+            self._add_stats(errors=1)
+            return {'status': 'error', 'articles': [], 'bytes_received': 0, 'bytes_saved': 0, 'message': str(e)}
+
+        try:
+            if response.status_code == 304:
+                # El feed no ha cambiado: nos ahorramos descargarlo entero
+                metrics.count_cache('rss_feed', True)
+                result['status'] = 'not_modified'
+                result['bytes_saved'] = state['last_size']
+                self._add_stats(not_modified=1, bytes_saved=state['last_size'])
+                logger.info(f"Feed sin cambios (304): {url}")
+                return result
+
+            if response.status_code != 200:
+                logger.warning(f"Error HTTP {response.status_code} al descargar el feed {url}")
+                self._add_stats(errors=1)
+                return {'status': 'error', 'articles': [], 'bytes_received': 0, 'bytes_saved': 0,
+                        'message': f'Error HTTP {response.status_code}'}
+
+            metrics.count_cache('rss_feed', False)
+            new_articles, bytes_read = self._parse_incremental(response, seen)
+            metrics.add_payload_bytes('rss', bytes_read, direction='in')
+        finally:
+            response.close()
+
+        result['articles'] = new_articles
+        result['bytes_received'] = bytes_read
+        self._add_stats(bytes_received=bytes_read, new_articles=len(new_articles))
+
+        content_length = response.headers.get('Content-Length')
+        state['etag'] = response.headers.get('ETag')
+        state['last_modified'] = response.headers.get('Last-Modified')
+        state['last_size'] = int(content_length) if content_length and content_length.isdigit() else bytes_read
+        state['seen_ids'] = [article['article_id'] for article in new_articles] + state['seen_ids']
+        self._save_state(url, topic, state)
+
+        logger.info(f"Feed {url}: {len(new_articles)} artículos nuevos ({bytes_read} bytes leídos)")
+        return result
+
+    def _parse_incremental(self, response, seen):
+        """
+        Procesa la respuesta por bloques y se detiene en el primer artículo ya visto.
+
+        Args:
+            response (requests.Response): Respuesta en modo stream
+            seen (set): IDs de artículos ya procesados en consultas anteriores
+
+        Returns:
+            tuple: (lista de artículos nuevos, bytes leídos)
+        """
+        parser = ET.XMLPullParser(events=('start', 'end'))
+        articles = []
+        feed_title = None
+        depth_in_item = 0
+        bytes_read = 0
+
+        try:
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                bytes_read += len(chunk)
+                parser.feed(chunk)
+                for event, elem in parser.read_events():
+                    name = _local_name(elem.tag)
+                    if name in ('item', 'entry'):
+                        depth_in_item += 1 if event == 'start' else -1
+                        if event == 'start':
+                            continue
+                        article = _item_to_article(elem, feed_title)
+                        elem.clear()
+                        if article['article_id'] in seen:
+                            # Los feeds van de más reciente a más antiguo: el resto ya se procesó
+                            return articles, bytes_read
+                        articles.append(article)
+                    elif event == 'end' and name == 'title' and depth_in_item == 0 and feed_title is None:
+                        feed_title = (elem.text or '').strip() or None
+        except ET.ParseError as e:
+            logger.warning(f"Error al interpretar el feed: {str(e)}")
+
+        return articles, bytes_read
+
+    def poll(self, urls, topic=None):
+        """
+        Consulta varios feeds y devuelve todos los artículos nuevos.
+
+        Args:
+            urls (list): Lista de URLs de feeds
+            topic (str): Tema para el que se consulta
+
+        Returns:
+            list: Artículos nuevos de todos los feeds
+        """
+        articles = []
+        for url in urls:
+            articles.extend(self.fetch(url, topic)['articles'])
+        logger.info(f"Feeds consultados: {len(urls)} | 304: {self.stats['not_modified']} | "
+                    f"bytes ahorrados: {self.stats['bytes_saved']}")
+        return articles
+
+def get_feed_fetcher():
+    """
+    Devuelve el lector de feeds compartido por el proceso.
+
+    Returns:
+        FeedFetcher: Lector abierto
+    """
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = FeedFetcher()
+        return _fetcher
@@ -0,0 +1,45 @@
+# storage.py
+import os
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Directorio donde se guardan los datos locales (estado de feeds, índices, cachés...)
+DATA_DIR = os.getenv("NEWS_DATA_DIR", os.path.join(os.path.abspath(os.path.dirname(__file__)), "data"))
+
+def data_path(filename):
+    """
+    Devuelve la ruta de un archivo dentro del directorio de datos locales.
+
+    Args:
+        filename (str): Nombre del archivo
+
+    Returns:
+        str: Ruta absoluta del archivo (el directorio se crea si no existe)
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, filename)
+
+def connect(filename):
+    """
+    Abre una conexión SQLite dentro del directorio de datos locales.
+
+    La conexión se puede compartir entre hilos (el llamador debe protegerla
+    con un lock) y usa WAL para que varios procesos puedan leer mientras
+    otro escribe.
+
+    Args:
+        filename (str): Nombre del archivo de base de datos
+
+    Returns:
+        sqlite3.Connection: Conexión abierta
+    """
+    path = filename if filename == ':memory:' else data_path(filename)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+    except sqlite3.DatabaseError as e:
+        logger.warning(f"No se pudo activar WAL en {path}: {str(e)}")
+    return conn
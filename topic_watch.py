@@ -0,0 +1,163 @@
+# topic_watch.py
+import json
+import time
+import datetime
+import threading
+import logging
+
+from articles import topic_key
+from storage import connect
+
+logger = logging.getLogger(__name__)
+
+_store = None
+_store_lock = threading.Lock()
+
+def next_interval(interval, new_articles, min_interval, max_interval):
+    """
+    Calcula el intervalo de la siguiente consulta de un tema: se reduce a la
+    mitad cuando aparecen artículos nuevos (tema activo) y crece un 50 % cuando
+    no hay novedades (tema tranquilo).
+
+    Args:
+        interval (float): Intervalo actual en segundos
+        new_articles (int): Artículos nuevos en la última consulta
+        min_interval (float): Intervalo mínimo
+        max_interval (float): Intervalo máximo
+
+    Returns:
+        float: Nuevo intervalo en segundos
+    """
+    interval = interval / 2 if new_articles else interval * 1.5
+    return max(min_interval, min(max_interval, interval))
+
+def budget_interval(remaining_calls, calls_per_round, now=None):
+    """
+    Intervalo mínimo entre rondas para que las llamadas restantes del día
+    alcancen hasta medianoche.
+
+    Args:
+        remaining_calls (int): Llamadas que quedan en el presupuesto de hoy
+        calls_per_round (int): Llamadas de una ronda completa (todos los temas e idiomas)
+        now (datetime.datetime): Instante actual (por defecto, ahora)
+
+    Returns:
+        float: Segundos (hasta medianoche si el presupuesto está agotado)
+    """
+    now = now or datetime.datetime.now()
+    midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time())
+    seconds_left = (midnight - now).total_seconds()
+    if remaining_calls < calls_per_round:
+        return seconds_left
+    return seconds_left * calls_per_round / remaining_calls
+
+class WatchStore:
+    """
+    Estado de la vigilancia de temas: intervalo y próxima consulta de cada tema,
+    último artículo visto, página de Notion del día y llamadas gastadas del
+    presupuesto diario. Se guarda en SQLite para continuar tras un reinicio.
+    """
+
+    def __init__(self, db_name='watch.db'):
+        """
+        Args:
+            db_name (str): Archivo SQLite del estado
+        """
+        self.lock = threading.Lock()
+        self.conn = connect(db_name)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS watched_topics (
+                topic_key TEXT PRIMARY KEY,
+                topic TEXT,
+                interval REAL,
+                next_check REAL,
+                last_published_at TEXT,
+                boundary_ids TEXT,
+                page_id TEXT,
+                page_date TEXT,
+                articles_sent INTEGER DEFAULT 0,
+                new_articles INTEGER DEFAULT 0,
+                checked_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS api_budget (
+                day TEXT PRIMARY KEY,
+                calls INTEGER
+            );
+        """)
+        self.conn.commit()
+
+    def _decode(self, row):
+        state = dict(row)
+        state['boundary_ids'] = json.loads(state['boundary_ids'] or '[]')
+        return state
+
+    def watch(self, topic, interval):
+        """
+        Añade un tema a la vigilancia (si ya estaba, conserva su estado).
+
+        Args:
+            topic (str): Tema
+            interval (float): Intervalo inicial en segundos
+
+        Returns:
+            dict: Estado del tema
+        """
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO watched_topics (topic_key, topic, interval, next_check) VALUES (?, ?, ?, ?)",
+                (topic_key(topic), topic, interval, time.time())
+            )
+            self.conn.commit()
+        return self.get(topic)
+
+    def get(self, topic):
+        """
+        Returns:
+            dict: Estado del tema o None si no se vigila
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM watched_topics WHERE topic_key = ?", (topic_key(topic),)).fetchone()
+        return self._decode(row) if row else None
+
+    def update(self, topic, **fields):
+        """Actualiza campos del estado de un tema."""
+        if 'boundary_ids' in fields:
+            fields['boundary_ids'] = json.dumps(fields['boundary_ids'])
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self.lock:
+            self.conn.execute(
+                f"UPDATE watched_topics SET {assignments} WHERE topic_key = ?",
+                (*fields.values(), topic_key(topic))
+            )
+            self.conn.commit()
+
+    def calls_today(self):
+        """Llamadas a la API gastadas hoy por la vigilancia."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT calls FROM api_budget WHERE day = ?", (datetime.date.today().isoformat(),)
+            ).fetchone()
+        return row['calls'] if row else 0
+
+    def spend(self, calls):
+        """Suma llamadas al presupuesto de hoy."""
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO api_budget (day, calls) VALUES (?, ?) "
+                "ON CONFLICT(day) DO UPDATE SET calls = calls + excluded.calls",
+                (datetime.date.today().isoformat(), calls)
+            )
+            self.conn.commit()
+
+def get_watch_store():
+    """
+    Devuelve el estado de la vigilancia compartido por el proceso.
+
+    Returns:
+        WatchStore: Estado abierto
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = WatchStore()
+        return _store
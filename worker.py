@@ -0,0 +1,232 @@
+# worker.py
+"""
+Worker de informes: reclama trabajos de la cola compartida (job_queue) y los
+ejecuta con generate_news_report. Se pueden lanzar tantos procesos como se
+quiera; con la cola SQLite, todos en la misma máquina (para varias máquinas,
+JOB_QUEUE_BACKEND con un almacén compartido):
+
+    python news_automation.py worker --hilos 2
+"""
+import os
+import time
+import datetime
+import uuid
+import socket
+import threading
+import logging
+
+from news_automation import generate_news_report, start_checkpoint_run, finish_checkpoint_run
+from job_queue import get_job_queue
+from rate_limiter import DEFAULT_PRIORITY
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Duración del alquiler de un trabajo; el worker lo renueva cada tercio de este tiempo
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 60))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 2))
+# Espera mínima antes de volver a entregar un trabajo aplazado por un servicio caído
+JOB_DEFER_SECONDS = float(os.getenv("JOB_DEFER_SECONDS", 60))
+
+# Parámetros de generate_news_report que se guardan en el punto de control
+REPORT_PARAMS = ('max_results', 'include_images', 'include_ai_summary', 'notification_method',
+                 'rss_feeds', 'include_full_content', 'languages', 'date_range', 'window_days', 'priority')
+
+def enqueue_report(topic, job_id=None, priority=DEFAULT_PRIORITY, **options):
+    """
+    Añade un informe a la cola de trabajos.
+
+    Args:
+        topic (str): Tema del informe
+        job_id (str): ID del trabajo (por defecto se genera uno)
+        priority (str): Clase de prioridad ('interactive', 'scheduled', 'backfill')
+        **options: Argumentos de generate_news_report (max_results, include_images, ...)
+
+    Returns:
+        str: ID del trabajo
+    """
+    return get_job_queue().enqueue('report', dict(options, topic=topic), job_id=job_id, priority=priority)
+
+def _seconds_since(timestamp):
+    return (datetime.datetime.now() - datetime.datetime.fromisoformat(timestamp)).total_seconds()
+
+class ReportWorker:
+    """
+    Reclama trabajos de la cola y los procesa uno a uno, enviando latidos
+    mientras el trabajo está en curso.
+    """
+
+    def __init__(self, queue=None, worker_id=None, lease_seconds=None, poll_interval=None, priorities=None):
+        """
+        Args:
+            queue (JobQueue): Cola de trabajos (por defecto, la compartida)
+            worker_id (str): Identificador del worker (por defecto, máquina-pid-aleatorio)
+            lease_seconds (float): Duración del alquiler de cada trabajo
+            poll_interval (float): Espera entre consultas cuando la cola está vacía
+            priorities (list): Solo procesar trabajos de estas clases de prioridad (por defecto, todas)
+        """
+        self.queue = queue or get_job_queue()
+        self.priorities = priorities
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.lease_seconds = lease_seconds or JOB_LEASE_SECONDS
+        self.poll_interval = poll_interval or JOB_POLL_INTERVAL
+
+    def run(self, stop_event=None):
+        """
+        Procesa trabajos hasta que se active stop_event (o indefinidamente).
+
+        Args:
+            stop_event (threading.Event): Evento para detener el worker
+        """
+        stop_event = stop_event or threading.Event()
+        logger.info(f"Worker {self.worker_id} esperando trabajos")
+        while not stop_event.is_set():
+            try:
+                processed = self.run_once()
+            except Exception as e:
+                logger.error(f"Error en el worker {self.worker_id}: {str(e)}")
+                processed = False
+            if not processed:
+                stop_event.wait(self.poll_interval)
+
+    def run_once(self):
+        """
+        Reclama y procesa un trabajo.
+
+        Returns:
+            bool: True si había un trabajo pendiente
+        """
+        job = self.queue.claim(self.worker_id, self.lease_seconds, self.priorities)
+        if not job:
+            return False
+
+        priority = job.get('priority') or DEFAULT_PRIORITY
+        if job['attempts'] == 1:
+            metrics.JOB_LATENCY.observe(priority, 'wait', value=_seconds_since(job['created_at']))
+
+        logger.info(f"Worker {self.worker_id}: trabajo {job['job_id']} (entrega {job['attempts']})")
+        stop_heartbeat = threading.Event()
+        lease_lost = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job['job_id'], stop_heartbeat, lease_lost),
+                                     daemon=True)
+        heartbeat.start()
+        try:
+            status, message, result = self.process(job, lease_lost)
+            if status == 'cancelled':
+                # El trabajo ya pertenece a otro worker: no tocar su estado en la cola
+                logger.warning(f"Worker {self.worker_id}: trabajo {job['job_id']} abandonado ({message})")
+            elif status == 'deferred':
+                # Servicio caído: el trabajo vuelve a la cola y continúa desde su punto de control
+                delay = max(result.get('retry_in') or 0, JOB_DEFER_SECONDS)
+                self.queue.defer(job['job_id'], self.worker_id, delay, message)
+            else:
+                self.queue.finish(job['job_id'], self.worker_id, status, message, result)
+                metrics.JOB_LATENCY.observe(priority, 'total', value=_seconds_since(job['created_at']))
+        except Exception as e:
+            logger.error(f"Error al procesar el trabajo {job['job_id']}: {str(e)}")
+            self.queue.release(job['job_id'], self.worker_id, str(e))
+        finally:
+            stop_heartbeat.set()
+            heartbeat.join()
+        return True
+
+    def process(self, job, cancel_event=None):
+        """
+        Ejecuta un trabajo.
+
+        Args:
+            job (dict): Trabajo reclamado
+            cancel_event (threading.Event): Se activa si el worker pierde el alquiler del trabajo
+
+        Returns:
+            tuple: (estado final, mensaje, resultado)
+        """
+        if job['kind'] != 'report':
+            raise ValueError(f"Tipo de trabajo desconocido: {job['kind']}")
+
+        payload = dict(job['payload'])
+        topic = payload.pop('topic')
+        priority = job.get('priority') or DEFAULT_PRIORITY
+
+        # Una nueva entrega del mismo trabajo continúa el punto de control de la anterior
+        run_id = job.get('run_id')
+        if not run_id:
+            params = dict(payload, priority=priority)
+            run_id = start_checkpoint_run(topic, {name: params[name] for name in REPORT_PARAMS if name in params})
+            if run_id:
+                self.queue.update(job['job_id'], run_id=run_id)
+
+        result = generate_news_report(
+            topic,
+            run_id=run_id,
+            priority=priority,
+            progress=lambda message: self.queue.update(job['job_id'], message=message),
+            cancel_event=cancel_event,
+            **payload
+        )
+        if result.get('cancelled'):
+            return 'cancelled', result['message'], result
+        if result['success']:
+            return 'completed', result['message'], result
+        if result.get('deferred'):
+            # La cola se encarga de reintentarlo; el programador no debe reanudarlo por su cuenta
+            finish_checkpoint_run(run_id, 'queued')
+            return 'deferred', result['message'], result
+        return 'error', result['message'], result
+
+    def _heartbeat(self, job_id, stop_event, lease_lost):
+        while not stop_event.wait(self.lease_seconds / 3):
+            try:
+                if not self.queue.heartbeat(job_id, self.worker_id, self.lease_seconds):
+                    # Otro worker puede haberlo reclamado: el informe se detiene antes de escribir en Notion
+                    logger.warning(f"El trabajo {job_id} ya no pertenece al worker {self.worker_id}; se cancela")
+                    lease_lost.set()
+                    return
+            except Exception as e:
+                logger.warning(f"No se pudo renovar el alquiler del trabajo {job_id}: {str(e)}")
+
+def start_worker_threads(count, stop_event=None, reserved=0):
+    """
+    Arranca workers en hilos del proceso actual (modo local de la interfaz web).
+
+    Args:
+        count (int): Número de hilos
+        stop_event (threading.Event): Evento para detenerlos
+        reserved (int): Cuántos de ellos solo procesan informes interactivos, para que
+                        un lote programado no ocupe todos los hilos
+
+    Returns:
+        list: Hilos arrancados
+
+    Raises:
+        ValueError: Si no queda al menos un hilo para los informes programados y de relleno
+    """
+    if not 0 <= reserved < count:
+        raise ValueError(f"Los hilos reservados ({reserved}) deben ser menos que los hilos ({count})")
+    threads = []
+    for i in range(count):
+        worker = ReportWorker(priorities=['interactive'] if i < reserved else None)
+        thread = threading.Thread(target=worker.run, args=(stop_event,), daemon=True)
+        thread.start()
+        threads.append(thread)
+    return threads
+
+def run_worker(threads=1, reserved=0):
+    """
+    Ejecuta el modo worker hasta que se interrumpa con Ctrl+C.
+
+    Args:
+        threads (int): Número de trabajos simultáneos en este proceso
+        reserved (int): Hilos reservados para informes interactivos (menos que threads)
+    """
+    stop_event = threading.Event()
+    start_worker_threads(threads, stop_event, reserved)
+    logger.info(f"Modo worker iniciado con {threads} hilos ({reserved} reservados para informes interactivos)")
+    try:
+        while True:
+            time.sleep(60)
+            logger.info(f"Estado de la cola: {get_job_queue().stats()}")
+            logger.info(f"Latencia por prioridad: {get_job_queue().latency_percentiles()}")
+    except KeyboardInterrupt:
+        logger.info("Deteniendo el worker...")
+        stop_event.set()